@@ -42,6 +42,9 @@ if not SPEC_path or not ckpt_path or not fs_ckpt_path or not fs_disk_image_path:
 spec_base_dir = SPEC_path + "/"
 ckpt_base_dir = ckpt_path + "/"
 fs_ckpt_base_dir = fs_ckpt_path + "/"
+# BBV profile, clusters and per-simpoint checkpoints of every app: simpoints/ckpt_<app>/
+# (see extra-tools/SPEC-se-checkpoints/simpoint_spec_checkpoints.py)
+simpoint_base_dir = ckpt_base_dir + "simpoints/"
 disk_image_path = fs_disk_image_path
 
 spec_app_dirs = {
@@ -0,0 +1,163 @@
+"""
+Instruction stops of launch_se_from_ckpt.py and launch_fs_from_ckpt.py, counted in
+instructions committed since the checkpoint: end of --fast_forward_insts (switch to the
+detailed core), end of --warmup_insts (stats reset), a stats dump every --stats_interval
+instructions after the warmup and end of --max_insts.
+
+gem5 has no periodic dump by instructions: every stop returns to Python, which does its
+work and schedules the next one. The stop arithmetic doesn't need gem5 (see
+tests/test_launch_inst_stops.py), m5 is only imported by the methods that drive the
+simulation.
+"""
+
+
+def add_inst_stop_arguments(parser):
+    """Command line options of the stats dumps and instruction stops, shared by the launchers."""
+    parser.add_argument(
+        "--stats_interval",
+        type=int,
+        default=None,
+        help="Also dump the stats every this many ticks (or committed instructions, see --stats_interval_unit), appended to stats.txt. Every dump carries finalTick and simInsts (e.g. for run-jobs/early_stop.py or data-parsing/phase_parser.sh)",
+    )
+    parser.add_argument(
+        "--stats_interval_unit",
+        choices=["ticks", "insts"],
+        default="ticks",
+        help="Unit of --stats_interval: ticks or instructions committed by the core",
+    )
+    parser.add_argument(
+        "--fast_forward_insts",
+        type=int,
+        default=None,
+        help="Run this many instructions from the checkpoint on an atomic CPU (warming the caches and the branch predictor) before switching to the configured core. --warmup_insts and --max_insts count from the switch",
+    )
+    parser.add_argument(
+        "--warmup_insts",
+        type=int,
+        default=None,
+        help="Simulate this many committed instructions from the checkpoint and reset the stats before measuring",
+    )
+    parser.add_argument(
+        "--max_insts",
+        type=int,
+        default=None,
+        help="Exit after this many committed instructions (after the warmup), instead of waiting for the workend events",
+    )
+
+
+class InstStops:
+    def __init__(self, fast_forward_insts=None, warmup_insts=None, max_insts=None, insts_interval=None):
+        """
+        Args:
+            fast_forward_insts: instructions run on the atomic cores
+            warmup_insts: instructions simulated after the fast-forward before the stats reset
+            max_insts: instructions measured after the warmup, or None to wait for the workload
+            insts_interval: instructions between two stats dumps after the warmup, or None
+        """
+        self.fast_forward_end = fast_forward_insts or 0
+        self.warmup_end = self.fast_forward_end + (warmup_insts or 0)
+        self.run_end = self.warmup_end + max_insts if max_insts else None
+        self.insts_interval = insts_interval or None
+        self._sim = None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            fast_forward_insts=args.fast_forward_insts,
+            warmup_insts=args.warmup_insts,
+            max_insts=args.max_insts,
+            insts_interval=args.stats_interval if args.stats_interval_unit == "insts" else None,
+        )
+
+    def next_inst_stop(self, insts):
+        """First stop after insts committed instructions, or None when no stop remains."""
+        stops = []
+        if insts < self.fast_forward_end:
+            stops.append(self.fast_forward_end)
+        if insts < self.warmup_end:
+            stops.append(self.warmup_end)
+        if self.run_end is not None and insts < self.run_end:
+            stops.append(self.run_end)
+        if self.insts_interval:
+            stops.append(self.warmup_end + (max(insts - self.warmup_end, 0) // self.insts_interval + 1) * self.insts_interval)
+        return min(stops) if stops else None
+
+    def is_dump(self, insts):
+        """Whether the stats are dumped at a stop."""
+        return bool(self.insts_interval) and insts > self.warmup_end and (insts - self.warmup_end) % self.insts_interval == 0
+
+    def exit_event_handlers(self, board, config_name, num_ticks):
+        """The MAX_INSTS and SCHEDULED_TICK handlers of the Simulator, none without stops."""
+        from gem5.simulate.exit_event import ExitEvent
+
+        if self.next_inst_stop(0) is None:
+            return {}
+        return {
+            ExitEvent.MAX_INSTS: self._handle_max_insts(board, config_name),
+            ExitEvent.SCHEDULED_TICK: self._handle_scheduled_tick(num_ticks),
+        }
+
+    def _handle_max_insts(self, board, config_name):
+        import m5
+
+        insts = 0
+        num_dumps = 0
+        while True:
+            insts = self.next_inst_stop(insts)
+            if insts == self.fast_forward_end:
+                print(f"Fast-forwarded {self.fast_forward_end} instructions at tick {self._sim.get_current_tick()}, switching to {config_name}")
+                board.get_processor().switch_to_detailed()
+            if insts == self.warmup_end:
+                print(f"Measuring from tick {self._sim.get_current_tick()} ({self.warmup_end} instructions after the checkpoint), resetting stats")
+                m5.stats.reset()
+            if insts == self.run_end:
+                print(f"Reached {self.run_end - self.warmup_end} instructions after the warmup, exiting...")
+                yield True
+            if self.is_dump(insts):
+                num_dumps += 1
+                m5.stats.dump()
+                print(f"Stats dump #{num_dumps} at tick {self._sim.get_current_tick()}")
+            # The instruction stops are relative to the instructions committed so far. After
+            # the last one the run goes on until the workend events or --num_ticks
+            stop = self.next_inst_stop(insts)
+            if stop is not None:
+                self._sim.schedule_max_insts(stop - insts)
+            yield False
+
+    def _handle_scheduled_tick(self, num_ticks):
+        while True:
+            print(f"Reached {num_ticks} ticks after the checkpoint (tick {self._sim.get_current_tick()}), exiting...")
+            yield True
+
+    def start(self, sim, board, args):
+        """
+        Before sim.run(): start the periodic stats dumps by ticks, switch to the atomic cores
+        with --fast_forward_insts and schedule the first instruction stop.
+        """
+        import m5
+
+        self._sim = sim
+        tick_dumps = args.stats_interval and args.stats_interval_unit == "ticks"
+        first_stop = self.next_inst_stop(0)
+        if not tick_dumps and first_stop is None:
+            return
+        # The dump event, the CPU switch and the tick exit go on the event queues of the
+        # built system, and the Simulator has no public call to build it before run().
+        # _instantiate() is the call run() itself starts with (and then skips) in the
+        # gem5 versions these launchers are used with, v23.0 to v24.1: check it when
+        # updating gem5
+        if not hasattr(sim, "_instantiate"):
+            raise RuntimeError("This gem5 version has no Simulator._instantiate(), see launch_inst_stops.py")
+        sim._instantiate()
+        if tick_dumps:
+            # The first dump is one interval after the current tick (the checkpoint's one)
+            m5.stats.periodicStatDump(args.stats_interval)
+        if self.fast_forward_end:
+            # The checkpoint is restored into the detailed cores, which have its CPU names
+            board.get_processor().switch_to_fast_forward()
+        if first_stop is not None:
+            # Each return to Python restarts the budget of sim.run(num_ticks), so the tick
+            # limit is also scheduled as an exit event. It counts from the current tick,
+            # which after the restore is the tick of the checkpoint
+            sim.schedule_max_insts(first_stop)
+            m5.scheduleTickExitFromCurrent(args.num_ticks)
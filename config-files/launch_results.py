@@ -0,0 +1,76 @@
+"""
+results.json: the key stats of a run, written by launch_se_from_ckpt.py and
+launch_fs_from_ckpt.py next to stats.txt once sim.run() returns. They are read from gem5's
+stats objects, so aggregating a sweep is one small file read per run instead of grepping
+stats.txt (data-parsing/read_outputs.sh read_key_metrics, run-jobs/run_outputs.py read_results).
+
+The values are the ones of the final dump of stats.txt: counted since the last stats reset
+(--warmup_insts), as the parsers read them.
+"""
+import os
+import json
+import math
+import time
+
+import m5
+from m5.objects import Root
+
+RESULTS_FILE = "results.json"
+
+# Host time when the launcher started (imports, building the system and restoring count)
+LAUNCH_TIME = time.time()
+
+# Stats of the core, relative to board.processor.cores.core as named in stats.txt
+CORE_STATS = {
+    "ipc": "ipc",
+    "num_cycles": "numCycles",
+    "cond_predicted": "branchPred.condPredicted",
+    "cond_incorrect": "branchPred.condIncorrect",
+    # mispredictDueToPredictor_0::total in stats.txt
+    "bp_mispredicts": "branchPred.mispredictDueToPredictor",
+}
+CORE_PATH = "processor.cores.core"
+
+
+def stat_value(group, path):
+    """Value of a stat of a SimObject (the total of vectors and formulas), or None."""
+    try:
+        info = group.resolveStat(path)
+    except Exception:
+        return None
+    if info is None:
+        return None
+    value = info.value
+    if isinstance(value, (list, tuple)):
+        value = sum(value)
+    value = float(value)
+    # NaN (e.g. an IPC without cycles) is not valid JSON
+    return value if math.isfinite(value) else None
+
+
+def per_kilo_insts(count, insts):
+    if count is None or not insts:
+        return None
+    return 1000.0 * count / insts
+
+
+def write_results(board, sim, params):
+    """Write results.json to the outdir with the metrics, params, exit cause, final tick and host time."""
+    root = Root.getInstance()
+    metrics = {"sim_insts": stat_value(root, "simInsts")}
+    for name, path in CORE_STATS.items():
+        metrics[name] = stat_value(board, f"{CORE_PATH}.{path}")
+    metrics["cond_mpki"] = per_kilo_insts(metrics["cond_incorrect"], metrics["sim_insts"])
+    metrics["bp_mpki"] = per_kilo_insts(metrics["bp_mispredicts"], metrics["sim_insts"])
+
+    results = {
+        "metrics": metrics,
+        "params": params,
+        "exit_cause": sim.get_last_exit_event_cause(),
+        "final_tick": sim.get_current_tick(),
+        "host_seconds": time.time() - LAUNCH_TIME,
+    }
+    path = os.path.join(m5.options.outdir, RESULTS_FILE)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Results written to {path}")
@@ -31,7 +31,9 @@ import argparse
 from pathlib import Path
 import sys
 import os
+import json
 
+import m5
 from gem5.resources.resource import *
 from gem5.simulate.exit_event import ExitEvent
 from gem5.simulate.simulator import Simulator
@@ -41,6 +43,8 @@ from gem5.components.boards.riscv_board import RiscvBoard
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from SPEC_cmds import *
+from launch_results import write_results
+from launch_inst_stops import add_inst_stop_arguments, InstStops
 
 parser = argparse.ArgumentParser(
     description="gem5 system call emulation simulation configuration"
@@ -96,6 +100,22 @@ parser.add_argument(
     help="String representation of a dictionary with extra parameters to override in the processor configuration (e.g. '{\"fetchWidth\": 2}' to override fetchWidth to 2)",
 )
 
+add_inst_stop_arguments(parser)
+
+parser.add_argument(
+    "--simpoint",
+    type=int,
+    default=None,
+    help="Simulate the simpoint of this cluster (see run-jobs/simpoints.py): restore its checkpoint, warm up and measure one interval. --warmup_insts and --max_insts default to its warmup and the interval length",
+)
+
+parser.add_argument(
+    "--ckpt_dir",
+    type=str,
+    default=None,
+    help="Restore from this checkpoint directory (e.g. a node-local copy) instead of the app's one in the checkpoints path",
+)
+
 args = parser.parse_args()
 mem_size_str = f"{args.mem_size}GiB"
 
@@ -114,6 +134,29 @@ if args.extra_params:
 else:
     extra_params = None
 
+# The simpoint's warmup and interval come from the simpoints.json of the app, its weight
+# is copied to simpoint.json in the outdir for data-parsing/simpoint_parser.sh
+simpoint = None
+if args.simpoint is not None:
+    simpoint_dir = simpoint_base_dir + spec_ckpt_dirs[args.spec_number]
+    try:
+        with open(os.path.join(simpoint_dir, "simpoints.json"), "r") as f:
+            simpoints = json.load(f)
+    except OSError as e:
+        print(f"ERROR: Failed to read the simpoints of {args.spec_number}: {e}")
+        exit(1)
+    simpoint = next((s for s in simpoints["simpoints"] if s["cluster"] == args.simpoint), None)
+    if simpoint is None:
+        print(f"ERROR: {args.spec_number} has no simpoint for cluster {args.simpoint}")
+        exit(1)
+    simpoint = dict(simpoint, interval=simpoints["interval"])
+    if args.warmup_insts is None:
+        args.warmup_insts = simpoint["warmup_insts"]
+    if args.max_insts is None:
+        args.max_insts = simpoint["interval"]
+    with open(os.path.join(m5.options.outdir, "simpoint.json"), "w") as f:
+        json.dump(simpoint, f, indent=2)
+
 match (args.bp):
     case "TAGE_SC_L":
         from sys_config_factory.factories import tage_sc_l_factory
@@ -140,22 +183,25 @@ match (args.bp):
         from sys_config_factory.factories import randombp_factory
         bp_factory = randombp_factory
 
+# The factories add switched out atomic cores to the processor to fast-forward on
+fast_forward = bool(args.fast_forward_insts)
+
 match (args.config):
     case "MediumSonicBOOM":
         from sys_config_factory.factories import medium_sonicboom_factory
-        sys_config = medium_sonicboom_factory(mem_size_str, bp_factory)
+        sys_config = medium_sonicboom_factory(mem_size_str, bp_factory, fast_forward=fast_forward)
     case "SmallO3":
         from sys_config_factory.factories import small_O3_factory
-        sys_config = small_O3_factory(mem_size_str, bp_factory)
+        sys_config = small_O3_factory(mem_size_str, bp_factory, fast_forward=fast_forward)
     case "BigO3":
         from sys_config_factory.factories import big_O3_factory
-        sys_config = big_O3_factory(mem_size_str, bp_factory)
+        sys_config = big_O3_factory(mem_size_str, bp_factory, fast_forward=fast_forward)
     case "BaseCPU":
         from sys_config_factory.factories import base_cpu_factory
-        sys_config = base_cpu_factory(mem_size_str, bp_factory, extra=extra_params)
+        sys_config = base_cpu_factory(mem_size_str, bp_factory, extra=extra_params, fast_forward=fast_forward)
     case "CVA6":
         from sys_config_factory.factories import cva6_factory
-        sys_config = cva6_factory(mem_size_str, bp_factory)
+        sys_config = cva6_factory(mem_size_str, bp_factory, fast_forward=fast_forward)
 
 # Board
 board = RiscvBoard(
@@ -165,8 +211,14 @@ board = RiscvBoard(
     cache_hierarchy=sys_config["cache_hierarchy"]
 )
 
-# Checkpoint
-ckpt_path_str = ckpt_base_dir + spec_ckpt_dirs[args.spec_number]
+# Checkpoint (--ckpt_dir points to a staged copy of the same checkpoint, --simpoint restores
+# from the one taken at the start of the warmup of the simpoint)
+if args.ckpt_dir:
+    ckpt_path_str = args.ckpt_dir
+elif simpoint is not None:
+    ckpt_path_str = f"{simpoint_dir}/cpt_{args.simpoint}"
+else:
+    ckpt_path_str = ckpt_base_dir + spec_ckpt_dirs[args.spec_number]
 ckpt_path = Path(ckpt_path_str)
 if not ckpt_path.exists():
     print(f"ERROR: Checkpoint path does not exist: {ckpt_path}")
@@ -190,6 +242,8 @@ def handle_workend():
             yield False
         else:
             print(f"Reached {total_works} workend events, exiting...")
+            if args.max_insts:
+                print(f"WARNING: the workend events came before --max_insts {args.max_insts} instructions")
             yield True
 
 def handle_workbegin():
@@ -230,23 +284,45 @@ board.set_se_binary_workload(
 
 # Simulator
 # Create simulator
+on_exit_event = {
+    ExitEvent.WORKBEGIN: handle_workbegin(),
+    ExitEvent.WORKEND: handle_workend(),
+    ExitEvent.EXIT: exit_event_handler(),
+}
+# Instruction stops (fast-forward, warmup, --max_insts and dumps every N instructions)
+inst_stops = InstStops.from_args(args)
+on_exit_event.update(inst_stops.exit_event_handlers(board, args.config, args.num_ticks))
+
 sim = Simulator(
     board=board,
-    on_exit_event={
-        ExitEvent.WORKBEGIN: handle_workbegin(),
-        ExitEvent.WORKEND: handle_workend(),
-        ExitEvent.EXIT: exit_event_handler(),
-    },
+    on_exit_event=on_exit_event,
 )
 
+# Periodic stats dumps, so the progress of the run can be followed from stats.txt, and
+# the first instruction stop
+inst_stops.start(sim, board, args)
+if args.stats_interval:
+    print(f"Dumping stats every {args.stats_interval} {args.stats_interval_unit}")
+
 # Run simulation
 print("================== Starting my Simulation ==================")
 print(f"Starting simulation from checkpoint: {ckpt_path}")
 print(f"Configuration: {args.config}")
+if simpoint is not None:
+    print(f"Simpoint of cluster {args.simpoint}: interval {simpoint['interval_index']}, weight {simpoint['weight']:.4f}")
 print(f"Running for maximum {args.num_ticks} ticks or {total_works} workend events")
+if args.fast_forward_insts:
+    print(f"Fast-forwarding {args.fast_forward_insts} instructions on an atomic CPU")
+if args.warmup_insts:
+    print(f"Warming up for {args.warmup_insts} instructions before measuring")
+if args.max_insts:
+    print(f"Measuring {args.max_insts} instructions")
 
 sim.run(args.num_ticks)
 
+# Key stats, params and exit cause in results.json, so the parsers don't need to grep stats.txt
+write_results(board, sim, dict(vars(args), extra_params=extra_params, ckpt_path=str(ckpt_path), simpoint=simpoint))
+
 print(f"\nSimulation finished:")
 print(f"  Final tick: {sim.get_current_tick()}")
 print(f"  Exit cause: {sim.get_last_exit_event_cause()}")
@@ -4,6 +4,7 @@ from m5.objects import (
 )
 from gem5.components.processors.base_cpu_core import BaseCPUCore
 from gem5.components.processors.base_cpu_processor import BaseCPUProcessor
+from gem5.components.processors.cpu_types import CPUTypes
 from gem5.isas import ISA
 
 import sys
@@ -12,6 +13,8 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
 from queueComponents import CVA6S_FUPool
+# The same module the factories import, not a second copy of its SimObjects
+from components.processorComponents import FastForwardProcessor
 
 class RiscvMinorCore(RiscvMinorCPU):
     def __init__(
@@ -93,4 +96,30 @@ class RiscvMinorProcessor(BaseCPUProcessor):
             )
             for _ in range(numCores)
         ]
-        super().__init__(cores)
\ No newline at end of file
+        super().__init__(cores)
+
+
+# The same cores with the atomic ones to fast-forward
+class RiscvMinorFastForwardProcessor(FastForwardProcessor):
+    def __init__(
+        self,
+        numCores,
+        width,
+        fetch_buffer_size,
+        decode_buffer_size,
+        scoreboard_entries,
+        lq_entries,
+        sq_entries
+    ):
+        cores: List[BaseCPUCore] = [
+            RiscvMinorStdCore(
+                width,
+                fetch_buffer_size,
+                decode_buffer_size,
+                scoreboard_entries,
+                lq_entries,
+                sq_entries
+            )
+            for _ in range(numCores)
+        ]
+        super().__init__(cores, cpu_type=CPUTypes.MINOR)
\ No newline at end of file
@@ -4,6 +4,56 @@ from m5.objects import (
 from gem5.isas import ISA
 from gem5.components.processors.base_cpu_core import BaseCPUCore
 from gem5.components.processors.base_cpu_processor import BaseCPUProcessor
+from gem5.components.processors.cpu_types import CPUTypes, get_mem_mode
+from gem5.components.processors.simple_core import SimpleCore
+from gem5.components.processors.switchable_processor import SwitchableProcessor
+
+#FAST-FORWARD
+# Processor that can also run on atomic cores, to fast-forward from a checkpoint. Only
+# built with --fast_forward_insts, the other runs keep their BaseCPUProcessor
+class FastForwardProcessor(SwitchableProcessor):
+    def __init__(self, cores, cpu_type):
+        """
+        SwitchableProcessor with the detailed cores of a configuration, which start the
+        simulation, and as many switched out atomic cores. The launcher restores the
+        checkpoint into the detailed cores, switches to the atomic ones to fast-forward
+        and switches back to measure.
+
+        SwitchableProcessor names every core list after its key: the detailed cores keep
+        their usual names (board.processor.cores.core), so the checkpoint, stats.txt and
+        config.json paths don't change, and the atomic cores are
+        board.processor.fast_forward_cores.core. The board gives the SE process to both.
+
+        Args:
+            cores: detailed cores (BaseCPUCore)
+            cpu_type: CPUTypes of the detailed cores, for the memory mode of the board
+        """
+        self._detailed_cores = list(cores)
+        self._fast_forward_cores = [
+            SimpleCore(cpu_type=CPUTypes.ATOMIC, core_id=i, isa=ISA.RISCV)
+            for i in range(len(self._detailed_cores))
+        ]
+        self._mem_mode = get_mem_mode(cpu_type)
+        super().__init__(
+            switchable_cores={"cores": self._detailed_cores, "fast_forward_cores": self._fast_forward_cores},
+            starting_cores="cores",
+        )
+
+    def incorporate_processor(self, board):
+        super().incorporate_processor(board)
+        # The memory mode of the starting cores, as SimpleSwitchableProcessor sets it.
+        # m5.switchCpus changes it on every switch
+        board.set_mem_mode(self._mem_mode)
+        # The factories set the branch predictor after building the processor. The atomic
+        # cores share it, so fast-forwarding also trains it
+        for atomic_core, detailed_core in zip(self._fast_forward_cores, self._detailed_cores):
+            atomic_core.core.branchPred = detailed_core.core.branchPred
+
+    def switch_to_fast_forward(self):
+        self.switch_to_processor("fast_forward_cores")
+
+    def switch_to_detailed(self):
+        self.switch_to_processor("cores")
 
 #PROCESSOR
 # The core with the functionalities that interest us
@@ -43,3 +93,9 @@ class RiscvO3Processor(BaseCPUProcessor):
     def __init__(self, proc_config=None, num_cores=1):
         cores = [RiscvO3StdCore(proc_config=proc_config) for _ in range(num_cores)]
         super().__init__(cores)
+
+# The same cores with the atomic ones to fast-forward
+class RiscvO3FastForwardProcessor(FastForwardProcessor):
+    def __init__(self, proc_config=None, num_cores=1):
+        cores = [RiscvO3StdCore(proc_config=proc_config) for _ in range(num_cores)]
+        super().__init__(cores, cpu_type=CPUTypes.O3)
@@ -5,9 +5,12 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.'))
 
 from gem5.components.cachehierarchies.classic.private_l1_shared_l2_cache_hierarchy import PrivateL1SharedL2CacheHierarchy
 
-from components.processorComponents import RiscvO3Processor
+from components.processorComponents import RiscvO3Processor, RiscvO3FastForwardProcessor
 
-def medium_sonicboom_factory(memory_size, bp_factory):
+# With fast_forward=True every factory builds the processor that can also run on atomic cores
+# (see FastForwardProcessor in components/processorComponents.py) instead of the usual one
+
+def medium_sonicboom_factory(memory_size, bp_factory, fast_forward=False):
     """
     Generates a system that uses the medium SONICBOOM processor configuration,
     4 GiB memory, L1I/L1D = 32KB, L2 = 256KiB and L3 = 2MB
@@ -45,7 +48,8 @@ def medium_sonicboom_factory(memory_size, bp_factory):
     memory_hierarchy = DualChannelDDR4_2400(size=memory_size)
 
     from data.medium_sonicboom_data import MEDIUM_SONICBOOM_PROCESSOR_CONFIG
-    processor = RiscvO3Processor(proc_config=MEDIUM_SONICBOOM_PROCESSOR_CONFIG, num_cores=1)
+    processor_class = RiscvO3FastForwardProcessor if fast_forward else RiscvO3Processor
+    processor = processor_class(proc_config=MEDIUM_SONICBOOM_PROCESSOR_CONFIG, num_cores=1)
 
     processor.cores[0].core.branchPred = bp_factory()
     from components.branchPredictorComponents import BTB, RAS
@@ -60,7 +64,7 @@ def medium_sonicboom_factory(memory_size, bp_factory):
         "frequency": "3GHz"
     }
 
-def small_O3_factory(memory_size, bp_factory):
+def small_O3_factory(memory_size, bp_factory, fast_forward=False):
     """
     Generates a system that uses a small O3 processor configuration,
     L1I/L1D = 32KB, L2 = 256KB and L3 = 2MB
@@ -98,7 +102,8 @@ def small_O3_factory(memory_size, bp_factory):
     memory_hierarchy = DualChannelDDR4_2400(size=memory_size)
 
     from data.small_O3_data import SMALL_O3_PROCESSOR_CONFIG
-    processor = RiscvO3Processor(proc_config=SMALL_O3_PROCESSOR_CONFIG, num_cores=1)
+    processor_class = RiscvO3FastForwardProcessor if fast_forward else RiscvO3Processor
+    processor = processor_class(proc_config=SMALL_O3_PROCESSOR_CONFIG, num_cores=1)
 
     processor.cores[0].core.branchPred = bp_factory()
     from components.branchPredictorComponents import BTB, RAS
@@ -117,7 +122,7 @@ def small_O3_factory(memory_size, bp_factory):
         "frequency": "3GHz"
     }
 
-def big_O3_factory(memory_size, bp_factory):
+def big_O3_factory(memory_size, bp_factory, fast_forward=False):
     """
     Generates a system that uses a big O3 processor configuration,
     L1I/L1D = 64KB, L2 = 1MB and L3 = 16MB
@@ -155,7 +160,8 @@ def big_O3_factory(memory_size, bp_factory):
     memory_hierarchy = DualChannelDDR4_2400(size=memory_size)
 
     from data.big_O3_data import BIG_O3_PROCESSOR_CONFIG
-    processor = RiscvO3Processor(proc_config=BIG_O3_PROCESSOR_CONFIG, num_cores=1)
+    processor_class = RiscvO3FastForwardProcessor if fast_forward else RiscvO3Processor
+    processor = processor_class(proc_config=BIG_O3_PROCESSOR_CONFIG, num_cores=1)
 
     processor.cores[0].core.branchPred = bp_factory()
     from components.branchPredictorComponents import BTB, RAS
@@ -174,7 +180,7 @@ def big_O3_factory(memory_size, bp_factory):
         "frequency": "3GHz"
     }
 
-def base_cpu_factory(memory_size, bp_factory, extra=None):
+def base_cpu_factory(memory_size, bp_factory, extra=None, fast_forward=False):
     """
     Generates a system that uses the predetermined gem5 configuration,
     L1I/L1D = 64KB, L2 = 1MB and L3 = 16MB (the BigO3 cache hierarchy)
@@ -222,7 +228,8 @@ def base_cpu_factory(memory_size, bp_factory, extra=None):
             IQ_config = extra["numIQEntries"]
             del processor_config["numIQEntries"] # This is not a param of the processor, it's used to determine the IQ config
     
-    processor = RiscvO3Processor(proc_config=processor_config, num_cores=1)
+    processor_class = RiscvO3FastForwardProcessor if fast_forward else RiscvO3Processor
+    processor = processor_class(proc_config=processor_config, num_cores=1)
 
     processor.cores[0].core.branchPred = bp_factory()
     from components.branchPredictorComponents import BTB, RAS
@@ -248,7 +255,7 @@ def base_cpu_factory(memory_size, bp_factory, extra=None):
         "frequency": "3GHz"
     }
 
-def cva6_factory(memory_size, bp_factory):
+def cva6_factory(memory_size, bp_factory, fast_forward=False):
     """
     Generates a system that uses the CVA6 processor configuration,
     L1I/L1D = 64, L2 = 128KB and no L3
@@ -270,9 +277,10 @@ def cva6_factory(memory_size, bp_factory):
     memory_hierarchy = DualChannelDDR4_2400(size=memory_size)
 
     from data.cva6_data import CVA6_PROCESSOR_CONFIG
-    from components.inorderProcessorComponents import RiscvMinorProcessor
+    from components.inorderProcessorComponents import RiscvMinorProcessor, RiscvMinorFastForwardProcessor
 
-    processor = RiscvMinorProcessor(**CVA6_PROCESSOR_CONFIG, numCores=1)
+    processor_class = RiscvMinorFastForwardProcessor if fast_forward else RiscvMinorProcessor
+    processor = processor_class(**CVA6_PROCESSOR_CONFIG, numCores=1)
 
     processor.cores[0].core.branchPred = bp_factory()
     from components.branchPredictorComponents import BTB, RAS
@@ -1,9 +1,15 @@
 #!/bin/bash
 
 # --- Check for Arguments ---
-echo "This script is hardcoded to look inside 1-output-jobs/BaseCPU, because of that no argument is taken"
+# Optional argument: the output_subdir of the delay sweep (BaseCPU_delay_experiments by
+# default, BaseCPU_delay_samples for the sampled per-stage delays of delays_stages.toml)
+SUBDIR="${1:-BaseCPU_delay_experiments}"
+echo "Reading the delay sweep in 1-output-jobs/${SUBDIR}"
 
 # --- Configuration ---
+# stats.txt/config.json can be compressed (.zst), read them through these helpers
+source "$(dirname "$0")/read_outputs.sh"
+
 # Base directories
 ENV_FILE="./.env"
 if [ -f "$ENV_FILE" ]; then
@@ -14,10 +20,14 @@ else
     echo "Warning: .env file not found at $ENV_FILE. Please create it with the necessary variables."
 fi
 BASE_DIR=$repo_path
-DATA_SRC_DIR="${BASE_DIR}/1-output-jobs/BaseCPU_delay_experiments"
+DATA_SRC_DIR="${BASE_DIR}/1-output-jobs/${SUBDIR}"
 OUTPUT_DEST_DIR="${BASE_DIR}/2-parser-output"
 
-OUTPUT_FILE="${OUTPUT_DEST_DIR}/delay_experiments_data.csv"
+if [ "$SUBDIR" == "BaseCPU_delay_experiments" ]; then
+    OUTPUT_FILE="${OUTPUT_DEST_DIR}/delay_experiments_data.csv"
+else
+    OUTPUT_FILE="${OUTPUT_DEST_DIR}/${SUBDIR#BaseCPU_}_data.csv"
+fi
 
 # --- Validation ---
 # Check if the source directory actually exists
@@ -33,7 +43,7 @@ if [ ! -d "$OUTPUT_DEST_DIR" ]; then
 fi
 
 # --- Initialize Output File ---
-echo "general_delay,cond_bp,App,IPC,Sim_Is,total_cond_predicts,wrong_cond_predicts,total_bp_mispredicts" > "$OUTPUT_FILE"
+echo "general_delay,cond_bp,App,IPC,Sim_Is,total_cond_predicts,wrong_cond_predicts,total_bp_mispredicts,fetch_to_decode,decode_to_rename,rename_to_iew,issue_to_execute,iew_to_commit,rename_to_rob" > "$OUTPUT_FILE"
 
 echo "------------------------------------------------"
 echo "Reading from:     $DATA_SRC_DIR"
@@ -50,32 +60,39 @@ find "$DATA_SRC_DIR" -maxdepth 4 -mindepth 4 -type d | sort | while read app_dir
     stats_file="${app_dir}/stats.txt"
     config_file="${app_dir}/config.json"
 
-    # 2. Check if stats.txt and config.ini exist
-    if [ ! -f "$stats_file" ]; then
+    # 2. Check if stats.txt and config.ini exist (and are final)
+    if stopped_early "$app_dir"; then
+        echo "Warning: $app_name at $app_dir was stopped early by early_stop.py. Skipping."
+        continue
+    fi
+    if ! output_exists "$stats_file"; then
         echo "Warning: stats.txt not found for $app_name at $stats_file. Skipping."
         continue
     fi
-    if [ ! -f "$config_file" ]; then
+    if ! output_exists "$config_file"; then
         echo "Warning: config.ini not found for $app_name at $config_file. Skipping."
         continue
     fi
+    config=$(read_output "$config_file")
 
     # 3. Extract Metrics
     # (from config.json)
     # Extract general delay from the fetch to rename delay
-    sim_general_delay=$(jq -r '.board.processor.cores[0].core.fetchToDecodeDelay' "$config_file")
+    sim_general_delay=$(jq -r '.board.processor.cores[0].core.fetchToDecodeDelay' <<< "$config")
+    # Extract the delay of every stage (they differ in the sampled sweeps)
+    sim_stage_delays=$(jq -r '.board.processor.cores[0].core | [.fetchToDecodeDelay, .decodeToRenameDelay, .renameToIEWDelay, .issueToExecuteDelay, .iewToCommitDelay, .renameToROBDelay] | map(. // "N/A" | tostring) | join(",")' <<< "$config")
     # Extract cond_bp
-    sim_cond_bp=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.type' "$config_file")
+    sim_cond_bp=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.type' <<< "$config")
     if [ "$sim_cond_bp" == "AlwaysBooleanBP" ]; then
-        always_true=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.alwaysTruePreds' "$config_file")
+        always_true=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.alwaysTruePreds' <<< "$config")
         if [ "$always_true" == "true" ]; then
             sim_cond_bp="AlwaysTrueBP"
         else
             sim_cond_bp="AlwaysFalseBP"
         fi
     elif [ "$sim_cond_bp" == "TAGE_SC_L_64KB" ]; then
-        disable_loop_pred=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.loop_predictor.disable' "$config_file")
-        disable_sc=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.statistical_corrector.disable' "$config_file")
+        disable_loop_pred=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.loop_predictor.disable' <<< "$config")
+        disable_sc=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.statistical_corrector.disable' <<< "$config")
         if [ "$disable_loop_pred" == "false" ] && [ "$disable_sc" == "false" ]; then
             sim_cond_bp="TAGE_SC_L"
         elif [ "$disable_loop_pred" == "false" ]; then
@@ -85,17 +102,9 @@ find "$DATA_SRC_DIR" -maxdepth 4 -mindepth 4 -type d | sort | while read app_dir
         fi
     fi
 
-    # (from stats.txt)
-    # Extract IPC
-    sim_ipc=$(grep "board.processor.cores.core.ipc" "$stats_file" | tail -n 1 | awk '{print $2}')
-    # Extract number of instructions
-    sim_Is=$(grep "simInsts" "$stats_file" | tail -n 1 | awk '{print $2}')    
-    # Extract total conditional branch predictions
-    sim_total_cond_preds=$(grep "board.processor.cores.core.branchPred.condPredicted" "$stats_file" | tail -n 1 | awk '{print $2}')
-    # Extract conditional branch mispredictions
-    sim_incorrect_cond_preds=$(grep "board.processor.cores.core.branchPred.condIncorrect" "$stats_file" | tail -n 1 | awk '{print $2}')
-    # Extract total branch commited mispredicts
-    sim_total_bp_mispredicts=$(grep "mispredictDueToPredictor_0::total" "$stats_file" | tail -n 1 | awk '{print $2}')
+    # (from results.json, or stats.txt for older runs)
+    # Extract IPC, number of instructions, total and wrong conditional branch predictions and total branch commited mispredicts
+    read -r sim_ipc sim_Is sim_total_cond_preds sim_incorrect_cond_preds sim_total_bp_mispredicts <<< "$(read_key_metrics "$app_dir")"
 
     # Handle missing values
     sim_ipc=${sim_ipc:-N/A}
@@ -105,9 +114,10 @@ find "$DATA_SRC_DIR" -maxdepth 4 -mindepth 4 -type d | sort | while read app_dir
     sim_total_bp_mispredicts=${sim_total_bp_mispredicts:-N/A}
     sim_general_delay=${sim_general_delay:-N/A}
     sim_cond_bp=${sim_cond_bp:-N/A}
+    sim_stage_delays=${sim_stage_delays:-N/A,N/A,N/A,N/A,N/A,N/A}
 
     # 4. Append to Output CSV
-    echo "${sim_general_delay},${sim_cond_bp},${app_name},${sim_ipc},${sim_Is},${sim_total_cond_preds},${sim_incorrect_cond_preds},${sim_total_bp_mispredicts}" >> "$OUTPUT_FILE"
+    echo "${sim_general_delay},${sim_cond_bp},${app_name},${sim_ipc},${sim_Is},${sim_total_cond_preds},${sim_incorrect_cond_preds},${sim_total_bp_mispredicts},${sim_stage_delays}" >> "$OUTPUT_FILE"
     echo "Processed App: $app_name"
 done
 echo "------------------------------------------------"
@@ -0,0 +1,86 @@
+#!/bin/bash
+
+# Per-phase IPC and MPKI of the runs launched with --stats_interval: one row per stats dump
+# of every run, with the tick and committed instructions of the dump (finalTick and simInsts)
+# and the IPC and mispredictions per kilo-instruction of the interval since the previous dump
+
+# --- Check for Arguments ---
+if [ "$#" -ne 1 ]; then
+    echo "Usage: $0 Folder inside 1-output-jobs/ with all the results "
+    echo "Example: $0 1-output-jobs/BaseCPU_config_experiments"
+    exit 1
+fi
+
+# --- Configuration ---
+# stats.txt/config.json can be compressed (.zst), read them through these helpers
+source "$(dirname "$0")/read_outputs.sh"
+
+# Base directories
+ENV_FILE="./.env"
+if [ -f "$ENV_FILE" ]; then
+    set -a
+    source "$ENV_FILE"
+    set +a
+else
+    echo "Warning: .env file not found at $ENV_FILE. Please create it with the necessary variables."
+fi
+BASE_DIR=$repo_path
+DATA_SRC_DIR="${BASE_DIR}/${1}"
+OUTPUT_DEST_DIR="${BASE_DIR}/2-parser-output"
+
+results_file_name=$(echo $1 | sed -r 's#^1-output-jobs/##' | sed s#/#_#g)
+OUTPUT_FILE="${OUTPUT_DEST_DIR}/${results_file_name}_phase_data.csv"
+
+# --- Validation ---
+if [ ! -d "$DATA_SRC_DIR" ]; then
+    echo "Error: Directory not found: $DATA_SRC_DIR"
+    exit 1
+fi
+
+if [ ! -d "$OUTPUT_DEST_DIR" ]; then
+    mkdir -p "$OUTPUT_DEST_DIR"
+fi
+
+# --- Initialize Output File ---
+echo "Run,Dump,Tick,Sim_Is,Interval_Is,Interval_cycles,IPC,cond_MPKI,bp_MPKI" > "$OUTPUT_FILE"
+
+echo "------------------------------------------------"
+echo "Reading from:     $DATA_SRC_DIR"
+echo "Writing to:       $OUTPUT_FILE"
+echo "------------------------------------------------"
+
+# --- Main Loop ---
+# Every run directory has a stats.txt (or stats.txt.zst), at whatever depth the sweep puts it
+find "$DATA_SRC_DIR" \( -name stats.txt -o -name stats.txt.zst \) | sed 's#/stats.txt\(.zst\)\?$##' | sort -u | while read run_dir; do
+
+    run_name=${run_dir#$DATA_SRC_DIR/}
+    if stopped_early "$run_dir"; then
+        echo "Warning: $run_name was stopped early by early_stop.py. Skipping."
+        continue
+    fi
+
+    # The stats are cumulative since the last reset, so every interval is the difference with
+    # the previous dump (a drop of simInsts means the stats were reset in between)
+    read_output "${run_dir}/stats.txt" | awk -v run="$run_name" '
+        $1 == "finalTick"                                                   { tick = $2 }
+        $1 == "simInsts"                                                    { insts = $2 }
+        $1 == "board.processor.cores.core.numCycles"                        { cycles = $2 }
+        $1 == "board.processor.cores.core.branchPred.condIncorrect"         { cond = $2 }
+        $1 ~ /mispredictDueToPredictor_0::total$/                           { bp = $2 }
+        /^---------- End Simulation Statistics/ {
+            dump++
+            if (insts < prev_insts) { prev_insts = 0; prev_cycles = 0; prev_cond = 0; prev_bp = 0 }
+            d_insts = insts - prev_insts
+            d_cycles = cycles - prev_cycles
+            ipc = d_cycles > 0 ? sprintf("%.6f", d_insts / d_cycles) : "N/A"
+            cond_mpki = d_insts > 0 ? sprintf("%.4f", 1000 * (cond - prev_cond) / d_insts) : "N/A"
+            bp_mpki = d_insts > 0 ? sprintf("%.4f", 1000 * (bp - prev_bp) / d_insts) : "N/A"
+            printf "%s,%d,%s,%s,%s,%s,%s,%s,%s\n", run, dump, tick, insts, d_insts, d_cycles, ipc, cond_mpki, bp_mpki
+            prev_insts = insts; prev_cycles = cycles; prev_cond = cond; prev_bp = bp
+        }
+    ' >> "$OUTPUT_FILE"
+    echo "Processed run: $run_name"
+done
+echo "------------------------------------------------"
+echo "Data parsing completed. Output written to: $OUTPUT_FILE"
+echo "------------------------------------------------"
@@ -0,0 +1,43 @@
+#!/bin/bash
+# Helpers to read the outputs of a run, compressed with zstd or not (the sbatch scripts
+# generated with --compress leave stats.txt.zst, config.json.zst, ...).
+# Source it from a parser: source "$(dirname "$0")/read_outputs.sh"
+
+# True if the file or its compressed .zst version exists
+output_exists() {
+    [ -f "$1" ] || [ -f "$1.zst" ]
+}
+
+# Print the contents of the file, decompressing the .zst version if that is the one found
+read_output() {
+    if [ -f "$1" ]; then
+        cat "$1"
+    elif [ -f "$1.zst" ]; then
+        zstd -dcq "$1.zst"
+    fi
+}
+
+# True if run-jobs/early_stop.py cancelled the run: its stats are interim, not final
+stopped_early() {
+    [ -f "$1/early_stop.json" ]
+}
+
+# IPC, simInsts, condPredicted, condIncorrect and the total of mispredictDueToPredictor of a run
+# directory, space separated (N/A if missing). Read from the results.json the launchers write
+# (config-files/launch_results.py), or from the last dump of stats.txt for older runs
+read_key_metrics() {
+    if [ -f "$1/results.json" ]; then
+        jq -r '.metrics | [.ipc, .sim_insts, .cond_predicted, .cond_incorrect, .bp_mispredicts]
+               | map(if . == null then "N/A" else tostring end) | join(" ")' "$1/results.json"
+    else
+        read_output "$1/stats.txt" | awk '
+            $1 == "board.processor.cores.core.ipc"                          { ipc = $2 }
+            $1 == "simInsts"                                                { insts = $2 }
+            $1 == "board.processor.cores.core.branchPred.condPredicted"      { cond_preds = $2 }
+            $1 == "board.processor.cores.core.branchPred.condIncorrect"     { cond = $2 }
+            $1 ~ /mispredictDueToPredictor_0::total$/                       { bp = $2 }
+            function na(x) { return x == "" ? "N/A" : x }
+            END { print na(ipc), na(insts), na(cond_preds), na(cond), na(bp) }
+        '
+    fi
+}
@@ -9,6 +9,9 @@ if [ "$#" -ne 1 ]; then
 fi
 
 # --- Configuration ---
+# stats.txt/config.json can be compressed (.zst), read them through these helpers
+source "$(dirname "$0")/read_outputs.sh"
+
 # Base directories
 ENV_FILE="./.env"
 if [ -f "$ENV_FILE" ]; then
@@ -58,30 +61,35 @@ find "$DATA_SRC_DIR" -maxdepth 3 -mindepth 3 -type d | sort | while read app_dir
     stats_file="${app_dir}/stats.txt"
     config_file="${app_dir}/config.json"
 
-    # 2. Check if stats.txt and config.ini exist
-    if [ ! -f "$stats_file" ]; then
+    # 2. Check if stats.txt and config.ini exist (and are final)
+    if stopped_early "$app_dir"; then
+        echo "Warning: $app_name at $app_dir was stopped early by early_stop.py. Skipping."
+        continue
+    fi
+    if ! output_exists "$stats_file"; then
         echo "Warning: stats.txt not found for $app_name at $stats_file. Skipping."
         continue
     fi
-    if [ ! -f "$config_file" ]; then
+    if ! output_exists "$config_file"; then
         echo "Warning: config.ini not found for $app_name at $config_file. Skipping."
         continue
     fi
-        
+    config=$(read_output "$config_file")
+
     # 3. Extract Metrics
     # (from config.json)
     # Extract cond_bp
-    sim_cond_bp=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.type' "$config_file")
+    sim_cond_bp=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.type' <<< "$config")
     if [ "$sim_cond_bp" == "AlwaysBooleanBP" ]; then
-        always_true=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.alwaysTruePreds' "$config_file")
+        always_true=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.alwaysTruePreds' <<< "$config")
         if [ "$always_true" == "true" ]; then
             sim_cond_bp="AlwaysTrueBP"
         else
             sim_cond_bp="AlwaysFalseBP"
         fi
     elif [ "$sim_cond_bp" == "TAGE_SC_L_64KB" ]; then
-        disable_loop_pred=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.loop_predictor.disable' "$config_file")
-        disable_sc=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.statistical_corrector.disable' "$config_file")
+        disable_loop_pred=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.loop_predictor.disable' <<< "$config")
+        disable_sc=$(jq -r '.board.processor.cores[0].core.branchPred.conditionalBranchPred.statistical_corrector.disable' <<< "$config")
         if [ "$disable_loop_pred" == "false" ] && [ "$disable_sc" == "false" ]; then
             sim_cond_bp="TAGE_SC_L"
         elif [ "$disable_loop_pred" == "false" ]; then
@@ -91,21 +99,9 @@ find "$DATA_SRC_DIR" -maxdepth 3 -mindepth 3 -type d | sort | while read app_dir
         fi
     fi
 
-    # (from stats.txt)
-    # Extract IPC
-    sim_ipc=$(grep "board.processor.cores.core.ipc" "$stats_file" | tail -n 1 | awk '{print $2}')
-
-    # Extract number of instructions
-    sim_Is=$(grep "simInsts" "$stats_file" | tail -n 1 | awk '{print $2}')
-    
-    # Extract total conditional branch predictions
-    sim_total_cond_preds=$(grep "board.processor.cores.core.branchPred.condPredicted" "$stats_file" | tail -n 1 | awk '{print $2}')
-
-    # Extract conditional branch mispredictions
-    sim_incorrect_cond_preds=$(grep "board.processor.cores.core.branchPred.condIncorrect" "$stats_file" | tail -n 1 | awk '{print $2}')
-
-    # Extract total branch commited mispredicts
-    sim_total_bp_mispredicts=$(grep "mispredictDueToPredictor_0::total" "$stats_file" | tail -n 1 | awk '{print $2}')
+    # (from results.json, or stats.txt for older runs)
+    # Extract IPC, number of instructions, total and wrong conditional branch predictions and total branch commited mispredicts
+    read -r sim_ipc sim_Is sim_total_cond_preds sim_incorrect_cond_preds sim_total_bp_mispredicts <<< "$(read_key_metrics "$app_dir")"
     
     # Handle missing values
     sim_ipc=${sim_ipc:-N/A}
@@ -0,0 +1,89 @@
+#!/bin/bash
+
+# Whole-program IPC and MPKI of the runs submitted with --simpoints: one row per app, with the
+# metrics of its simpoint_<cluster> runs combined with the weights of their clusters (the
+# simpoint.json the launcher writes). CPI and MPKI are averaged with the weights, IPC = 1/CPI.
+# Weight is the fraction of the ROI the simulated simpoints stand for, the metrics are
+# normalized by it when some simpoint is missing.
+
+# --- Check for Arguments ---
+if [ "$#" -ne 1 ]; then
+    echo "Usage: $0 Folder inside 1-output-jobs/ with all the results "
+    echo "Example: $0 1-output-jobs/BaseCPU_delay_experiments"
+    exit 1
+fi
+
+# --- Configuration ---
+# stats.txt/config.json can be compressed (.zst), read them through these helpers
+source "$(dirname "$0")/read_outputs.sh"
+
+# Base directories
+ENV_FILE="./.env"
+if [ -f "$ENV_FILE" ]; then
+    set -a
+    source "$ENV_FILE"
+    set +a
+else
+    echo "Warning: .env file not found at $ENV_FILE. Please create it with the necessary variables."
+fi
+BASE_DIR=$repo_path
+DATA_SRC_DIR="${BASE_DIR}/${1}"
+OUTPUT_DEST_DIR="${BASE_DIR}/2-parser-output"
+
+results_file_name=$(echo $1 | sed -r 's#^1-output-jobs/##' | sed s#/#_#g)
+OUTPUT_FILE="${OUTPUT_DEST_DIR}/${results_file_name}_simpoint_data.csv"
+
+# --- Validation ---
+if [ ! -d "$DATA_SRC_DIR" ]; then
+    echo "Error: Directory not found: $DATA_SRC_DIR"
+    exit 1
+fi
+
+if [ ! -d "$OUTPUT_DEST_DIR" ]; then
+    mkdir -p "$OUTPUT_DEST_DIR"
+fi
+
+# --- Initialize Output File ---
+echo "Run,Simpoints,Weight,IPC,CPI,cond_MPKI,bp_MPKI" > "$OUTPUT_FILE"
+
+echo "------------------------------------------------"
+echo "Reading from:     $DATA_SRC_DIR"
+echo "Writing to:       $OUTPUT_FILE"
+echo "------------------------------------------------"
+
+# --- Main Loop ---
+# Every app directory with simpoint runs, at whatever depth the sweep puts it
+find "$DATA_SRC_DIR" -type d -name "simpoint_*" | xargs -r -n 1 dirname | sort -u | while read app_dir; do
+
+    run_name=${app_dir#$DATA_SRC_DIR/}
+
+    # One line per simpoint: weight, instructions, cycles, conditional and BP mispredictions
+    for simpoint_dir in "$app_dir"/simpoint_*; do
+        if stopped_early "$simpoint_dir"; then
+            echo "Warning: $simpoint_dir was stopped early by early_stop.py. Skipping." >&2
+            continue
+        fi
+        if ! output_exists "${simpoint_dir}/stats.txt" || [ ! -f "${simpoint_dir}/simpoint.json" ]; then
+            echo "Warning: stats.txt or simpoint.json not found in $simpoint_dir. Skipping." >&2
+            continue
+        fi
+        weight=$(jq -r '.weight' "${simpoint_dir}/simpoint.json")
+        read_output "${simpoint_dir}/stats.txt" | awk -v weight="$weight" '
+            $1 == "simInsts"                                                    { insts = $2 }
+            $1 == "board.processor.cores.core.numCycles"                        { cycles = $2 }
+            $1 == "board.processor.cores.core.branchPred.condIncorrect"         { cond = $2 }
+            $1 ~ /mispredictDueToPredictor_0::total$/                           { bp = $2 }
+            END { if (insts > 0 && cycles > 0) print weight, insts, cycles, cond, bp }
+        '
+    done | awk -v run="$run_name" '
+        { n++; w += $1; cpi += $1 * $3 / $2; cond += $1 * 1000 * $4 / $2; bp += $1 * 1000 * $5 / $2 }
+        END {
+            if (w > 0)
+                printf "%s,%d,%.4f,%.6f,%.6f,%.4f,%.4f\n", run, n, w, w / cpi, cpi / w, cond / w, bp / w
+        }
+    ' >> "$OUTPUT_FILE"
+    echo "Processed run: $run_name"
+done
+echo "------------------------------------------------"
+echo "Data parsing completed. Output written to: $OUTPUT_FILE"
+echo "------------------------------------------------"
@@ -9,6 +9,9 @@ if [ "$#" -ne 1 ]; then
 fi
 
 # --- Configuration ---
+# stats.txt/config.json can be compressed (.zst), read them through these helpers
+source "$(dirname "$0")/read_outputs.sh"
+
 # Base directories
 ENV_FILE="./../.env"
 if [ -f "$ENV_FILE" ]; then
@@ -57,30 +60,35 @@ find "$DATA_SRC_DIR" -maxdepth 1 -mindepth 1 -type d | sort | while read app_dir
     app_name=$(basename "$app_dir")
     stats_file="${app_dir}/stats.txt"
 
-    # 2. Check if stats.txt exists
-    if [ -f "$stats_file" ]; then
+    # 2. Check if stats.txt exists (and is final)
+    if stopped_early "$app_dir"; then
+        echo "Warning: $app_name at $app_dir was stopped early by early_stop.py. Skipping."
+        continue
+    fi
+    if output_exists "$stats_file"; then
+        stats=$(read_output "$stats_file")
         
         # 3. Extract Metrics
         # Extract IPC
-        sim_ipc=$(grep "board.processor.cores.core.ipc" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_ipc=$(grep "board.processor.cores.core.ipc" <<< "$stats" | tail -n 1 | awk '{print $2}')
         
         # Extract total conditional branch predictions
-        sim_total_cond_preds=$(grep "board.processor.cores.core.branchPred.condPredicted" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_total_cond_preds=$(grep "board.processor.cores.core.branchPred.condPredicted" <<< "$stats" | tail -n 1 | awk '{print $2}')
 
         # Extract conditional branch mispredictions
-        sim_incorrect_cond_preds=$(grep "board.processor.cores.core.branchPred.condIncorrect" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_incorrect_cond_preds=$(grep "board.processor.cores.core.branchPred.condIncorrect" <<< "$stats" | tail -n 1 | awk '{print $2}')
 
         #Extract component specific data
-        sim_loop_pred_used=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.used" "$stats_file" | tail -n 1 | awk '{print $2}')
-        sim_loop_pred_correct=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.correct" "$stats_file" | tail -n 1 | awk '{print $2}')
-        sim_loop_pred_wrong=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.wrong" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_loop_pred_used=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.used" <<< "$stats" | tail -n 1 | awk '{print $2}')
+        sim_loop_pred_correct=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.correct" <<< "$stats" | tail -n 1 | awk '{print $2}')
+        sim_loop_pred_wrong=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.loop_predictor.wrong" <<< "$stats" | tail -n 1 | awk '{print $2}')
 
-        sim_sc_correct=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.statistical_corrector.correct" "$stats_file" | tail -n 1 | awk '{print $2}')
-        sim_sc_wrong=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.statistical_corrector.wrong" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_sc_correct=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.statistical_corrector.correct" <<< "$stats" | tail -n 1 | awk '{print $2}')
+        sim_sc_wrong=$(grep "board.processor.cores.core.branchPred.conditionalBranchPred.statistical_corrector.wrong" <<< "$stats" | tail -n 1 | awk '{print $2}')
 
         # Extract number of instructions
-        sim_Is=$(grep "simInsts" "$stats_file" | tail -n 1 | awk '{print $2}')
-        exec_Is=$(grep "board.processor.cores.core.executeStats0.numInsts" "$stats_file" | tail -n 1 | awk '{print $2}')
+        sim_Is=$(grep "simInsts" <<< "$stats" | tail -n 1 | awk '{print $2}')
+        exec_Is=$(grep "board.processor.cores.core.executeStats0.numInsts" <<< "$stats" | tail -n 1 | awk '{print $2}')
 
         # Handle missing values
         sim_ipc=${sim_ipc:-N/A}
@@ -0,0 +1,229 @@
+""" Example use (SimPoint sampling, see run-jobs/simpoints.py):
+cd ~/SPEC/505.mcf_r/ (or any other folder of the SPEC app you are going to use)
+
+1. Profile the basic-block vectors of the ROI on the atomic CPU, from the checkpoint taken
+   by take_spec_checkpoints.py. The outdir is the app's simpoint folder, where
+   simpoints.py looks for simpoint.bb.gz:
+
+~/gem5/build/RISCV/gem5.opt \
+--outdir=$ckpt_path/simpoints/ckpt_505.mcf_r \
+/nfs/home/ce/felixfdec/gem5/config-files-run-experiments/extra-tools/SPEC-se-checkpoints/simpoint_spec_checkpoints.py \
+--spec_number 505 \
+--mode profile
+
+2. Cluster the intervals: python3 run-jobs/simpoints.py cluster 505.mcf_r
+
+3. Take a checkpoint at the start of the warmup of every simpoint (cpt_<cluster> in the
+   app's simpoint folder):
+
+~/gem5/build/RISCV/gem5.opt \
+--outdir=/tmp/simpoint_ckpts_505 \
+/nfs/home/ce/felixfdec/gem5/config-files-run-experiments/extra-tools/SPEC-se-checkpoints/simpoint_spec_checkpoints.py \
+--spec_number 505 \
+--mode checkpoint
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import os
+import json
+import shutil
+
+import m5
+
+from gem5.resources.resource import *
+from gem5.simulate.exit_event import ExitEvent
+from gem5.simulate.simulator import Simulator
+
+from gem5.isas import ISA
+from gem5.components.boards.riscv_board import RiscvBoard
+from gem5.components.processors.cpu_types import CPUTypes
+from gem5.components.processors.simple_processor import SimpleProcessor
+from gem5.components.cachehierarchies.classic.private_l1_shared_l2_cache_hierarchy import PrivateL1SharedL2CacheHierarchy
+from gem5.components.memory import DualChannelDDR4_2400
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'config-files')))
+
+from SPEC_cmds import *
+
+parser = argparse.ArgumentParser(
+    description="gem5 SimPoint profiling and checkpointing of the SPEC17 SE checkpoints"
+)
+
+spec_choices = [ 500, 502, 503, 505, 507, 508, 510, 511, 519, 520, 521, 523,
+                 525, 526, 527, 531, 538, 541, 544, 548, 549, 554, 557 ]
+
+parser.add_argument(
+    "--spec_number",
+    choices=spec_choices,
+    type=int,
+    required=True,
+    help=f"SPEC17 app identification's tag: {list(spec_choices)}"
+)
+
+parser.add_argument(
+    "--mode",
+    choices=["profile", "checkpoint"],
+    required=True,
+    help="profile: write the basic-block vectors of the ROI (simpoint.bb.gz) to the outdir. "
+         "checkpoint: take the checkpoints of the simpoints chosen by run-jobs/simpoints.py cluster",
+)
+
+parser.add_argument(
+    "--interval",
+    type=int,
+    default=10000000,
+    help="Instructions per basic-block vector (profile mode)",
+)
+
+args = parser.parse_args()
+
+# Board (the same one take_spec_checkpoints.py saves the checkpoint with)
+processor = SimpleProcessor(
+            cpu_type=CPUTypes.ATOMIC,
+            isa=ISA.RISCV,
+            num_cores=1,
+        )
+memory = DualChannelDDR4_2400(size="4GiB")
+cache_hierarchy = PrivateL1SharedL2CacheHierarchy(
+            l1d_size="64KiB", l1i_size="64KiB", l2_size="1MiB"
+        )
+
+board = RiscvBoard(clk_freq="1.4GHz",
+                   processor=processor,
+                   memory=memory,
+                   cache_hierarchy=cache_hierarchy)
+
+# Checkpoints
+ckpt_path = Path(ckpt_base_dir + spec_ckpt_dirs[args.spec_number])
+if not ckpt_path.exists():
+    print(f"ERROR: Checkpoint path does not exist: {ckpt_path}")
+    exit(1)
+print(f"Restoring from checkpoint path: {ckpt_path}")
+
+simpoint_dir = Path(simpoint_base_dir + spec_ckpt_dirs[args.spec_number])
+simpoint_dir.mkdir(parents=True, exist_ok=True)
+
+# Event handlers
+if (args.spec_number == 520 or args.spec_number == 531 or args.spec_number == 557):
+    total_works = 10
+elif (args.spec_number == 526 ):
+    total_works = 240
+else:
+    total_works = 1
+
+def handle_workend():
+    num_works = 0
+    while True:
+        num_works += 1
+        print(f"Workend event #{num_works}")
+        if args.mode == "checkpoint" or num_works < total_works:
+            yield False
+        else:
+            print(f"Reached {total_works} workend events, end of the ROI")
+            yield True
+
+def handle_workbegin():
+    print("WARNING: Unexpected WORKBEGIN event (should already be past ROI start)")
+    yield False
+
+def exit_event_handler():
+    print("Exit event: Application execution finished")
+    yield True
+
+# SPEC application configuration
+spec_app_dir = spec_base_dir + spec_app_dirs[args.spec_number]
+binary_path = spec_app_dir + spec_app_binaries[args.spec_number]
+
+input_file = None
+if spec_app_input_files.get(args.spec_number) is not None:
+    input_file = FileResource(local_path = Path(spec_app_dir + spec_app_input_files[args.spec_number]).as_posix())
+    print(f"Using input file: {input_file.get_local_path()}")
+
+output_file = None
+if spec_app_output_files.get(args.spec_number) is not None:
+    output_file = Path(spec_app_output_files[args.spec_number])
+    print(f"Using output file: {output_file.as_posix()}")
+
+arguments = []
+if spec_app_arguments.get(args.spec_number) is not None:
+    arguments = spec_app_arguments[args.spec_number]
+    print(f"Using arguments: {arguments}")
+
+# System Call Emulation
+board.set_se_binary_workload(
+    binary=BinaryResource(local_path=Path(binary_path).as_posix()),
+    arguments=arguments,
+    stdin_file=input_file,
+    stdout_file=output_file,
+    checkpoint=ckpt_path,
+)
+
+on_exit_event = {
+    ExitEvent.WORKBEGIN: handle_workbegin(),
+    ExitEvent.WORKEND: handle_workend(),
+    ExitEvent.EXIT: exit_event_handler(),
+}
+
+if args.mode == "profile":
+    # The probe writes one basic-block vector every --interval instructions to simpoint.bb.gz
+    processor.get_cores()[0].core.addSimPointProbe(args.interval)
+    with open(os.path.join(m5.options.outdir, "profile.json"), "w") as f:
+        json.dump({"spec_number": args.spec_number, "interval": args.interval, "checkpoint": str(ckpt_path)}, f, indent=2)
+    print(f"Profiling basic-block vectors every {args.interval} instructions into {m5.options.outdir}")
+else:
+    with open(simpoint_dir / "simpoints.json", "r") as f:
+        simpoints = json.load(f)
+
+    # Simpoints whose warmup starts at the ROI checkpoint restore from it as it is, the
+    # rest are taken in order of their first instruction
+    stops = {}
+    for simpoint in simpoints["simpoints"]:
+        cpt_dir = simpoint_dir / f"cpt_{simpoint['cluster']}"
+        if cpt_dir.is_symlink():
+            cpt_dir.unlink()
+        elif cpt_dir.exists():
+            shutil.rmtree(cpt_dir)
+        if simpoint["start_insts"] == 0:
+            cpt_dir.symlink_to(ckpt_path.resolve())
+            print(f"Simpoint {simpoint['cluster']} starts at the ROI checkpoint, linked {cpt_dir}")
+        else:
+            stops.setdefault(simpoint["start_insts"], []).append(simpoint["cluster"])
+    stops = sorted(stops.items())
+    if not stops:
+        print("Every simpoint starts at the ROI checkpoint, nothing to simulate")
+        exit(0)
+
+    def handle_max_insts():
+        for i, (start, clusters) in enumerate(stops):
+            for cluster in clusters:
+                print(f"Taking the checkpoint of simpoint {cluster} at {start} instructions (tick {sim.get_current_tick()})")
+                sim.save_checkpoint(simpoint_dir / f"cpt_{cluster}")
+            if i + 1 == len(stops):
+                print(f"Took the checkpoints of {len(simpoints['simpoints'])} simpoints into {simpoint_dir}")
+                yield True
+            # The instruction stops are relative to the instructions committed so far
+            sim.schedule_max_insts(stops[i + 1][0] - start)
+            yield False
+
+    on_exit_event[ExitEvent.MAX_INSTS] = handle_max_insts()
+
+sim = Simulator(
+    board=board,
+    full_system=False,
+    on_exit_event=on_exit_event,
+)
+
+if args.mode == "checkpoint":
+    # Before run() this sets max_insts_any_thread of the core, counted from the restore
+    sim.schedule_max_insts(stops[0][0])
+
+# Run simulation
+print("================== Starting my Simulation ==================")
+
+sim.run()
+
+print(f"\nSimulation finished:")
+print(f"  Final tick: {sim.get_current_tick()}")
+print(f"  Exit cause: {sim.get_last_exit_event_cause()}")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Canary pass of a sweep (--canary): every distinct configuration (config, bp and
+extra_params) is first simulated for a few ticks on one small app, and only the
+configurations whose canary finished normally go on to the full sweep. Bad extra_params
+combinations then fail in minutes instead of after their jobs waited in the queue.
+
+The canaries run in the local process pool with --executor local, or as job arrays of at
+most MaxArraySize tasks (on --canary_partition, with a short walltime) with Slurm. Their outputs are kept in
+1-output-jobs/canary/<sweep name>/<name>/<bp>/<app> and they are not recorded in the ledger.
+Canary arrays still queued or running after --canary_timeout seconds are cancelled, and
+their configurations fail with TIMEOUT.
+"""
+import os
+import json
+import time
+
+from early_stop import cancel_job
+from job_ledger import query_sacct, TERMINAL_STATES
+from local_executor import run_local
+from run_outputs import run_is_complete, classify_failure
+from sweep_cost import total_works
+from sweep_submit import (
+    create_directory, launcher_arguments, query_max_array_size, submit_job_arrays,
+)
+
+# Walltime of the canary array tasks
+CANARY_TIME = "00:30:00"
+
+# Seconds between two checks of the canary arrays
+POLL_INTERVAL = 30
+
+
+def configuration_key(point):
+    """What a canary validates: everything that goes into building the simulated system."""
+    return (point["config"], point["bp"], json.dumps(point["extra_params"], sort_keys=True))
+
+
+def canary_app(apps, spec_number=None):
+    """The app canaries run: the one asked for, or the one with the fewest WORKEND events."""
+    if spec_number is not None:
+        matching = [app for app in apps if app.startswith(str(spec_number))]
+        if matching:
+            return matching[0]
+        print(f"Warning: --canary_app {spec_number} is not an app of the sweep")
+    return min(apps, key=lambda app: (total_works(app), app))
+
+
+def wait_for_arrays(arrays, timeout):
+    """
+    Wait until every task of the (job_id, num_tasks) job arrays has ended, at most timeout
+    seconds. Then the arrays are cancelled and their unfinished tasks are TIMEOUT.
+    Returns {task_id: state}.
+    """
+    task_ids = [f"{job_id}_{i}" for job_id, num_tasks in arrays for i in range(num_tasks)]
+    deadline = time.time() + timeout
+    while True:
+        states = {task_id: state for task_id, (state, _, _) in query_sacct(task_ids).items()}
+        pending = [t for t in task_ids if states.get(t) not in TERMINAL_STATES]
+        if not pending:
+            return states
+        if time.time() >= deadline:
+            print(f"{len(pending)} canaries still pending or running after {timeout} s, cancelling them")
+            for job_id, _ in arrays:
+                cancel_job(job_id)
+            states.update({task_id: "TIMEOUT" for task_id in pending})
+            return states
+        wait = min(POLL_INTERVAL, max(deadline - time.time(), 0))
+        print(f"{len(pending)} canaries pending or running, next check in {wait:.0f} s")
+        time.sleep(wait)
+
+
+def run_canaries(pending_runs, settings, spec, args):
+    """
+    Run one canary per distinct configuration of pending_runs and return the runs whose
+    configuration passed (all of them if the canaries could not be submitted).
+    """
+    apps = sorted({point["app"] for point, *_ in pending_runs})
+    app = canary_app(apps, args.canary_app)
+    canary_dir = os.path.join(settings["base_output_dir"], "canary", spec["sweep"]["name"])
+
+    canaries = {}
+    for point, *_ in pending_runs:
+        key = configuration_key(point)
+        if key not in canaries:
+            output_dir = os.path.join(canary_dir, point["name"], point["bp"], app)
+            # Canaries restore the app's checkpoint, also in a --simpoints sweep
+            canaries[key] = (dict(point, app=app, simpoint=None), output_dir)
+
+    print(f"\nCanary: {len(canaries)} configurations, {args.canary_ticks} ticks of {app} each")
+    if args.dry_run:
+        return pending_runs
+
+    canary_settings = dict(
+        settings, num_ticks=args.canary_ticks, slurm_time=CANARY_TIME, stats_interval=None,
+        fast_forward_insts=None, warmup_insts=None, max_insts=None,
+        compress=False, scratch=False, ckpt_cache=None,
+    )
+    if args.canary_partition:
+        canary_settings["partition"] = args.canary_partition
+    for point, output_dir in canaries.values():
+        create_directory(output_dir, clean_if_exists=True)
+
+    # Slurm state of each canary, for the failure class (a canary that hit the timeout is TIMEOUT)
+    canary_states = {}
+    if args.executor == "local":
+        run_local(
+            [(output_dir, point["app"], output_dir, launcher_arguments(point, canary_settings))
+             for point, output_dir in canaries.values()],
+            canary_settings, args.local_jobs,
+        )
+    else:
+        array_dir = create_directory(os.path.join(canary_dir, f"array_{time.strftime('%Y%m%d-%H%M%S')}"))
+        runs = [(point, output_dir, None, canary_settings) for point, output_dir in canaries.values()]
+        max_array_size = args.max_array_size or query_max_array_size()
+        arrays = submit_job_arrays(runs, array_dir, canary_settings, max_array_size)
+        submitted = [(job_id, len(chunk_runs)) for job_id, chunk_runs, _ in arrays if job_id]
+        if len(submitted) < len(arrays):
+            # The canaries of a failed array would hold back their configurations
+            print("Failed to submit the canary arrays, submitting the sweep without them")
+            for job_id, _ in submitted:
+                cancel_job(job_id)
+            return pending_runs
+        print(f"Submitted canary arrays {', '.join(job_id for job_id, _ in submitted)}, waiting for them")
+        task_states = wait_for_arrays(submitted, args.canary_timeout)
+        for job_id, chunk_runs, _ in arrays:
+            for i, (_, output_dir, *_) in enumerate(chunk_runs):
+                canary_states[output_dir] = task_states.get(f"{job_id}_{i}")
+
+    failed = {}
+    for key, (point, output_dir) in canaries.items():
+        if not run_is_complete(output_dir):
+            failed[key] = classify_failure(output_dir, canary_states.get(output_dir))
+            print(f"Canary failed ({failed[key]}): {point['name']}/{point['bp']}, see {output_dir}")
+
+    passed_runs = [run for run in pending_runs if configuration_key(run[0]) not in failed]
+    print(f"Canary: {len(canaries) - len(failed)} of {len(canaries)} configurations passed, "
+          f"holding back {len(pending_runs) - len(passed_runs)} runs")
+    return passed_runs
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Node-local cache of gem5 checkpoints, used by the sbatch scripts generated with --ckpt_cache.
+
+The checkpoint is copied once into <cache_dir>/<ckpt name>-<hash>, where the hash covers
+the names, sizes and modification times of its files and the contents of the small ones
+(m5.cpt, ...), so a re-taken checkpoint gets a new entry. A lock file serializes the
+copies, so the jobs of a node that need the same checkpoint share a single copy. When the
+cache would grow over --max_size, the least recently used entries that no job holds are
+removed first.
+
+Prints the directory to restore from (the original one if it can't be cached):
+
+    ckpt_dir=$(python3 run-jobs/ckpt_cache.py $ckpt_path/ckpt_505.mcf_r --cache_dir /tmp/gem5_ckpt_cache)
+    exec {lock_fd}>"$ckpt_dir.lock" && flock -s $lock_fd    # hold the entry while gem5 uses it
+"""
+import os
+import sys
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+
+from slurm_resources import parse_mem_size
+
+# Files up to this size are hashed by content, bigger ones (pmem images) by size and mtime
+SMALL_FILE_SIZE = 1024**2
+
+# Entries used this recently are never evicted, a job may be about to lock them
+EVICTION_GRACE_SECONDS = 600
+
+
+def checkpoint_key(ckpt_dir):
+    """Cache key of a checkpoint directory: its name and a hash of its files."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(ckpt_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            digest.update(f"{os.path.relpath(path, ckpt_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+            if stat.st_size <= SMALL_FILE_SIZE:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+    return f"{os.path.basename(os.path.normpath(ckpt_dir))}-{digest.hexdigest()[:16]}"
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, dirs, files in os.walk(path) for name in files
+    )
+
+
+def entry_in_use(entry):
+    """True if a job holds the shared lock of a cache entry."""
+    try:
+        with open(entry + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(lock, fcntl.LOCK_UN)
+        return False
+    except BlockingIOError:
+        return True
+
+
+def evict(cache_dir, needed, max_size):
+    """Remove least recently used entries until `needed` more bytes fit in max_size."""
+    entries = [
+        os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+        if os.path.isdir(os.path.join(cache_dir, name)) and not name.endswith(".partial")
+    ]
+    sizes = {entry: directory_size(entry) for entry in entries}
+    total = sum(sizes.values())
+    # The mtime of an entry is refreshed every time a job uses it
+    for entry in sorted(entries, key=os.path.getmtime):
+        if total + needed <= max_size:
+            break
+        if time.time() - os.path.getmtime(entry) < EVICTION_GRACE_SECONDS or entry_in_use(entry):
+            continue
+        print(f"ckpt_cache: evicting {entry}", file=sys.stderr)
+        shutil.rmtree(entry)
+        if os.path.exists(entry + ".lock"):
+            os.remove(entry + ".lock")
+        total -= sizes[entry]
+    return total + needed <= max_size
+
+
+def stage_checkpoint(ckpt_dir, cache_dir, max_size):
+    """Return the cached copy of ckpt_dir, copying it first if needed."""
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = os.path.join(cache_dir, checkpoint_key(ckpt_dir))
+
+    with open(os.path.join(cache_dir, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.isdir(entry):
+            needed = directory_size(ckpt_dir)
+            if not evict(cache_dir, needed, max_size) or shutil.disk_usage(cache_dir).free < needed:
+                print(f"ckpt_cache: no room for {ckpt_dir} in {cache_dir}, using it from its path",
+                      file=sys.stderr)
+                return ckpt_dir
+            # Copied under another name so a job never sees a half-copied checkpoint
+            partial = entry + ".partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            start_time = time.time()
+            shutil.copytree(ckpt_dir, partial)
+            os.rename(partial, entry)
+            print(f"ckpt_cache: staged {ckpt_dir} ({needed / 1024**3:.1f} GiB) in "
+                  f"{time.time() - start_time:.0f} s", file=sys.stderr)
+        os.utime(entry)
+
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stage a gem5 checkpoint in a node-local LRU cache.")
+    parser.add_argument("ckpt_dir", help="Checkpoint directory to stage")
+    parser.add_argument("--cache_dir", required=True, help="Node-local cache directory")
+    parser.add_argument("--max_size", default="100G", help="Size cap of the cache (default: 100G)")
+    args = parser.parse_args()
+
+    try:
+        print(stage_checkpoint(args.ckpt_dir, args.cache_dir, parse_mem_size(args.max_size)))
+    except OSError as e:
+        # A broken cache never stops a run, it just restores from the shared filesystem
+        print(f"ckpt_cache: {e}, using {args.ckpt_dir} from its path", file=sys.stderr)
+        print(args.ckpt_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Adaptive design-space exploration for run_jobs_config_experiments.py (--adaptive).
+
+Instead of the hand-pruned grid of the sweep spec, the search space is the full product
+of its parameter axes (the [[constraints]] are the pruning the search replaces). Every
+round submits a batch of configurations, waits for their runs and fits a Gaussian process
+to the IPC seen so far (geometric mean over the bps and apps of the sweep). The next batch
+is the one that most grows the hypervolume of the IPC-vs-size Pareto front, using the
+optimistic IPC (mean + KAPPA * std) of the untried configurations. Rounds go on until
+--dse_budget new configurations have been simulated.
+
+The size of a configuration is the mean, over the axes, of its numeric parameters divided
+by the largest value of the axis (0-1), so every axis weighs the same. Configurations are
+also placed in the model by these per-axis sizes.
+
+Every evaluated configuration is written to <output_subdir>/dse_<sweep name>.csv, and the
+runs land in the same directories as the grid ones, so the parsers and --resume see them.
+"""
+import os
+import math
+import time
+import random
+import argparse
+
+from job_ledger import default_ledger_path, refresh_states, latest_jobs, state_group
+from run_outputs import output_path, read_stats_value, read_results, run_is_complete
+from sweep_engine import normalize_sweep_spec, format_point_name
+from sweep_submit import submit_sweep, point_output_dir
+
+IPC_STAT = "board.processor.cores.core.ipc"
+
+# Weight of the model's uncertainty in the optimistic IPC of a configuration
+KAPPA = 1.0
+
+# Gaussian process hyperparameters, on per-axis sizes in [0, 1] and standardized IPCs
+LENGTHSCALE = 0.3
+NOISE = 1e-3
+
+# Spaces up to this size are scored exhaustively, bigger ones through evolved candidates
+MAX_ENUMERATED = 5000
+CANDIDATES_PER_PROPOSAL = 50
+
+
+def add_adaptive_arguments(parser):
+    """Command line options of the adaptive mode."""
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Explore the product of the sweep axes in rounds guided by a surrogate model instead of the grid",
+    )
+    parser.add_argument(
+        "--dse_budget",
+        type=int,
+        default=24,
+        help="New configurations the adaptive mode may simulate, each one with every bp and app; "
+             "configurations already simulated don't count (default: 24)",
+    )
+    parser.add_argument(
+        "--dse_batch",
+        type=int,
+        default=8,
+        help="Configurations submitted in each round of the adaptive mode (default: 8)",
+    )
+    parser.add_argument(
+        "--dse_seed",
+        type=int,
+        default=0,
+        help="Seed of the initial configurations and the evolved candidates (default: 0)",
+    )
+    parser.add_argument(
+        "--dse_interval",
+        type=int,
+        default=300,
+        help="Seconds between two checks of the runs of a Slurm round (default: 300)",
+    )
+
+
+class DesignSpace:
+    """Product of the parameter axes of a sweep spec, configurations being index tuples."""
+
+    def __init__(self, spec):
+        for axis in spec["axes"]:
+            if not all(isinstance(value, dict) for value in axis["values"]):
+                raise ValueError(f"--adaptive needs parameter tables in every axis, '{axis['name']}' has scalars")
+        self.spec = spec
+        self.axes = spec["axes"]
+        self.axis_sizes = [self._axis_sizes(axis["values"]) for axis in self.axes]
+
+    @staticmethod
+    def _axis_sizes(values):
+        """Size of each value of an axis: mean of its numeric parameters over their largest value."""
+        numeric = sorted({k for value in values for k, v in value.items() if isinstance(v, (int, float))})
+        if not numeric:
+            return [i / max(len(values) - 1, 1) for i in range(len(values))]
+        largest = {k: max(value.get(k, 0) for value in values) or 1 for k in numeric}
+        return [sum(value.get(k, 0) / largest[k] for k in numeric) / len(numeric) for value in values]
+
+    def num_configs(self):
+        return math.prod(len(axis["values"]) for axis in self.axes)
+
+    def all_configs(self):
+        configs = [()]
+        for axis in self.axes:
+            configs = [config + (i,) for config in configs for i in range(len(axis["values"]))]
+        return configs
+
+    def random_config(self, rng):
+        return tuple(rng.randrange(len(axis["values"])) for axis in self.axes)
+
+    def coordinates(self, config):
+        return [self.axis_sizes[axis][i] for axis, i in enumerate(config)]
+
+    def size(self, config):
+        coordinates = self.coordinates(config)
+        return sum(coordinates) / len(coordinates)
+
+    def point(self, config):
+        """Point of a configuration, as iter_sweep_points() would yield it."""
+        extra_params = {}
+        for axis, i in zip(self.axes, config):
+            extra_params.update(axis["values"][i])
+        point = dict(self.spec["fixed"], extra_params=extra_params)
+        point["name"] = format_point_name(self.spec, point, "dir")
+        return point
+
+    def round_spec(self, configs):
+        """Sweep spec with a single axis holding the merged parameters of each configuration."""
+        return normalize_sweep_spec({
+            "sweep": dict(self.spec["sweep"]),
+            "fixed": dict(self.spec["fixed"]),
+            "axes": [{"name": "design", "values": [self.point(c)["extra_params"] for c in configs]}],
+            "naming": self.spec["naming"],
+        })
+
+
+class GaussianProcess:
+    """Gaussian process regression with an RBF kernel, small enough for pure Python."""
+
+    def __init__(self, xs, ys):
+        self.xs = xs
+        self.mean = sum(ys) / len(ys)
+        self.std = math.sqrt(sum((y - self.mean) ** 2 for y in ys) / len(ys)) or 1.0
+        kernel = [[self.kernel(a, b) + (NOISE if i == j else 0.0) for j, b in enumerate(xs)]
+                  for i, a in enumerate(xs)]
+        self.cholesky = cholesky(kernel)
+        standardized = [(y - self.mean) / self.std for y in ys]
+        self.alpha = backward_substitution(self.cholesky, forward_substitution(self.cholesky, standardized))
+
+    @staticmethod
+    def kernel(a, b):
+        return math.exp(-sum((x - y) ** 2 for x, y in zip(a, b)) / (2 * LENGTHSCALE ** 2))
+
+    def predict(self, x):
+        """(mean, std) of the IPC at x."""
+        k = [self.kernel(x, xi) for xi in self.xs]
+        mean = sum(ki * ai for ki, ai in zip(k, self.alpha))
+        v = forward_substitution(self.cholesky, k)
+        variance = max(1.0 - sum(vi * vi for vi in v), 0.0)
+        return self.mean + self.std * mean, self.std * math.sqrt(variance)
+
+
+def cholesky(matrix):
+    """Lower triangular L with L L^T = matrix (symmetric positive definite)."""
+    n = len(matrix)
+    lower = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i + 1):
+            s = matrix[i][j] - sum(lower[i][k] * lower[j][k] for k in range(j))
+            lower[i][j] = math.sqrt(max(s, 1e-12)) if i == j else s / lower[j][j]
+    return lower
+
+
+def forward_substitution(lower, b):
+    """Solve L x = b."""
+    x = []
+    for i, row in enumerate(lower):
+        x.append((b[i] - sum(row[k] * x[k] for k in range(i))) / row[i])
+    return x
+
+
+def backward_substitution(lower, b):
+    """Solve L^T x = b."""
+    n = len(lower)
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (b[i] - sum(lower[k][i] * x[k] for k in range(i + 1, n))) / lower[i][i]
+    return x
+
+
+def pareto_front(points):
+    """Non-dominated (size, ipc, ...) tuples (smaller size and higher IPC are better), by size."""
+    front = []
+    for point in sorted(points, key=lambda p: (p[0], -p[1])):
+        if not front or point[1] > front[-1][1]:
+            front.append(point)
+    return front
+
+
+def hypervolume(points):
+    """Area dominated by the front of points, up to size 1 and IPC 0."""
+    front = pareto_front(points)
+    sizes = [p[0] for p in front] + [1.0]
+    return sum((sizes[i + 1] - p[0]) * p[1] for i, p in enumerate(front))
+
+
+def evolved_candidates(space, parents, excluded, rng):
+    """New configurations from uniform crossover of two parents and a one-step mutation."""
+    candidates = set()
+    for _ in range(20 * CANDIDATES_PER_PROPOSAL):
+        if len(candidates) >= CANDIDATES_PER_PROPOSAL:
+            break
+        if len(parents) >= 2:
+            a, b = rng.sample(parents, 2)
+            child = [rng.choice(genes) for genes in zip(a, b)]
+        else:
+            child = list(space.random_config(rng))
+        axis = rng.randrange(len(child))
+        child[axis] = max(0, min(len(space.axes[axis]["values"]) - 1, child[axis] + rng.choice((-1, 1))))
+        child = tuple(child)
+        if child not in excluded:
+            candidates.add(child)
+    return sorted(candidates)
+
+
+def propose_batch(space, evaluated, batch_size, rng):
+    """
+    Next configurations to simulate. The first round spreads over the space (the smallest
+    and largest configurations plus random ones), later rounds pick greedily the candidate
+    whose optimistic IPC most grows the hypervolume of the front, assuming the ones already
+    picked reach their predicted mean (so a batch doesn't pile up on a single spot).
+    """
+    known = [(config, ipc) for config, ipc in evaluated.items() if ipc is not None]
+    if space.num_configs() <= MAX_ENUMERATED:
+        candidates = [c for c in space.all_configs() if c not in evaluated]
+    else:
+        parents = [config for _, _, config in pareto_front([(space.size(c), ipc, c) for c, ipc in known])]
+        candidates = evolved_candidates(space, parents or [c for c, _ in known], set(evaluated), rng)
+
+    if len(known) < 2:
+        anchors = [
+            tuple(sizes.index(min(sizes)) for sizes in space.axis_sizes),
+            tuple(sizes.index(max(sizes)) for sizes in space.axis_sizes),
+        ]
+        batch = [c for c in anchors if c in candidates]
+        rest = [c for c in candidates if c not in batch]
+        return (batch + rng.sample(rest, min(len(rest), batch_size)))[:batch_size]
+
+    model = GaussianProcess([space.coordinates(c) for c, _ in known], [ipc for _, ipc in known])
+    predictions = {c: model.predict(space.coordinates(c)) for c in candidates}
+    front = [(space.size(c), ipc) for c, ipc in known]
+    batch = []
+    for _ in range(min(batch_size, len(candidates))):
+        base = hypervolume(front)
+        best = max(
+            (c for c in candidates if c not in batch),
+            key=lambda c: (hypervolume(front + [(space.size(c), predictions[c][0] + KAPPA * predictions[c][1])]) - base,
+                           predictions[c][1]),
+        )
+        batch.append(best)
+        front.append((space.size(best), predictions[best][0]))
+    return batch
+
+
+def config_runs(space, config, bps, apps, settings):
+    point = space.point(config)
+    return [
+        point_output_dir(dict(point, bp=bp, app=app), space.spec, settings)
+        for bp in bps for app in apps
+    ]
+
+
+def config_ipc(output_dirs):
+    """Geometric mean of the IPC of the runs of a configuration, None if any run has no IPC."""
+    ipcs = []
+    for output_dir in output_dirs:
+        value = None
+        if run_is_complete(output_dir):
+            # results.json of the launchers, stats.txt for older runs
+            results = read_results(output_dir)
+            if results:
+                value = results["metrics"].get("ipc")
+            else:
+                value = read_stats_value(output_path(os.path.join(output_dir, "stats.txt")), IPC_STAT)
+        try:
+            ipcs.append(float(value))
+        except (TypeError, ValueError):
+            return None
+        if ipcs[-1] <= 0:
+            return None
+    return math.exp(sum(math.log(ipc) for ipc in ipcs) / len(ipcs))
+
+
+def wait_for_runs(output_dirs, ledger_path, sweep, interval):
+    """
+    Wait until every run is complete or its latest job in the ledger has ended. Runs
+    without a job in the ledger were not submitted (sbatch failed) and are not waited for.
+    """
+    pending = set(output_dirs)
+    while True:
+        refresh_states(ledger_path)
+        states = {row["output_dir"]: row["state"] for row in latest_jobs(ledger_path, sweep)}
+        not_submitted = {d for d in pending if d not in states and not run_is_complete(d)}
+        if not_submitted:
+            print(f"{len(not_submitted)} runs of the round have no job in the ledger, counted as failed")
+        pending = {
+            d for d in pending - not_submitted
+            if not run_is_complete(d) and state_group(states[d]) not in ("DONE", "FAILED")
+        }
+        if not pending:
+            return
+        print(f"{len(pending)} runs of the round pending or running, next check in {interval} s")
+        time.sleep(interval)
+
+
+def write_exploration_log(space, evaluated, rounds, log_path):
+    """One row per evaluated configuration, with its round and whether it is on the front."""
+    known = [(space.size(c), ipc, c) for c, ipc in evaluated.items() if ipc is not None]
+    front = {config for _, _, config in pareto_front(known)}
+    with open(log_path, "w") as f:
+        f.write("round,name,size,ipc,pareto\n")
+        for config, ipc in evaluated.items():
+            ipc_field = f"{ipc:.6f}" if ipc is not None else "N/A"
+            f.write(f"{rounds[config]},{space.point(config)['name']},{space.size(config):.4f},"
+                    f"{ipc_field},{int(config in front)}\n")
+
+
+def print_front(space, evaluated):
+    known = [(space.size(c), ipc, c) for c, ipc in evaluated.items() if ipc is not None]
+    front = pareto_front(known)
+    print(f"Pareto front ({len(front)} of {len(known)} configurations, hypervolume {hypervolume(known):.4f}):")
+    for size, ipc, config in front:
+        print(f"    size {size:.3f}  IPC {ipc:.4f}  {space.point(config)['name']}")
+
+
+def explore_design_space(spec, bps, apps, settings, args):
+    """
+    Submit rounds of configurations until --dse_budget new configurations are simulated.
+    Returns the submitted jobs, like submit_sweep().
+    """
+    space = DesignSpace(spec)
+    rng = random.Random(args.dse_seed)
+    runs_per_config = len(bps) * len(apps)
+    ledger_path = args.ledger or default_ledger_path()
+    # Every round skips the runs already complete, so an interrupted exploration continues
+    round_args = argparse.Namespace(**dict(vars(args), resume=True))
+
+    # Configurations simulated by earlier explorations or by the grid count as evaluated
+    evaluated = {}
+    rounds = {}
+    for config in space.all_configs() if space.num_configs() <= MAX_ENUMERATED else []:
+        output_dirs = config_runs(space, config, bps, apps, settings)
+        if all(run_is_complete(d) for d in output_dirs):
+            evaluated[config] = config_ipc(output_dirs)
+            rounds[config] = 0
+    max_new_configs = min(args.dse_budget, space.num_configs() - len(evaluated))
+
+    print(f"Adaptive exploration: {space.num_configs()} configurations, {runs_per_config} runs each, "
+          f"budget of {max_new_configs} new configurations ({len(evaluated)} already simulated)")
+
+    log_path = os.path.join(settings["base_output_dir"], spec["sweep"]["output_subdir"],
+                            f"dse_{spec['sweep']['name']}.csv")
+    submitted_jobs = []
+    round_number = 1
+    num_new_configs = 0
+    while num_new_configs < max_new_configs:
+        batch = propose_batch(space, evaluated, min(args.dse_batch, max_new_configs - num_new_configs), rng)
+        if not batch:
+            break
+        num_new_configs += len(batch)
+        print(f"\n{'='*60}")
+        print(f"Round {round_number}: {len(batch)} configurations")
+        print(f"{'='*60}")
+        round_jobs = submit_sweep(space.round_spec(batch), bps, apps, settings, round_args)
+        submitted_jobs += round_jobs
+        if args.dry_run:
+            return submitted_jobs
+
+        output_dirs = {config: config_runs(space, config, bps, apps, settings) for config in batch}
+        if args.executor == "slurm":
+            wait_for_runs([d for dirs in output_dirs.values() for d in dirs], ledger_path,
+                          spec["sweep"]["name"], args.dse_interval)
+        for config in batch:
+            evaluated[config] = config_ipc(output_dirs[config])
+            rounds[config] = round_number
+
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        write_exploration_log(space, evaluated, rounds, log_path)
+        print_front(space, evaluated)
+        round_number += 1
+
+    print(f"\nExplored {len(evaluated)} of {space.num_configs()} configurations, log in {log_path}")
+    return submitted_jobs
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Design-of-experiments samplers for sweep specs with [[factors]] instead of (or besides)
+hand-written [[axes]]. Each factor has a name, its levels and optionally the parameters it
+sets (a width factor can set fetchWidth, decodeWidth and renameWidth at once):
+
+    [sampling]
+    method = "lhs"          # lhs, sobol or fractional_factorial
+    samples = 256
+    seed = 0
+
+    [[factors]]
+    name = "frontend_width"
+    params = ["fetchWidth", "decodeWidth", "renameWidth"]
+    levels = [2, 3, 4, 6, 8]
+
+lhs      Latin hypercube: every level of every factor appears as evenly as possible
+sobol    Sobol low-discrepancy sequence with a random digital shift (up to 21 factors)
+fractional_factorial
+         Two-level 2^(k-p) design over the lowest and highest level of every factor, with
+         the smallest number of runs >= samples. The generators are chosen for the highest
+         resolution (main effects aliased with the longest interactions)
+
+The samples become a single "design" axis (before any other axis of the spec), so the
+rest of the submission (naming, --resume, ledger, ...) works as with a grid. Duplicated
+samples, common with few levels, are simulated once.
+"""
+import itertools
+import random
+
+from sweep_engine import normalize_sweep_spec
+
+SAMPLERS = ("lhs", "sobol", "fractional_factorial")
+
+# Direction numbers of the Sobol sequence (Joe and Kuo, new-joe-kuo-6.21201): s, a and m_i
+# of dimensions 2 to 21, the first dimension uses the identity
+SOBOL_DIRECTIONS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+)
+SOBOL_BITS = 32
+
+# Fractional factorial generator sets tried exhaustively up to this many, randomly beyond
+MAX_GENERATOR_SETS = 50000
+RANDOM_GENERATOR_TRIES = 2000
+
+
+def add_sampling_arguments(parser):
+    """Command line options that override the [sampling] table of a spec with [[factors]]."""
+    parser.add_argument(
+        "--sampler",
+        choices=SAMPLERS,
+        default=None,
+        help="Sampler of the [[factors]] of the sweep spec (default: its [sampling] method, or lhs)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=None,
+        help="Number of samples of the [[factors]] (default: the [sampling] samples of the spec)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the sampler (default: the [sampling] seed of the spec, or 0)",
+    )
+
+
+def latin_hypercube(num_samples, num_factors, rng):
+    """num_samples points of [0, 1)^num_factors, one per stratum of every dimension."""
+    columns = []
+    for _ in range(num_factors):
+        strata = list(range(num_samples))
+        rng.shuffle(strata)
+        columns.append([(stratum + rng.random()) / num_samples for stratum in strata])
+    return [list(row) for row in zip(*columns)]
+
+
+def sobol_direction_numbers(dimension):
+    """The SOBOL_BITS direction numbers of a dimension (0 is the first one)."""
+    if dimension == 0:
+        return [1 << (SOBOL_BITS - 1 - i) for i in range(SOBOL_BITS)]
+    s, a, m = SOBOL_DIRECTIONS[dimension - 1]
+    v = [m[i] << (SOBOL_BITS - 1 - i) for i in range(s)]
+    for i in range(s, SOBOL_BITS):
+        value = v[i - s] ^ (v[i - s] >> s)
+        for k in range(1, s):
+            if (a >> (s - 1 - k)) & 1:
+                value ^= v[i - k]
+        v.append(value)
+    return v
+
+
+def sobol(num_samples, num_factors, rng):
+    """num_samples points of the Sobol sequence (skipping the origin), randomly digit-shifted."""
+    if num_factors > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError(f"The Sobol sampler supports up to {len(SOBOL_DIRECTIONS) + 1} factors, not {num_factors}")
+    directions = [sobol_direction_numbers(d) for d in range(num_factors)]
+    shifts = [rng.getrandbits(SOBOL_BITS) for _ in range(num_factors)]
+    state = [0] * num_factors
+    points = []
+    for index in range(1, num_samples + 1):
+        # Gray code order: flip the direction number of the lowest zero bit of index - 1
+        bit = ((index - 1) ^ index).bit_length() - 1
+        for d in range(num_factors):
+            state[d] ^= directions[d][bit]
+        points.append([(x ^ shift) / 2 ** SOBOL_BITS for x, shift in zip(state, shifts)])
+    return points
+
+
+def defining_words(base_factors, generators):
+    """Words of the defining relation of a design, as bitmasks over all the factors."""
+    words = [generator | (1 << (base_factors + i)) for i, generator in enumerate(generators)]
+    relation = []
+    for count in range(1, len(words) + 1):
+        for combination in itertools.combinations(words, count):
+            word = 0
+            for w in combination:
+                word ^= w
+            relation.append(word)
+    return relation
+
+
+def design_quality(base_factors, generators):
+    """(resolution, -words of that length): higher is better (minimum aberration)."""
+    lengths = [bin(word).count("1") for word in defining_words(base_factors, generators)]
+    resolution = min(lengths)
+    return resolution, -lengths.count(resolution)
+
+
+def fractional_factorial_generators(num_factors, base_factors, rng):
+    """Interactions of the base factors that generate the other factors, best resolution first."""
+    num_generated = num_factors - base_factors
+    if num_generated == 0:
+        return []
+    # Every interaction of two or more base factors, as a bitmask
+    interactions = [mask for mask in range(1, 2 ** base_factors) if bin(mask).count("1") >= 2]
+    if len(interactions) < num_generated:
+        raise ValueError(f"{2 ** base_factors} runs can't hold {num_factors} two-level factors")
+
+    num_sets = 1
+    for i in range(num_generated):
+        num_sets = num_sets * (len(interactions) - i) // (i + 1)
+    if num_sets <= MAX_GENERATOR_SETS:
+        candidates = itertools.combinations(interactions, num_generated)
+    else:
+        # Odd interactions of 3 or more factors always give resolution IV or more, when there are enough
+        odd_interactions = [mask for mask in interactions if bin(mask).count("1") % 2 == 1]
+        pools = [odd_interactions, interactions] if len(odd_interactions) >= num_generated else [interactions]
+        candidates = (rng.sample(pools[i % len(pools)], num_generated) for i in range(RANDOM_GENERATOR_TRIES))
+    return list(max(candidates, key=lambda generators: design_quality(base_factors, generators)))
+
+
+def fractional_factorial(num_samples, num_factors, rng):
+    """Two-level design rows (0 or 1 per factor) with the fewest power of two runs >= num_samples."""
+    # Runs are 2^base_factors, at least k + 1 so that every main effect can be estimated
+    base_factors = min((max(num_samples, num_factors + 1) - 1).bit_length(), num_factors)
+    generators = fractional_factorial_generators(num_factors, base_factors, rng)
+    # A random sign for every generator picks one of the equivalent fractions
+    signs = [rng.randrange(2) for _ in generators]
+
+    rows = []
+    for run in range(2 ** base_factors):
+        row = [(run >> i) & 1 for i in range(base_factors)]
+        for generator, sign in zip(generators, signs):
+            row.append((bin(run & generator).count("1") + sign) % 2)
+        rows.append(row)
+    return rows
+
+
+def sample_factors(factors, method, num_samples, seed):
+    """Rows of {param: value} sampled from the factors, without duplicates."""
+    rng = random.Random(seed)
+    if method == "lhs":
+        points = latin_hypercube(num_samples, len(factors), rng)
+    elif method == "sobol":
+        points = sobol(num_samples, len(factors), rng)
+    elif method == "fractional_factorial":
+        # Level 0 is the lowest level of each factor and 1 the highest one
+        points = [[0.0 if x == 0 else 1.0 for x in row]
+                  for row in fractional_factorial(num_samples, len(factors), rng)]
+    else:
+        raise ValueError(f"Unknown sampler '{method}', use one of {list(SAMPLERS)}")
+
+    rows = {}
+    for point in points:
+        row = {}
+        for factor, u in zip(factors, point):
+            levels = factor["levels"]
+            level = levels[min(int(u * len(levels)), len(levels) - 1)]
+            for param in factor.get("params", [factor["name"]]):
+                row[param] = level
+        rows.setdefault(tuple(sorted(row.items())), row)
+    return list(rows.values())
+
+
+def design_spec(spec, method=None, num_samples=None, seed=None):
+    """
+    Spec with the [[factors]] of `spec` sampled into a "design" axis. The arguments
+    override the [sampling] table. Specs without factors are returned as they are.
+    """
+    if not spec.get("factors"):
+        return spec
+    sampling = spec.get("sampling", {})
+    method = method or sampling.get("method", "lhs")
+    num_samples = num_samples or sampling.get("samples")
+    seed = seed if seed is not None else sampling.get("seed", 0)
+    if not num_samples:
+        raise ValueError("The sweep spec has [[factors]] but no number of samples, use --samples")
+
+    rows = sample_factors(spec["factors"], method, num_samples, seed)
+    print(f"Sampled {len(rows)} distinct points of {len(spec['factors'])} factors with {method} "
+          f"({num_samples} samples, seed {seed})")
+    spec = {key: value for key, value in spec.items() if key not in ("factors", "sampling")}
+    spec["axes"] = [{"name": "design", "values": rows}] + list(spec["axes"])
+    return normalize_sweep_spec(spec)
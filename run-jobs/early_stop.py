@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Cancel the running points of a sweep that are clearly worse than the best point of the
+same app, from the periodic stats dumps of the launchers (submit with --stats_interval).
+
+The IPC of a run so far is simInsts / numCycles of its last dump, and its confidence band
+is --z standard errors of the IPC of the intervals between dumps, never narrower than
+--margin times the IPC. With --warmup_insts only the dumps after the stats reset count.
+A running point is cancelled when the top of its band is below the bottom of the band of
+the best point of the app (running or complete).
+
+Cancelled runs get an early_stop.json in their output dir with their IPC and the best one,
+and EARLY_STOP as failure in the ledger, so the failure watcher, --resume and the parsers
+skip them. Runs submitted with --scratch keep their stats on the node until they end, so
+they are never compared while running.
+
+Usage:
+    python3 run-jobs/early_stop.py --sweep config_experiments      # loop until no job is running
+    python3 run-jobs/early_stop.py --once --dry_run                 # only print what would be cancelled
+"""
+import subprocess
+import os
+import json
+import math
+import time
+import argparse
+
+from job_ledger import default_ledger_path, refresh_states, latest_jobs, state_group, set_failure
+from run_outputs import (
+    output_path, read_stats_dumps, run_is_complete, run_stopped_early, EARLY_STOP_FILE,
+)
+from sweep_submit import load_repo_env
+
+INSTS_STAT = "simInsts"
+CYCLES_STAT = "board.processor.cores.core.numCycles"
+IPC_STAT = "board.processor.cores.core.ipc"
+# simTicks counts from the last stats reset and finalTick from the start of the simulation
+SIM_TICKS_STAT = "simTicks"
+FINAL_TICK_STAT = "finalTick"
+
+
+def reset_tick(dump):
+    """Tick of the last stats reset before a dump (the end of --warmup_insts), or None."""
+    if SIM_TICKS_STAT not in dump or FINAL_TICK_STAT not in dump:
+        return None
+    return dump[FINAL_TICK_STAT] - dump[SIM_TICKS_STAT]
+
+
+def ipc_band(output_dir, z, margin, min_dumps):
+    """
+    (ipc, half_width, num_dumps) of a run from its stats dumps, or None if it has fewer
+    than min_dumps. Complete runs have a band of width 0.
+    """
+    stats_file = output_path(os.path.join(output_dir, "stats.txt"))
+    if stats_file is None:
+        return None
+    dumps = read_stats_dumps(stats_file, (INSTS_STAT, CYCLES_STAT, IPC_STAT, SIM_TICKS_STAT, FINAL_TICK_STAT))
+    if run_is_complete(output_dir) and dumps and IPC_STAT in dumps[-1]:
+        return dumps[-1][IPC_STAT], 0.0, len(dumps)
+
+    dumps = [d for d in dumps if d.get(CYCLES_STAT) and INSTS_STAT in d]
+    # The dumps of the warmup count from the checkpoint, the ones after the stats reset
+    # from the reset: only the latter are measured
+    if dumps and reset_tick(dumps[-1]) is not None:
+        dumps = [d for d in dumps if reset_tick(d) == reset_tick(dumps[-1])]
+    if len(dumps) < min_dumps:
+        return None
+    ipc = dumps[-1][INSTS_STAT] / dumps[-1][CYCLES_STAT]
+
+    # IPC of every interval between two dumps (the stats are cumulative)
+    interval_ipcs = []
+    previous = {INSTS_STAT: 0.0, CYCLES_STAT: 0.0}
+    for dump in dumps:
+        cycles = dump[CYCLES_STAT] - previous[CYCLES_STAT]
+        if cycles > 0:
+            interval_ipcs.append((dump[INSTS_STAT] - previous[INSTS_STAT]) / cycles)
+        previous = dump
+    mean = sum(interval_ipcs) / len(interval_ipcs)
+    variance = sum((x - mean) ** 2 for x in interval_ipcs) / max(len(interval_ipcs) - 1, 1)
+    half_width = max(z * math.sqrt(variance / len(interval_ipcs)), margin * ipc)
+    return ipc, half_width, len(dumps)
+
+
+def cancel_job(job_id):
+    result = subprocess.run(["scancel", job_id], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error cancelling job {job_id}: {result.stderr}")
+        return False
+    return True
+
+
+def stop_dominated_runs(ledger_path, sweep, z, margin, min_dumps, dry_run):
+    """
+    Cancel the running points outside the band of the best point of their app.
+    Returns the number of jobs still running or pending.
+    """
+    refresh_states(ledger_path)
+    rows = [row for row in latest_jobs(ledger_path, sweep) if row["executor"] == "slurm"]
+
+    bands = {}
+    for row in rows:
+        group = state_group(row["state"])
+        if group == "RUNNING" or (group == "DONE" and run_stopped_early(row["output_dir"]) is None):
+            band = ipc_band(row["output_dir"], z, margin, min_dumps)
+            if band is not None:
+                bands[row["id"]] = band
+
+    # Best lower bound of each app, over the points of every config and bp of the sweep
+    best = {}
+    for row in rows:
+        if row["id"] in bands:
+            ipc, half_width, _ = bands[row["id"]]
+            if ipc - half_width > best.get(row["app"], (float("-inf"), None))[0]:
+                best[row["app"]] = (ipc - half_width, row)
+
+    failures = []
+    for row in rows:
+        if state_group(row["state"]) != "RUNNING" or row["id"] not in bands or row["failure"]:
+            continue
+        ipc, half_width, num_dumps = bands[row["id"]]
+        best_lower, best_row = best[row["app"]]
+        if ipc + half_width >= best_lower:
+            continue
+        # Cancelling a packed job would also kill the other runs of the pack
+        if json.loads(row["params"]).get("pack_size", 1) > 1:
+            print(f"Job {row['job_id']} is dominated but packed, not cancelling: {row['output_dir']}")
+            continue
+
+        print(f"{'Would cancel' if dry_run else 'Cancelling'} job {row['job_id']}: IPC {ipc:.4f} +- "
+              f"{half_width:.4f} after {num_dumps} dumps, best {row['app']} point {best_row['name']}/"
+              f"{best_row['bp']} is above {best_lower:.4f}")
+        if dry_run or not cancel_job(row["job_id"]):
+            continue
+        with open(os.path.join(row["output_dir"], EARLY_STOP_FILE), "w") as f:
+            json.dump({
+                "job_id": row["job_id"], "stopped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "ipc": ipc, "half_width": half_width, "num_dumps": num_dumps,
+                "best_lower_ipc": best_lower, "best_output_dir": best_row["output_dir"],
+            }, f, indent=2)
+        failures.append(("EARLY_STOP", row["id"]))
+
+    set_failure(ledger_path, failures)
+    return sum(1 for row in rows if state_group(row["state"]) in ("PENDING", "RUNNING")) - len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cancel running points clearly worse than the best one of their app.")
+    parser.add_argument("--ledger", default=None,
+                        help="Path of the ledger database (default: $repo_path/1-output-jobs/job_ledger.sqlite)")
+    parser.add_argument("--sweep", help="Only compare the points of this sweep")
+    parser.add_argument("--interval", type=int, default=600, help="Seconds between two checks (default: 600)")
+    parser.add_argument("--once", action="store_true", help="Check once and exit")
+    parser.add_argument("--z", type=float, default=2.0,
+                        help="Standard errors of the interval IPCs in each half of the band (default: 2.0)")
+    parser.add_argument("--margin", type=float, default=0.05,
+                        help="Smallest half width of the band, relative to the IPC (default: 0.05)")
+    parser.add_argument("--min_dumps", type=int, default=3,
+                        help="Stats dumps a run needs before it is compared (default: 3)")
+    parser.add_argument("--dry_run", action="store_true", help="Only print the jobs that would be cancelled")
+    args = parser.parse_args()
+
+    load_repo_env()
+    ledger_path = args.ledger or default_ledger_path()
+    if not os.path.exists(ledger_path):
+        parser.error(f"No ledger at {ledger_path}")
+
+    while True:
+        active = stop_dominated_runs(ledger_path, args.sweep, args.z, args.margin, args.min_dumps, args.dry_run)
+        if args.once or active == 0:
+            break
+        print(f"{active} jobs pending or running, next check in {args.interval} s")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
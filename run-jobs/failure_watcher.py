@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Watch the jobs of the ledger, classify every failure and resubmit the ones that more
+resources can fix.
+
+    OOM        -> resubmitted with twice the memory, up to --max_mem
+    TIMEOUT    -> resubmitted with twice the walltime, up to --max_time
+    NODE_FAIL  -> resubmitted with the same resources
+    GEM5_PANIC / GEM5_FATAL -> never resubmitted, the simulation would fail the same way
+
+Usage:
+    python3 run-jobs/failure_watcher.py                         # loop until no job is pending/running
+    python3 run-jobs/failure_watcher.py --once --sweep config_experiments
+    python3 run-jobs/failure_watcher.py --max_mem 32G --max_time 2-00:00:00
+"""
+import os
+import json
+import time
+import argparse
+
+from job_ledger import (
+    default_ledger_path, refresh_states, latest_jobs, state_group, set_failure, record_jobs,
+)
+from run_outputs import classify_failure, run_is_complete
+from slurm_resources import parse_mem_size, format_mem_size, parse_slurm_time, format_slurm_time
+from sweep_submit import (
+    load_repo_env, create_directory, generate_sbatch_script, submit_job,
+    point_and_settings_from_parameters,
+)
+
+# Failures that a resubmission can fix
+RETRYABLE_FAILURES = {"OOM", "TIMEOUT", "NODE_FAIL"}
+
+
+def escalated_resources(row, params, failure, max_mem, max_time):
+    """
+    New (slurm_mem_size, slurm_time) for a failed job, or a string with the reason it
+    can't be resubmitted.
+    """
+    mem_size = params["slurm_mem_size"]
+    slurm_time = params.get("slurm_time")
+
+    if failure == "OOM":
+        new_mem = min(2 * parse_mem_size(mem_size), parse_mem_size(max_mem))
+        if new_mem <= parse_mem_size(mem_size):
+            return f"already at --max_mem ({mem_size})"
+        mem_size = format_mem_size(new_mem)
+
+    elif failure == "TIMEOUT":
+        # The limit can come from the submission or from the partition default
+        seconds = parse_slurm_time(slurm_time) or parse_slurm_time(row["time_limit"])
+        if seconds is None:
+            return f"unknown time limit ({row['time_limit']})"
+        new_seconds = min(2 * seconds, parse_slurm_time(max_time))
+        if new_seconds <= seconds:
+            return f"already at --max_time ({format_slurm_time(seconds)})"
+        slurm_time = format_slurm_time(new_seconds)
+
+    return mem_size, slurm_time
+
+
+def resubmit(row, params, mem_size, slurm_time):
+    """Clean the output dir of a failed run, regenerate its sbatch and submit it again."""
+    params = dict(params, slurm_mem_size=mem_size, slurm_time=slurm_time, pack_size=1)
+    point, settings = point_and_settings_from_parameters(row["name"], params)
+    attempt = row["attempt"] + 1
+
+    create_directory(row["output_dir"], clean_if_exists=True)
+    job_name = f"{row['app']}_{row['name']}_retry{attempt - 1}"
+    script_path = generate_sbatch_script(point, row["output_dir"], job_name, settings)
+    job_id = submit_job(script_path)
+    if not job_id:
+        return None
+
+    return {
+        "job_id": job_id, "sweep": row["sweep"], "name": row["name"], "bp": row["bp"],
+        "benchmark": row["benchmark"], "app": row["app"], "params": params,
+        "output_dir": row["output_dir"], "executor": "slurm", "state": "SUBMITTED",
+        "attempt": attempt,
+    }
+
+
+def handle_failures(ledger_path, sweep, max_retries, max_mem, max_time):
+    """
+    Classify the failures not seen before and resubmit the retryable ones.
+    Returns the number of jobs still pending or running.
+    """
+    refresh_states(ledger_path)
+    rows = latest_jobs(ledger_path, sweep)
+
+    failures = []
+    new_jobs = []
+    for row in rows:
+        if row["executor"] != "slurm" or row["failure"] or state_group(row["state"]) != "FAILED":
+            continue
+        # A packed job fails when any of its simulations does, the others are complete
+        if run_is_complete(row["output_dir"]):
+            failures.append(("NONE", row["id"]))
+            continue
+        failure = classify_failure(row["output_dir"], row["state"])
+        failures.append((failure, row["id"]))
+
+        if failure not in RETRYABLE_FAILURES:
+            print(f"Job {row['job_id']} failed with {failure}, not resubmitting: {row['output_dir']}")
+            continue
+        if row["attempt"] > max_retries:
+            print(f"Job {row['job_id']} failed with {failure} after {row['attempt']} attempts, giving up: "
+                  f"{row['output_dir']}")
+            continue
+
+        params = json.loads(row["params"])
+        resources = escalated_resources(row, params, failure, max_mem, max_time)
+        if isinstance(resources, str):
+            print(f"Job {row['job_id']} failed with {failure}, {resources}, giving up: {row['output_dir']}")
+            continue
+
+        job = resubmit(row, params, *resources)
+        if job:
+            new_jobs.append(job)
+            print(f"Job {row['job_id']} failed with {failure}, resubmitted as {job['job_id']} "
+                  f"(mem {resources[0]}, time {resources[1] or 'default'}, attempt {job['attempt']})")
+        time.sleep(0.1)
+
+    set_failure(ledger_path, failures)
+    record_jobs(ledger_path, new_jobs)
+
+    active = sum(1 for row in rows if state_group(row["state"]) in ("PENDING", "RUNNING"))
+    return active + len(new_jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify failed jobs and resubmit OOM/timeout/node failures.")
+    parser.add_argument("--ledger", default=None,
+                        help="Path of the ledger database (default: $repo_path/1-output-jobs/job_ledger.sqlite)")
+    parser.add_argument("--sweep", help="Only watch the jobs of this sweep")
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between two checks (default: 300)")
+    parser.add_argument("--once", action="store_true", help="Check once and exit")
+    parser.add_argument("--max_retries", type=int, default=3,
+                        help="Resubmissions allowed for each run (default: 3)")
+    parser.add_argument("--max_mem", default="32G", help="Memory cap of the resubmissions (default: 32G)")
+    parser.add_argument("--max_time", default="3-00:00:00",
+                        help="Walltime cap of the resubmissions (default: 3-00:00:00)")
+    args = parser.parse_args()
+
+    load_repo_env()
+    ledger_path = args.ledger or default_ledger_path()
+    if not os.path.exists(ledger_path):
+        parser.error(f"No ledger at {ledger_path}")
+
+    while True:
+        active = handle_failures(ledger_path, args.sweep, args.max_retries, args.max_mem, args.max_time)
+        if args.once or active == 0:
+            break
+        print(f"{active} jobs pending or running, next check in {args.interval} s")
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite ledger of every job the submitters launch.
+
+Usage:
+    python3 run-jobs/job_ledger.py status                  # refresh with one sacct call and summarize
+    python3 run-jobs/job_ledger.py status --list FAILED    # also list the jobs in a group
+    python3 run-jobs/job_ledger.py status --sweep config_experiments
+"""
+import subprocess
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+LEDGER_FILE_NAME = "job_ledger.sqlite"
+
+# Slurm states that won't change anymore
+TERMINAL_STATES = {
+    "COMPLETED", "FAILED", "CANCELLED", "TIMEOUT", "OUT_OF_MEMORY", "NODE_FAIL",
+    "PREEMPTED", "BOOT_FAIL", "DEADLINE", "REVOKED",
+}
+
+# Groups shown by the status subcommand
+STATE_GROUPS = {
+    "PENDING": "PENDING", "REQUEUED": "PENDING", "CONFIGURING": "PENDING", "SUBMITTED": "PENDING",
+    "RUNNING": "RUNNING", "COMPLETING": "RUNNING", "SUSPENDED": "RUNNING",
+    "COMPLETED": "DONE",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id       TEXT,
+    sweep        TEXT NOT NULL,
+    name         TEXT NOT NULL,
+    bp           TEXT NOT NULL,
+    benchmark    TEXT NOT NULL,
+    app          TEXT NOT NULL,
+    params       TEXT NOT NULL,
+    output_dir   TEXT NOT NULL,
+    executor     TEXT NOT NULL,
+    state        TEXT NOT NULL,
+    exit_code    TEXT,
+    submitted_at TEXT NOT NULL,
+    updated_at   TEXT NOT NULL,
+    time_limit   TEXT,
+    attempt      INTEGER NOT NULL DEFAULT 1,
+    failure      TEXT,
+    max_rss      INTEGER,
+    elapsed      INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_job_id ON jobs (job_id);
+CREATE INDEX IF NOT EXISTS jobs_output_dir ON jobs (output_dir);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+
+def default_ledger_path():
+    """The ledger lives next to the outputs: $repo_path/1-output-jobs/job_ledger.sqlite"""
+    return os.path.join(os.getenv("repo_path"), "1-output-jobs", LEDGER_FILE_NAME)
+
+
+def open_ledger(ledger_path):
+    """Open (and create if needed) the ledger database."""
+    os.makedirs(os.path.dirname(os.path.abspath(ledger_path)), exist_ok=True)
+    connection = sqlite3.connect(ledger_path, timeout=60)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SCHEMA)
+    # Older ledgers lack the columns added by the failure watcher and the resource history
+    columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+    for column, definition in (("time_limit", "TEXT"), ("attempt", "INTEGER NOT NULL DEFAULT 1"),
+                               ("failure", "TEXT"), ("max_rss", "INTEGER"), ("elapsed", "INTEGER")):
+        if column not in columns:
+            connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+    return connection
+
+
+def now():
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_jobs(ledger_path, jobs):
+    """
+    Insert the jobs of a submission in a single transaction. Each job is a dict with
+    job_id, sweep, name, bp, benchmark, app, params (dict), output_dir, executor, state
+    and optionally exit_code and attempt.
+    """
+    if not jobs:
+        return
+    timestamp = now()
+    connection = open_ledger(ledger_path)
+    with connection:
+        connection.executemany(
+            """INSERT INTO jobs (job_id, sweep, name, bp, benchmark, app, params, output_dir,
+                                 executor, state, exit_code, submitted_at, updated_at, attempt)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (job["job_id"], job["sweep"], job["name"], job["bp"], job["benchmark"], job["app"],
+                 json.dumps(job["params"], sort_keys=True), job["output_dir"], job["executor"],
+                 job["state"], job.get("exit_code"), timestamp, timestamp, job.get("attempt", 1))
+                for job in jobs
+            ],
+        )
+    connection.close()
+
+
+def expand_array_job_id(job_id):
+    """sacct shows the pending tasks of an array as "123_[0-9,12%4]", expand them to 123_0, ..."""
+    if "_[" not in job_id:
+        return [job_id]
+    array_id, task_ranges = job_id.split("_[", 1)
+    task_ids = []
+    for task_range in task_ranges.rstrip("]").split("%")[0].split(","):
+        first, _, last = task_range.partition("-")
+        task_ids += [f"{array_id}_{i}" for i in range(int(first), int(last or first) + 1)]
+    return task_ids
+
+
+def query_sacct(job_ids):
+    """
+    States of all the given jobs with a single sacct call. Array tasks are queried through
+    their array id. Returns {job_id: (state, exit_code, time_limit)}.
+    """
+    if not job_ids:
+        return {}
+    query_ids = sorted({job_id.split("_")[0] for job_id in job_ids})
+    result = subprocess.run(
+        ["sacct", "-X", "-n", "-P", "-o", "JobID,State,ExitCode,Timelimit", "-j", ",".join(query_ids)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(f"Error querying sacct: {result.stderr}")
+        return {}
+
+    states = {}
+    for line in result.stdout.splitlines():
+        fields = line.split("|")
+        if len(fields) < 4:
+            continue
+        job_id, state, exit_code, time_limit = fields[:4]
+        for expanded_id in expand_array_job_id(job_id):
+            # "CANCELLED by 1234" -> "CANCELLED"
+            states[expanded_id] = (state.split()[0], exit_code, time_limit)
+    return states
+
+
+def refresh_states(ledger_path):
+    """Update every non-terminal Slurm job of the ledger. Returns the number of updated jobs."""
+    connection = open_ledger(ledger_path)
+    placeholders = ",".join("?" * len(TERMINAL_STATES))
+    rows = connection.execute(
+        f"SELECT id, job_id FROM jobs WHERE executor = 'slurm' AND job_id IS NOT NULL "
+        f"AND state NOT IN ({placeholders})",
+        sorted(TERMINAL_STATES),
+    ).fetchall()
+
+    states = query_sacct([row["job_id"] for row in rows])
+    timestamp = now()
+    updates = [
+        (*states[row["job_id"]], timestamp, row["id"])
+        for row in rows if row["job_id"] in states
+    ]
+    with connection:
+        connection.executemany(
+            "UPDATE jobs SET state = ?, exit_code = ?, time_limit = ?, updated_at = ? WHERE id = ?", updates
+        )
+    connection.close()
+    return len(updates)
+
+
+def state_group(state):
+    """PENDING, RUNNING, DONE or FAILED (any other terminal state)."""
+    return STATE_GROUPS.get(state, "FAILED" if state in TERMINAL_STATES else "PENDING")
+
+
+def set_failure(ledger_path, failures):
+    """Store the failure class of jobs, given as (failure, row id) pairs."""
+    connection = open_ledger(ledger_path)
+    with connection:
+        connection.executemany("UPDATE jobs SET failure = ? WHERE id = ?", failures)
+    connection.close()
+
+
+def latest_jobs(ledger_path, sweep=None):
+    """Latest job of every output directory (resubmissions replace the previous attempts)."""
+    connection = open_ledger(ledger_path)
+    query = "SELECT * FROM jobs WHERE id IN (SELECT MAX(id) FROM jobs GROUP BY output_dir)"
+    parameters = []
+    if sweep:
+        query += " AND sweep = ?"
+        parameters.append(sweep)
+    rows = connection.execute(query + " ORDER BY id", parameters).fetchall()
+    connection.close()
+    return rows
+
+
+def print_status(rows, list_group=None):
+    """Per-sweep counts of pending, running, done and failed jobs."""
+    counts = {}
+    for row in rows:
+        sweep_counts = counts.setdefault(row["sweep"], {"PENDING": 0, "RUNNING": 0, "DONE": 0, "FAILED": 0})
+        sweep_counts[state_group(row["state"])] += 1
+
+    print(f"{'Sweep':<40} {'PENDING':>8} {'RUNNING':>8} {'DONE':>8} {'FAILED':>8}")
+    for sweep, sweep_counts in sorted(counts.items()):
+        print(f"{sweep:<40} {sweep_counts['PENDING']:>8} {sweep_counts['RUNNING']:>8} "
+              f"{sweep_counts['DONE']:>8} {sweep_counts['FAILED']:>8}")
+
+    if list_group:
+        print()
+        for row in rows:
+            if state_group(row["state"]) == list_group:
+                failure = f", {row['failure']}" if row["failure"] else ""
+                print(f"Job {row['job_id']} [{row['state']}, exit {row['exit_code']}{failure}, "
+                      f"attempt {row['attempt']}]: {row['output_dir']}")
+
+
+def main():
+    # Imported here because sweep_submit imports this module
+    from sweep_submit import load_repo_env
+
+    parser = argparse.ArgumentParser(description="Ledger of the jobs launched by the run_jobs scripts.")
+    parser.add_argument(
+        "--ledger",
+        default=None,
+        help="Path of the ledger database (default: $repo_path/1-output-jobs/job_ledger.sqlite)",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    status_parser = subparsers.add_parser("status", help="Refresh the job states with one sacct call and summarize them")
+    status_parser.add_argument("--sweep", help="Only show the jobs of this sweep")
+    status_parser.add_argument(
+        "--list",
+        choices=["PENDING", "RUNNING", "DONE", "FAILED"],
+        help="Also list the jobs in this group",
+    )
+    status_parser.add_argument("--no_refresh", action="store_true", help="Don't query sacct, show the stored states")
+    args = parser.parse_args()
+
+    load_repo_env()
+    ledger_path = args.ledger or default_ledger_path()
+
+    if args.command == "status":
+        start_time = time.time()
+        if not args.no_refresh:
+            num_updated = refresh_states(ledger_path)
+            print(f"Updated {num_updated} jobs from sacct")
+        print_status(latest_jobs(ledger_path, args.sweep), args.list)
+        print(f"\n({time.time() - start_time:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Local executor: runs the same gem5 command lines that the sbatch scripts run, on this
+machine, with a pool of processes sized from the free cores and memory.
+"""
+import subprocess
+import os
+import time
+
+from slurm_resources import parse_mem_size
+
+# Time between two checks of the running simulations
+POLL_INTERVAL = 1.0
+
+
+def available_memory_bytes():
+    """Memory that can be used by new processes without swapping (MemAvailable)."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Not Linux: fall back to the physical memory size
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def available_cores():
+    """Cores this process is allowed to run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def local_pool_size(job_mem_bytes, max_jobs=None):
+    """Simultaneous simulations that fit in the free cores and memory (gem5 is single-threaded)."""
+    pool_size = min(available_cores(), available_memory_bytes() // job_mem_bytes)
+    if max_jobs:
+        pool_size = min(pool_size, max_jobs)
+    return max(1, pool_size)
+
+
+def gem5_command(settings, output_dir, launcher_args):
+    """Command line of a run, the same one generate_sbatch_script() writes."""
+    return [
+        settings["gem5_binary"], "-re", f"--outdir={output_dir}", settings["config_script"],
+        *[str(x) for pair in launcher_args for x in pair],
+    ]
+
+
+def start_run(settings, app, output_dir, launcher_args):
+    """Start a run in the background, logging to slurm.out/slurm.err like a Slurm job."""
+    # The file names are kept so parsers and --resume work the same for both executors
+    stdout = open(os.path.join(output_dir, "slurm.out"), "w")
+    stderr = open(os.path.join(output_dir, "slurm.err"), "w")
+    process = subprocess.Popen(
+        gem5_command(settings, output_dir, launcher_args),
+        cwd=os.path.join(settings["spec_dir"], app),
+        stdout=stdout,
+        stderr=stderr,
+    )
+    stdout.close()
+    stderr.close()
+    return process
+
+
+def run_local(runs, settings, max_jobs=None):
+    """
+    Run every (label, app, output_dir, launcher_args) on this machine and wait for them.
+    Returns a list of (label, exit_code) in the order the runs finished.
+    """
+    job_mem_bytes = parse_mem_size(settings["slurm_mem_size"])
+    pool_size = local_pool_size(job_mem_bytes, max_jobs)
+    print(f"Local executor: up to {pool_size} simultaneous runs "
+          f"({available_cores()} cores, {available_memory_bytes() / 1024**3:.1f} GiB free, "
+          f"{settings['slurm_mem_size']} per run)")
+
+    queued = list(runs)
+    running = {}
+    finished = []
+    num_failed = 0
+    start_time = time.time()
+
+    try:
+        while queued or running:
+            # Admission control: a free slot and enough free memory for one more run
+            while queued and len(running) < pool_size and (
+                    not running or available_memory_bytes() >= job_mem_bytes):
+                label, app, output_dir, launcher_args = queued.pop(0)
+                running[start_run(settings, app, output_dir, launcher_args)] = label
+
+            time.sleep(POLL_INTERVAL)
+
+            for process in [p for p in running if p.poll() is not None]:
+                label = running.pop(process)
+                finished.append((label, process.returncode))
+                if process.returncode != 0:
+                    num_failed += 1
+                    print(f"\nFailed run {label} (exit code: {process.returncode})")
+
+            elapsed = time.strftime("%H:%M:%S", time.gmtime(time.time() - start_time))
+            print(f"\r[{elapsed}] {len(finished)}/{len(runs)} done, {len(running)} running, "
+                  f"{len(queued)} queued, {num_failed} failed", end="", flush=True)
+    except KeyboardInterrupt:
+        print("\nInterrupted, stopping the running simulations...")
+        for process in running:
+            process.terminate()
+        for process in running:
+            process.wait()
+        raise
+
+    print()
+    return finished
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Spread the jobs of a sweep over several Slurm partitions (--partitions) in proportion to
+how many of them each partition can start right now: sinfo is queried once per
+submission and every usable node counts min(idle CPUs / CPUs per job, free memory /
+memory per job). Excluded nodes (--exclude_nodes) are left out of the count and out of
+the jobs. When no partition has room, the jobs are spread by the CPUs of each partition.
+
+Every submitted job is appended to a per-sweep submission log,
+1-output-jobs/submissions/<sweep>.csv, with the partition it was sent to. The report
+subcommand fills in the partition and node each job actually ran on (one sacct call) and
+compares the throughput of the partitions.
+
+Usage:
+    python3 run-jobs/partitions.py idle --partitions all                 # what the submitter would see
+    python3 run-jobs/partitions.py report --sweep config_experiments      # throughput per partition
+"""
+import subprocess
+import os
+import csv
+import time
+import shutil
+import argparse
+
+from job_ledger import expand_array_job_id, now, TERMINAL_STATES
+from slurm_resources import parse_mem_size, parse_slurm_time
+
+# Partition the jobs are submitted to, unless --partitions gives others
+DEFAULT_PARTITION = "ce_200"
+
+# Nodes the jobs must avoid, unless --exclude_nodes says otherwise
+DEFAULT_EXCLUDE_NODES = "ce210"
+
+# sinfo node states (without the */~/#/... flags) that can start jobs
+USABLE_NODE_STATES = {"idle", "mix", "mixed"}
+
+SUBMISSION_LOG_DIR = "submissions"
+SUBMISSION_LOG_FIELDS = (
+    "submitted_at", "job_id", "partition", "node", "state", "start", "end", "elapsed",
+    "name", "bp", "app", "output_dir",
+)
+
+
+def split_list(value):
+    """"a,b, c" -> ["a", "b", "c"] (None or "" -> [])."""
+    return [x.strip() for x in (value or "").split(",") if x.strip()]
+
+
+def query_sinfo(partitions=None):
+    """
+    One line per (node, partition) from a single sinfo call, only of the given partitions
+    (all of them if None). Returns a list of dicts with node, partition, state,
+    idle_cpus, total_cpus and free_mem (bytes).
+    """
+    command = ["sinfo", "-h", "-N", "-o", "%N|%P|%t|%C|%e|%m"]
+    if partitions:
+        command += ["-p", ",".join(partitions)]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Error querying sinfo: {result.stderr}")
+        return []
+
+    nodes = []
+    for line in result.stdout.splitlines():
+        fields = line.strip().split("|")
+        if len(fields) < 6:
+            continue
+        node, partition, state, cpus, free_mem, memory = fields[:6]
+        # CPUs as allocated/idle/other/total
+        cpu_counts = cpus.split("/")
+        if len(cpu_counts) != 4:
+            continue
+        # FREE_MEM is N/A on nodes that don't report it, use their whole memory then
+        free_mem = free_mem if free_mem.isdigit() else memory
+        nodes.append({
+            "node": node,
+            # The default partition is shown with a trailing *
+            "partition": partition.rstrip("*"),
+            "state": state,
+            "idle_cpus": int(cpu_counts[1]),
+            "total_cpus": int(cpu_counts[3]),
+            "free_mem": int(free_mem) * 1024 ** 2 if free_mem.isdigit() else 0,
+        })
+    return nodes
+
+
+def node_is_usable(state):
+    """Nodes not responding (*) or drained, down, reserved, ... can't start jobs."""
+    return "*" not in state and state.rstrip("*~#!%$@^-+") in USABLE_NODE_STATES
+
+
+def partition_weights(nodes, cpus_per_job, mem_per_job, exclude_nodes=()):
+    """
+    {partition: weight} of the partitions in nodes: the jobs each one can start now, or
+    its usable CPUs if none of them can start any.
+    """
+    slots = {}
+    cpus = {}
+    for node in nodes:
+        slots.setdefault(node["partition"], 0)
+        cpus.setdefault(node["partition"], 0)
+        if node["node"] in exclude_nodes or not node_is_usable(node["state"]):
+            continue
+        slots[node["partition"]] += min(node["idle_cpus"] // cpus_per_job, node["free_mem"] // mem_per_job)
+        cpus[node["partition"]] += node["total_cpus"]
+
+    if any(slots.values()):
+        return slots
+    if any(cpus.values()):
+        print("No partition has room for a job now, spreading the jobs by the CPUs of each partition")
+        return cpus
+    return {}
+
+
+def select_partitions(settings, cpus_per_job=1):
+    """
+    Weights of the partitions the jobs of a sweep can go to, from one sinfo call.
+    Returns {partition: weight}, with a single partition (and no sinfo call) when only one
+    is allowed.
+    """
+    partitions = settings["partitions"]
+    if len(partitions) == 1 and partitions[0] != "all":
+        return {partitions[0]: 1}
+    listed = [partition for partition in partitions if partition != "all"] or [DEFAULT_PARTITION]
+    if shutil.which("sinfo") is None:
+        print("sinfo not found, spreading the jobs evenly over the partitions")
+        return {partition: 1 for partition in listed}
+
+    nodes = query_sinfo(None if "all" in partitions else partitions)
+    nodes = [node for node in nodes if node["partition"] not in settings["exclude_partitions"]]
+    mem_per_job = parse_mem_size(settings["slurm_mem_size"]) * cpus_per_job
+    weights = partition_weights(nodes, cpus_per_job, mem_per_job, split_list(settings["exclude_nodes"]))
+    weights = {partition: weight for partition, weight in weights.items() if weight > 0}
+    if not weights:
+        print(f"sinfo shows no usable node in {partitions}, submitting to {listed[0]}")
+        return {listed[0]: 1}
+    return weights
+
+
+def spread_jobs(num_jobs, weights):
+    """
+    Partition of each of num_jobs jobs, in proportion to weights and interleaved, so the
+    longest jobs (submitted first) are spread too.
+    """
+    assigned = {partition: 0 for partition in weights}
+    partitions = []
+    for _ in range(num_jobs):
+        partition = min(weights, key=lambda p: ((assigned[p] + 1) / weights[p], p))
+        assigned[partition] += 1
+        partitions.append(partition)
+    return partitions
+
+
+def print_spread(job_partitions, weights):
+    if len(job_partitions) == 1 and "," in job_partitions[0]:
+        print(f"Partitions: every array task can start in {job_partitions[0]}")
+        return
+    print("Partitions: " + ", ".join(
+        f"{partition} {job_partitions.count(partition)} jobs (weight {weight})"
+        for partition, weight in sorted(weights.items())
+    ))
+
+
+def submission_log_path(base_output_dir, sweep):
+    return os.path.join(base_output_dir, SUBMISSION_LOG_DIR, f"{sweep}.csv")
+
+
+def append_submission_log(base_output_dir, sweep, jobs):
+    """Append the submitted Slurm jobs (ledger job dicts) to the submission log of the sweep."""
+    jobs = [job for job in jobs if job["executor"] == "slurm" and job["job_id"]]
+    if not jobs:
+        return
+    log_path = submission_log_path(base_output_dir, sweep)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    new_file = not os.path.exists(log_path)
+    timestamp = now()
+    with open(log_path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUBMISSION_LOG_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for job in jobs:
+            writer.writerow({
+                "submitted_at": timestamp, "job_id": job["job_id"],
+                "partition": job["params"].get("partition") or "", "node": "", "state": "SUBMITTED",
+                "start": "", "end": "", "elapsed": "",
+                "name": job["name"], "bp": job["bp"], "app": job["app"], "output_dir": job["output_dir"],
+            })
+
+
+def query_sacct_placement(job_ids):
+    """
+    Partition, node, state, start, end and elapsed of the given jobs with a single sacct
+    call. Returns {job_id: dict}.
+    """
+    query_ids = sorted({job_id.split("_")[0] for job_id in job_ids})
+    if not query_ids:
+        return {}
+    result = subprocess.run(
+        ["sacct", "-X", "-n", "-P", "-o", "JobID,Partition,NodeList,State,Start,End,Elapsed",
+         "-j", ",".join(query_ids)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(f"Error querying sacct: {result.stderr}")
+        return {}
+
+    placement = {}
+    for line in result.stdout.splitlines():
+        fields = line.split("|")
+        if len(fields) < 7:
+            continue
+        job_id, partition, node, state, start, end, elapsed = fields[:7]
+        for expanded_id in expand_array_job_id(job_id):
+            placement[expanded_id] = {
+                "partition": partition,
+                # Pending jobs show "None assigned"
+                "node": node if not node.startswith("None") else "",
+                "state": state.split()[0] if state else "",
+                "start": start if start not in ("Unknown", "None") else "",
+                "end": end if end not in ("Unknown", "None") else "",
+                "elapsed": elapsed,
+            }
+    return placement
+
+
+def refresh_submission_log(log_path):
+    """Fill in the partition and node of the jobs of a submission log from sacct. Returns its rows."""
+    with open(log_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    placement = query_sacct_placement([row["job_id"] for row in rows if row["state"] not in TERMINAL_STATES])
+    for row in rows:
+        if row["job_id"] in placement:
+            row.update(placement[row["job_id"]])
+
+    tmp_path = log_path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUBMISSION_LOG_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, log_path)
+    return rows
+
+
+def sacct_timestamp(sacct_time):
+    """Seconds since the epoch of a sacct time (2024-05-01T12:34:56)."""
+    return time.mktime(time.strptime(sacct_time, "%Y-%m-%dT%H:%M:%S"))
+
+
+def print_partition_report(rows):
+    """Jobs, completed runs, mean run time and completed runs per hour of every partition."""
+    partitions = {}
+    for row in rows:
+        partitions.setdefault(row["partition"] or "?", []).append(row)
+
+    print(f"{'Partition':<20} {'Jobs':>6} {'Done':>6} {'Failed':>6} {'Nodes':>6} {'Mean run (h)':>13} {'Runs/h':>8}")
+    for partition, partition_rows in sorted(partitions.items()):
+        done = [row for row in partition_rows if row["state"] == "COMPLETED"]
+        failed = [row for row in partition_rows if row["state"] in TERMINAL_STATES and row["state"] != "COMPLETED"]
+        nodes = {row["node"] for row in partition_rows if row["node"]}
+        run_hours = [parse_slurm_time(row["elapsed"]) / 3600 for row in done if parse_slurm_time(row["elapsed"])]
+        mean_run = f"{sum(run_hours) / len(run_hours):.2f}" if run_hours else "-"
+        # Completed runs per hour between the first start and the last end in the partition
+        starts = sorted(row["start"] for row in done if row["start"])
+        ends = sorted(row["end"] for row in done if row["end"])
+        runs_per_hour = "-"
+        if starts and ends:
+            span_hours = (sacct_timestamp(ends[-1]) - sacct_timestamp(starts[0])) / 3600
+            if span_hours > 0:
+                runs_per_hour = f"{len(done) / span_hours:.2f}"
+        print(f"{partition:<20} {len(partition_rows):>6} {len(done):>6} {len(failed):>6} {len(nodes):>6} "
+              f"{mean_run:>13} {runs_per_hour:>8}")
+
+
+def main():
+    # Imported here because sweep_submit imports this module
+    from sweep_submit import load_repo_env
+
+    parser = argparse.ArgumentParser(description="Partitions the sweeps are spread over.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    idle_parser = subparsers.add_parser("idle", help="Jobs each partition can start now, from one sinfo call")
+    idle_parser.add_argument("--partitions", default="all",
+                             help="Comma separated partitions, or all (default: all)")
+    idle_parser.add_argument("--exclude_partitions", default="", help="Comma separated partitions to leave out")
+    idle_parser.add_argument("--exclude_nodes", default=DEFAULT_EXCLUDE_NODES,
+                             help=f"Comma separated nodes to leave out (default: {DEFAULT_EXCLUDE_NODES})")
+    idle_parser.add_argument("--mem", default="5G", help="Memory of each job (default: 5G)")
+
+    report_parser = subparsers.add_parser("report", help="Refresh the submission log of a sweep and compare its partitions")
+    report_parser.add_argument("--sweep", required=True, help="Name of the sweep")
+    args = parser.parse_args()
+
+    load_repo_env()
+    if args.command == "idle":
+        partitions = split_list(args.partitions) or [DEFAULT_PARTITION]
+        nodes = query_sinfo(None if "all" in partitions else partitions)
+        nodes = [node for node in nodes if node["partition"] not in split_list(args.exclude_partitions)]
+        weights = partition_weights(nodes, 1, parse_mem_size(args.mem), split_list(args.exclude_nodes))
+        for partition, weight in sorted(weights.items()):
+            print(f"{partition:<20} {weight:>6}")
+    else:
+        log_path = submission_log_path(os.path.join(os.getenv("repo_path"), "1-output-jobs"), args.sweep)
+        if not os.path.exists(log_path):
+            parser.error(f"No submission log at {log_path}")
+        print_partition_report(refresh_submission_log(log_path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Size the --mem-per-cpu and --time of each run from the MaxRSS and Elapsed that sacct
+reported for past runs of the same config, app and bp family (see usage_key), or of the
+exact same run when it was simulated before (see exact_usage_key). The usage of every
+completed job is fetched once and kept in the job ledger, so old jobs purged from the Slurm
+accounting database are still used.
+"""
+import subprocess
+import json
+import shutil
+
+from job_ledger import open_ledger, refresh_states
+from slurm_resources import parse_mem_size, format_mem_size, parse_slurm_time, format_slurm_time
+
+# Safety margins over the largest usage seen
+MEM_MARGIN = 1.25
+TIME_MARGIN = 1.5
+
+# Requests are never smaller than this, and memory is rounded up to 256 MiB
+MIN_MEM = "1G"
+MIN_TIME_SECONDS = 15 * 60
+MEM_GRANULARITY = 256 * 1024**2
+
+# Parameters of run_parameters() that tell apart two runs of the same usage_key: the core
+# (the extra_params of the BaseCPU points), the simpoint and how long the run is
+USAGE_PARAMETERS = (
+    "config", "extra_params", "app", "simpoint", "num_ticks", "fast_forward_insts", "warmup_insts", "max_insts",
+)
+
+
+def bp_family(bp):
+    """TAGE_SC_L, TAGE_SC and TAGE_L behave alike, and so do the static predictors."""
+    if bp.startswith("TAGE"):
+        return "TAGE"
+    if bp.startswith("Always") or bp == "RandomBP":
+        return "Static"
+    return bp
+
+
+def usage_key(params):
+    """Key of the usage history of a run from its run_parameters(): (config, app, bp family)."""
+    return (params["config"], params["app"], bp_family(params["bp"]))
+
+
+def exact_usage_key(params):
+    """Key of the runs of a usage_key with the same USAGE_PARAMETERS as params."""
+    return json.dumps({name: params.get(name) for name in USAGE_PARAMETERS}, sort_keys=True)
+
+
+def history_usage(history, params):
+    """
+    (max_rss, elapsed) a run (params being its run_parameters()) is sized from: the one of
+    the same run if simulated before, otherwise the largest of its usage_key, or None.
+    """
+    runs = history.get(usage_key(params))
+    if not runs:
+        return None
+    usage = runs.get(exact_usage_key(params))
+    if usage is None:
+        usage = (max(rss for rss, _ in runs.values()), max(seconds for _, seconds in runs.values()))
+    return usage
+
+
+def query_sacct_usage(job_ids):
+    """
+    MaxRSS (bytes, the largest of the job steps) and Elapsed (seconds) of the given jobs
+    with a single sacct call. Returns {job_id: (max_rss, elapsed)}.
+    """
+    query_ids = sorted({job_id.split("_")[0] for job_id in job_ids})
+    result = subprocess.run(
+        ["sacct", "-n", "-P", "-o", "JobID,MaxRSS,Elapsed", "-j", ",".join(query_ids)],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(f"Error querying sacct: {result.stderr}")
+        return {}
+
+    usage = {}
+    for line in result.stdout.splitlines():
+        fields = line.split("|")
+        if len(fields) < 3:
+            continue
+        # MaxRSS is only reported for the steps (123.batch, 123_4.extern, ...)
+        job_id, max_rss, elapsed = fields[:3]
+        job_id = job_id.split(".")[0]
+        rss, seconds = usage.get(job_id, (0, 0))
+        if max_rss:
+            rss = max(rss, parse_mem_size(max_rss))
+        seconds = max(seconds, parse_slurm_time(elapsed) or 0)
+        usage[job_id] = (rss, seconds)
+    return usage
+
+
+def collect_usage(ledger_path):
+    """Store in the ledger the usage of the completed jobs that don't have it yet."""
+    refresh_states(ledger_path)
+    connection = open_ledger(ledger_path)
+    rows = connection.execute(
+        "SELECT id, job_id FROM jobs WHERE executor = 'slurm' AND state = 'COMPLETED' AND max_rss IS NULL"
+    ).fetchall()
+    if rows:
+        usage = query_sacct_usage([row["job_id"] for row in rows])
+        # Jobs already purged from sacct are stored as 0 so they are not queried again
+        with connection:
+            connection.executemany(
+                "UPDATE jobs SET max_rss = ?, elapsed = ? WHERE id = ?",
+                [(*usage.get(row["job_id"], (0, 0)), row["id"]) for row in rows],
+            )
+    connection.close()
+
+
+def load_usage_history(ledger_path):
+    """Largest (max_rss, elapsed) of the completed runs, as {usage_key: {exact_usage_key: usage}}."""
+    if shutil.which("sacct") is None:
+        print("sacct not found, using the default memory and time requests")
+        return {}
+    collect_usage(ledger_path)
+
+    connection = open_ledger(ledger_path)
+    rows = connection.execute(
+        "SELECT params, max_rss, elapsed FROM jobs WHERE state = 'COMPLETED' AND max_rss > 0"
+    ).fetchall()
+    connection.close()
+
+    history = {}
+    for row in rows:
+        params = json.loads(row["params"])
+        runs = history.setdefault(usage_key(params), {})
+        key = exact_usage_key(params)
+        # The MaxRSS of a packed job adds up all its simulations
+        max_rss = row["max_rss"] // params.get("pack_size", 1)
+        rss, seconds = runs.get(key, (0, 0))
+        runs[key] = (max(rss, max_rss), max(seconds, row["elapsed"]))
+    return history
+
+
+def sized_settings(settings, params, history):
+    """
+    Settings of a run (params being its run_parameters()) with the memory and time
+    requests sized from the history, if seen.
+    """
+    usage = history_usage(history, params)
+    if usage is None:
+        return settings
+    max_rss, elapsed = usage
+    mem_bytes = max(int(max_rss * MEM_MARGIN), parse_mem_size(MIN_MEM))
+    mem_bytes = -(-mem_bytes // MEM_GRANULARITY) * MEM_GRANULARITY
+    seconds = max(int(elapsed * TIME_MARGIN), MIN_TIME_SECONDS)
+    return dict(settings, slurm_mem_size=format_mem_size(mem_bytes), slurm_time=format_slurm_time(seconds))
+
+
+def widest_settings(settings, run_settings):
+    """Settings that fit every run of a job array or pack: the largest memory and time requested."""
+    mem_size = max((s["slurm_mem_size"] for s in run_settings), key=parse_mem_size)
+    times = [parse_slurm_time(s.get("slurm_time")) for s in run_settings]
+    # A single run without history leaves the walltime to the partition default
+    slurm_time = format_slurm_time(max(times)) if None not in times else None
+    return dict(settings, slurm_mem_size=mem_size, slurm_time=slurm_time)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store of completed runs, so a point already simulated by another sweep
+(or by an older submission of the same one) is reused instead of simulated again.
+
+Every run is keyed by a hash of what determines its results:
+
+    gem5 binary       contents of the gem5 executable
+    launcher          contents of the launcher script and the sys_config_factory it imports
+    parameters        config, bp, app, extra_params, mem_size and num_ticks
+    checkpoint        the checkpoint key of ckpt_cache.py (file names, sizes, mtimes and
+                      the contents of the small files)
+
+<base_output_dir>/result_store/<key> is a symlink to the output directory of the run
+submitted with that key. When it points to a complete run, the files of that run are
+linked (hard links, or symlinks across filesystems) into the new output directory.
+"""
+import os
+import json
+import hashlib
+import functools
+
+from ckpt_cache import checkpoint_key
+from run_outputs import run_is_complete
+
+STORE_DIR_NAME = "result_store"
+
+# Parameters of run_parameters() that change the results of a simulation
+RESULT_PARAMETERS = ("config", "bp", "app", "extra_params", "simpoint", "mem_size", "num_ticks", "fast_forward_insts", "warmup_insts", "max_insts")
+
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024**2), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """sha256 of a file, computed once per process (the gem5 binary is ~1 GiB)."""
+    stat = os.stat(path)
+    return _file_digest(os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=None)
+def launcher_digest(config_script):
+    """Hash of the launcher and every python file next to it (sys_config_factory, SPEC_cmds.py)."""
+    digest = hashlib.sha256(os.path.basename(config_script).encode())
+    config_dir = os.path.dirname(os.path.abspath(config_script))
+    for root, dirs, files in os.walk(config_dir):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(root, name)
+                digest.update(f"{os.path.relpath(path, config_dir)}\0{file_digest(path)}\0".encode())
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def cached_checkpoint_key(ckpt_dir):
+    return checkpoint_key(ckpt_dir)
+
+
+def result_key(params, ckpt_dir):
+    """Key of a run from its run_parameters() and the checkpoint it restores."""
+    key_fields = {name: params.get(name) for name in RESULT_PARAMETERS}
+    key_fields["gem5_binary"] = file_digest(params["gem5_binary"])
+    key_fields["launcher"] = launcher_digest(params["config_script"])
+    key_fields["checkpoint"] = cached_checkpoint_key(ckpt_dir)
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode()).hexdigest()
+
+
+def store_entry(base_output_dir, key):
+    return os.path.join(base_output_dir, STORE_DIR_NAME, key)
+
+
+def find_result(base_output_dir, key, output_dir):
+    """Output directory of a complete run with this key (other than output_dir), or None."""
+    entry = store_entry(base_output_dir, key)
+    if not os.path.islink(entry):
+        return None
+    result_dir = os.readlink(entry)
+    if os.path.realpath(result_dir) == os.path.realpath(output_dir):
+        return None
+    return result_dir if run_is_complete(result_dir) else None
+
+
+def claim_result(base_output_dir, key, output_dir):
+    """Point the store entry of a key to the run that is about to be simulated."""
+    entry = store_entry(base_output_dir, key)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    # Written under another name and renamed, so readers never see a missing entry
+    tmp_entry = f"{entry}.{os.getpid()}"
+    if os.path.lexists(tmp_entry):
+        os.remove(tmp_entry)
+    os.symlink(os.path.abspath(output_dir), tmp_entry)
+    os.replace(tmp_entry, entry)
+
+
+def link_result(result_dir, output_dir):
+    """Link every file of a complete run into output_dir (an empty directory)."""
+    for root, dirs, files in os.walk(result_dir):
+        target_root = os.path.join(output_dir, os.path.relpath(root, result_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+            try:
+                # Hard links keep the result even if the original run is cleaned and rerun
+                os.link(source, target)
+            except OSError:
+                os.symlink(os.path.abspath(source), target)
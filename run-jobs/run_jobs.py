@@ -1,73 +1,21 @@
 #!/usr/bin/env python3
-import subprocess
 import os
-import time
 import argparse
 
-def get_applications_by_benchmark(ckpt_base_dir):
-    """Discover applications by reading checkpoint directories."""
-    if not os.path.exists(ckpt_base_dir):
-        print(f"Warning: Checkpoint path does not exist: {ckpt_base_dir}")
-        return []
-    
-    apps = []
-    for item in os.listdir(ckpt_base_dir):
-        if item.startswith("ckpt_"):
-            app_name = item.replace("ckpt_", "")
-            apps.append(app_name)
-    
-    return sorted(apps)
-
+from sweep_engine import normalize_sweep_spec
+from sweep_submit import (
+    load_repo_env, get_applications_by_benchmark, create_directory, add_submission_arguments,
+    parse_bp_list, select_apps, submit_sweep, print_submission_summary, submit_parse_job
+)
 
-def create_directory(path, clean_if_exists=False):
-    """Create a directory, optionally cleaning it if it already exists."""
-    if clean_if_exists and os.path.exists(path):
-        import shutil
-        shutil.rmtree(path)
-    os.makedirs(path, exist_ok=True)
-    return path
-
-#SBATCH --nodelist=ce209
-def generate_sbatch_script(gem5_binary, config_script, spec_dir, app, config, bp, 
-                           output_dir, mem_size, slurm_mem_size):
-    """Generate an sbatch script for running simulation."""
-    
-    spec_number = app[:3]
-    sbatch_content = f"""#!/bin/bash
-#SBATCH --partition=ce_200
-#SBATCH --exclude=ce210
-#SBATCH --mem-per-cpu={slurm_mem_size}
-#SBATCH --job-name={app}_{config}
-#SBATCH --output={output_dir}/slurm.out
-#SBATCH --error={output_dir}/slurm.err
-
-cd {spec_dir}/{app}
-
-{gem5_binary}  -re --outdir={output_dir} {config_script} \
-    --spec_number {spec_number} \
-    --config {config} \
-    --bp {bp} \
-    --mem_size {mem_size} \
-    --num_ticks 100000000000 
-"""
-    
-    script_path = os.path.join(output_dir, "run.sbatch")
-    with open(script_path, "w") as f:
-        f.write(sbatch_content)
-    
-    return script_path
 
-#--debug-flags=LTage,TageSCL
-def submit_job(script_path):
-    """Submit the job using sbatch and return job ID."""
-    result = subprocess.run(["sbatch", script_path], capture_output=True, text=True)
-    if result.returncode == 0:
-        # Extract job ID from output like "Submitted batch job 12345"
-        job_id = result.stdout.strip().split()[-1]
-        return job_id
-    else:
-        print(f"Error submitting job: {result.stderr}")
-        return None
+def build_sweep_spec(configs, fs):
+    """Sweep over the named configurations: 1-output-jobs/[fs/]<config>/<bp>/<benchmark>/<app>"""
+    return normalize_sweep_spec({
+        "sweep": {"name": "named_configs_fs" if fs else "named_configs", "output_subdir": "fs" if fs else ""},
+        "axes": [{"name": "config", "values": list(configs)}],
+        "naming": {"dir": "{config}", "job": "{app}_{config}"},
+    })
 
 
 def main():
@@ -102,58 +50,25 @@ def main():
         help=f"Makes the simulations be FUll system",
         type=bool,
     )
+    add_submission_arguments(parser)
     args = parser.parse_args()
     
     benchmarks = [args.benchmark]
     spec_apps = [int(x) for x in args.spec_number.split(',')] if args.spec_number else spec_choices
     configs = [args.config] if args.config else config_choices
+    bps = parse_bp_list(parser, args.bp, bp_choices)
 
-    if args.bp:
-        bps = [x.strip() for x in args.bp.split(",") if x.strip()]
-        invalid_bps = [x for x in bps if x not in bp_choices]
-        if invalid_bps:
-            parser.error(f"Invalid --bp value(s): {invalid_bps}. Valid values: {bp_choices}")
-        # opcional: eliminar duplicados manteniendo orden
-        bps = list(dict.fromkeys(bps))
-    else:
-        bps = bp_choices
-
-    def load_env_file(env_path):
-        """Load environment variables from a .env file."""
-        env_vars = {}
-        if not os.path.exists(env_path):
-            return env_vars
-        
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                # Skip empty lines and comments
-                if not line or line.startswith('#'):
-                    continue
-                # Parse key=value pairs
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    # Remove quotes if present
-                    value = value.strip('"').strip("'")
-                    env_vars[key] = value
-        return env_vars
-
-    # Loads the paths for the variables used here
-    # Look for .env file in the parent directory of this script
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    env_path = os.path.join(os.path.dirname(script_dir), ".env")
-    env_vars = load_env_file(env_path)
-    
-    # Set environment variables
-    for key, value in env_vars.items():
-        os.environ.setdefault(key, value)
+    # Loads the paths for the variables used here from the .env file at the root of the repo
+    load_repo_env()
 
     gem5_binary = os.getenv("gem5_path")
 
     if (args.fs) :
         config_script = os.getenv("repo_path") + "/config-files/launch_fs_from_ckpt.py"
+        ckpt_dir_format = os.getenv("fs_ckpt_path") + "/ckpt-{app}"
     else :
         config_script = os.getenv("repo_path") + "/config-files/launch_se_from_ckpt.py"
+        ckpt_dir_format = os.getenv("ckpt_path") + "/ckpt_{app}"
     
     spec_dir = os.getenv("SPEC_path")
 
@@ -173,14 +88,13 @@ def main():
     base_output_dir = os.getenv("repo_path") + "/1-output-jobs"
     create_directory(base_output_dir)
     
+    spec = build_sweep_spec(configs, args.fs)
     submitted_jobs = []
     
     for benchmark in benchmarks:
         ckpt_base_dir = ckpt_base_dirs[benchmark]
         apps = get_applications_by_benchmark(ckpt_base_dir)
         print(apps)
-        mem_size = mem_sizes[benchmark]
-        slurm_mem_size = slurm_mem_sizes[benchmark]
         
         if not apps:
             print(f"Warning: No applications found for {benchmark}")
@@ -191,61 +105,27 @@ def main():
         print(f"Applications: {', '.join(apps)}")
         print(f"{'='*60}")
         
-        for config in configs:
-            for bp in bps:
-                for app in apps:
-                    
-                    if (int(app[:3]) not in spec_apps) and benchmark == "SPEC17":
-                        print(f"Skipping {app} as it's not in the specified list of SPEC17 apps.")
-                        continue
-
-                    # Create output directory: config/bp/benchmark/app/
-                    if (args.fs):
-                        output_dir = create_directory(
-                            os.path.join(base_output_dir, "fs", config, bp, benchmark, app),
-                            clean_if_exists=True
-                        )
-                    else:
-                        output_dir = create_directory(
-                            os.path.join(base_output_dir, config, bp, benchmark, app),
-                            clean_if_exists=True
-                        )
-                    
-                    # Generate sbatch script
-                    sbatch_script = generate_sbatch_script(
-                        gem5_binary,
-                        config_script,
-                        spec_dir,
-                        app,
-                        config,
-                        bp,
-                        output_dir,
-                        mem_size,
-                        slurm_mem_size
-                    )
-                    
-                    # Submit the job
-                    job_id = submit_job(sbatch_script)
-                    
-                    if job_id:
-                        submitted_jobs.append((config, bp, benchmark, app, job_id))
-                        print(f"Submitted job {job_id} for {config}/{bp}/{benchmark}/{app}")
-                    else:
-                        print(f"Failed to submit job for {config}/{bp}/{benchmark}/{app}")
-                    
-                    # Small delay to avoid overwhelming the scheduler
-                    time.sleep(0.1)
-    
-    print(f"\n{'='*60}")
-    print(f"Summary: Submitted {len(submitted_jobs)} jobs")
-    print(f"{'='*60}")
+        settings = {
+            "benchmark": benchmark,
+            "gem5_binary": gem5_binary,
+            "config_script": config_script,
+            "spec_dir": spec_dir,
+            "mem_size": mem_sizes[benchmark],
+            "slurm_mem_size": slurm_mem_sizes[benchmark],
+            "base_output_dir": base_output_dir,
+            "ckpt_dir_format": ckpt_dir_format,
+        }
+        submitted_jobs += submit_sweep(spec, bps, select_apps(benchmark, apps, spec_apps), settings, args)
     
-    for config, bp, benchmark, app, job_id in submitted_jobs:
-        print(f"Job {job_id}: {config}/{bp}/{benchmark}/{app}")
-    
-    print(f"\nMonitor jobs with: squeue -u $USER")
-    print(f"Cancel all jobs with: scancel -u $USER")
+    if not args.dry_run:
+        print_submission_summary(submitted_jobs, args.executor)
+
+    if args.parse and not args.dry_run:
+        parse_commands = [
+            f"./data-parsing/simple_parser.sh 1-output-jobs/{'fs/' if args.fs else ''}{config}" for config in configs
+        ]
+        submit_parse_job(submitted_jobs, parse_commands, base_output_dir, spec["sweep"]["name"], args.executor)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import subprocess
+import os
+import json
+import glob
+
+# Marker gem5 writes at the end of every stats dump
+STATS_END_MARKER = "---------- End Simulation Statistics"
+
+# Written by early_stop.py in the output dir of the runs it cancels
+EARLY_STOP_FILE = "early_stop.json"
+
+# Line printed by launch_se_from_ckpt.py / launch_fs_from_ckpt.py once sim.run() returns
+EXIT_CAUSE_PREFIX = "Exit cause:"
+
+# Exit causes of a run that ended as asked (sim.get_last_exit_event_cause()): the workload
+# exited (SE, m5_exit in FS), the workend events or --max_insts were reached, or the
+# --num_ticks limit (the exit the launchers schedule, or the one of sim.run itself).
+# Any other cause, e.g. a SIGINT, means the run has to be simulated again
+NORMAL_EXIT_CAUSES = (
+    "exiting with last active thread context",
+    "m5_exit instruction encountered",
+    "workend",
+    "a thread reached the max instruction count",
+    "Tick exit reached",
+    "simulate() limit reached",
+)
+
+# Where the launcher's prints end up: gem5 -re redirects them to simout.txt (simout in
+# older gem5 versions), slurm.out only has them for runs launched without -re
+GEM5_STDOUT_FILES = ("simout.txt", "simout")
+
+# Where the failures are written: Slurm its kills to slurm.err, gem5 -re its panics and
+# fatals to simerr.txt (simerr in older gem5 versions)
+FAILURE_LOG_FILES = ("slurm.err", "simerr.txt", "simerr")
+
+# Key stats, params and exit cause written by the launchers next to stats.txt (see
+# config-files/launch_results.py), not compressed: it is a few hundred bytes
+RESULTS_FILE = "results.json"
+
+# Text outputs the sbatch scripts compress with zstd when gem5 exits (--compress). Only
+# gem5's: slurm.out and slurm.err stay open in Slurm and the batch shell until the job
+# ends, so whatever they write after the compression would be lost
+COMPRESSED_OUTPUTS = (
+    "stats.txt", "config.json", "config.ini", "simout.txt", "simerr.txt",
+)
+
+
+# Failure classes, from the sacct state first and the end of FAILURE_LOG_FILES otherwise
+SACCT_FAILURES = {
+    "OUT_OF_MEMORY": "OOM",
+    "TIMEOUT": "TIMEOUT",
+    "NODE_FAIL": "NODE_FAIL",
+    "BOOT_FAIL": "NODE_FAIL",
+}
+SLURM_ERR_FAILURES = (
+    ("oom-kill", "OOM"),
+    ("out-of-memory", "OOM"),
+    ("Out Of Memory", "OOM"),
+    ("DUE TO TIME LIMIT", "TIMEOUT"),
+    ("DUE TO NODE FAILURE", "NODE_FAIL"),
+    ("panic:", "GEM5_PANIC"),
+    ("fatal:", "GEM5_FATAL"),
+    ("Segmentation fault", "GEM5_PANIC"),
+)
+
+
+def output_path(path):
+    """Return path, or its compressed path.zst if only that one exists, or None."""
+    if os.path.exists(path):
+        return path
+    if os.path.exists(path + ".zst"):
+        return path + ".zst"
+    return None
+
+
+def read_output(path):
+    """Return the contents of a text output, decompressing it if it is a .zst."""
+    if path.endswith(".zst"):
+        result = subprocess.run(["zstd", "-dcq", path], capture_output=True)
+        return result.stdout.decode(errors="replace")
+    with open(path, "r", errors="replace") as f:
+        return f.read()
+
+
+def read_file_tail(path, num_bytes=8192):
+    """Return the last num_bytes of a text file (the whole file if it is smaller)."""
+    if path.endswith(".zst"):
+        return read_output(path)[-num_bytes:]
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - num_bytes))
+        return f.read().decode(errors="replace")
+
+
+def find_slurm_out(output_dir):
+    """Return the slurm stdout file of a run (slurm.out or slurm-<jobid>.out, maybe .zst), or None."""
+    slurm_out = output_path(os.path.join(output_dir, "slurm.out"))
+    if slurm_out:
+        return slurm_out
+    # Older submissions used slurm-%j.out, keep the newest one
+    candidates = sorted(glob.glob(os.path.join(output_dir, "slurm-*.out")), key=os.path.getmtime)
+    return candidates[-1] if candidates else None
+
+
+def read_exit_cause(output_dir):
+    """Return the exit cause printed by the launcher, or None if the simulation did not finish."""
+    stdout_files = [output_path(os.path.join(output_dir, name)) for name in GEM5_STDOUT_FILES]
+    stdout_files.append(find_slurm_out(output_dir))
+    for stdout_file in stdout_files:
+        if stdout_file is None:
+            continue
+        for line in reversed(read_file_tail(stdout_file).splitlines()):
+            line = line.strip()
+            if line.startswith(EXIT_CAUSE_PREFIX):
+                return line[len(EXIT_CAUSE_PREFIX):].strip()
+    return None
+
+
+def read_stats_value(stats_file, stat_name):
+    """Return the value of stat_name in the last dump of a stats.txt (or .zst), or None if missing."""
+    value = None
+    for line in read_output(stats_file).splitlines():
+        if line.startswith(stat_name):
+            fields = line.split()
+            if len(fields) > 1 and fields[0] == stat_name:
+                value = fields[1]
+    return value
+
+
+def read_stats_dumps(stats_file, stat_names):
+    """
+    Values of stat_names in every complete dump of a stats.txt (or .zst), as a list of
+    {stat_name: float} with one dict per dump (the launchers' --stats_interval dumps).
+    """
+    dumps = []
+    values = {}
+    for line in read_output(stats_file).splitlines():
+        if line.startswith(STATS_END_MARKER):
+            dumps.append(values)
+            values = {}
+            continue
+        fields = line.split()
+        if len(fields) > 1 and fields[0] in stat_names:
+            try:
+                values[fields[0]] = float(fields[1])
+            except ValueError:
+                pass
+    return dumps
+
+
+def read_results(output_dir):
+    """The results.json of a run, or None for runs launched before the launchers wrote it."""
+    path = os.path.join(output_dir, RESULTS_FILE)
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_stopped_early(output_dir):
+    """The early_stop.json record of a run cancelled by early_stop.py, or None."""
+    path = os.path.join(output_dir, EARLY_STOP_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run_is_complete(output_dir):
+    """
+    A run is complete when its stats.txt holds a full dump and the launcher
+    printed one of the NORMAL_EXIT_CAUSES to simout.txt or slurm.out (gem5
+    panics and Slurm kills never reach that line).
+    """
+    stats_file = output_path(os.path.join(output_dir, "stats.txt"))
+    if stats_file is None or os.path.getsize(stats_file) == 0:
+        return False
+    if STATS_END_MARKER not in read_file_tail(stats_file):
+        return False
+    return read_exit_cause(output_dir) in NORMAL_EXIT_CAUSES
+
+
+def run_host_seconds(output_dir):
+    """Return the host seconds spent by a finished run, or 0.0 if they can't be read."""
+    results = read_results(output_dir)
+    if results and results.get("host_seconds") is not None:
+        return float(results["host_seconds"])
+    stats_file = output_path(os.path.join(output_dir, "stats.txt"))
+    if stats_file is None:
+        return 0.0
+    value = read_stats_value(stats_file, "hostSeconds")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def print_resume_summary(num_skipped, num_total, skipped_host_seconds):
+    """Print how much work a --resume submission avoided."""
+    percent = (100.0 * num_skipped / num_total) if num_total else 0.0
+    print(f"\n{'='*60}")
+    print(f"Resume: skipped {num_skipped} of {num_total} runs already complete or stopped early ({percent:.1f}%)")
+    print(f"Resume: saved approximately {skipped_host_seconds / 3600:.1f} core-hours of simulation")
+    print(f"{'='*60}")
+
+
+def classify_failure(output_dir, slurm_state=None):
+    """
+    Classify a failed run as OOM, TIMEOUT, NODE_FAIL (worth resubmitting with more
+    resources or elsewhere), GEM5_PANIC, GEM5_FATAL (deterministic, resubmitting gives the
+    same result), CANCELLED or UNKNOWN.
+    """
+    if slurm_state in SACCT_FAILURES:
+        return SACCT_FAILURES[slurm_state]
+
+    for name in FAILURE_LOG_FILES:
+        err_file = output_path(os.path.join(output_dir, name))
+        if err_file is None:
+            continue
+        tail = read_file_tail(err_file, 65536)
+        for pattern, failure in SLURM_ERR_FAILURES:
+            if pattern in tail:
+                return failure
+
+    if slurm_state == "CANCELLED":
+        return "CANCELLED"
+    return "UNKNOWN"
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+SimPoint sampling of the SPEC17 SE checkpoints. Instead of a long slice after the
+WORKBEGIN checkpoint, every app is simulated at a few representative intervals of its ROI
+and their results are combined with the weight of the cluster each one stands for:
+
+ 1. Profile the basic-block vectors (BBV) of the ROI on the atomic CPU:
+        simpoint_spec_checkpoints.py --mode profile   (in extra-tools/SPEC-se-checkpoints)
+ 2. Cluster the intervals and pick a representative (simpoint) per cluster:
+        python3 run-jobs/simpoints.py cluster 505.mcf_r
+ 3. Take a checkpoint at the start of the warmup of every simpoint:
+        simpoint_spec_checkpoints.py --mode checkpoint
+ 4. Simulate every simpoint: run_jobs*.py --simpoints, one run per simpoint in
+    <app>/simpoint_<cluster> (launch_se_from_ckpt.py --simpoint <cluster>)
+ 5. Merge the runs of every app with the weights: data-parsing/simpoint_parser.sh
+
+Everything of an app lives in $ckpt_path/simpoints/ckpt_<app>/: simpoint.bb.gz and
+profile.json from the profile, simpoints.json from the clustering and cpt_<cluster>/.
+
+The clustering follows SimPoint 3: the BBVs are normalized, randomly projected to 15
+dimensions and clustered with k-means for k up to --max_k. The chosen k is the smallest
+one whose BIC score reaches 90% of the range of scores seen.
+"""
+import os
+import sys
+import json
+import gzip
+import math
+import random
+import argparse
+
+SIMPOINTS_DIR_NAME = "simpoints"
+SIMPOINTS_FILE = "simpoints.json"
+
+# Dimensions of the random projection of the BBVs and k-means defaults, as in SimPoint 3
+PROJECTED_DIMENSIONS = 15
+DEFAULT_MAX_K = 30
+DEFAULT_INIT_SEEDS = 5
+BIC_THRESHOLD = 0.9
+MAX_ITERATIONS = 100
+
+# k is chosen on a sample of the intervals of long ROIs, the final clustering uses all of them
+DEFAULT_SAMPLE_SIZE = 2000
+
+# Detailed instructions simulated before every interval, so the caches and the TAGE tables
+# are warm when measuring, without doubling the detailed simulation of the interval
+DEFAULT_WARMUP_INSTS = 5000000
+
+
+def simpoint_dir(ckpt_dir):
+    """Simpoint folder of an app from its ROI checkpoint: <ckpt_path>/simpoints/ckpt_<app>"""
+    ckpt_dir = os.path.normpath(ckpt_dir)
+    return os.path.join(os.path.dirname(ckpt_dir), SIMPOINTS_DIR_NAME, os.path.basename(ckpt_dir))
+
+
+def simpoint_ckpt_dir(ckpt_dir, cluster):
+    """Checkpoint a simpoint run restores from, given the app's ROI checkpoint."""
+    return os.path.join(simpoint_dir(ckpt_dir), f"cpt_{cluster}")
+
+
+def load_simpoints(ckpt_dir):
+    """The simpoints.json of an app, or None if it was not clustered."""
+    path = os.path.join(simpoint_dir(ckpt_dir), SIMPOINTS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def expand_simpoints(points, settings):
+    """One point per simpoint of its app (point["simpoint"] = cluster), skipping apps without them."""
+    simpoints = {}
+    for point in points:
+        app = point["app"]
+        if app not in simpoints:
+            simpoints[app] = load_simpoints(settings["ckpt_dir_format"].format(app=app))
+            if simpoints[app] is None:
+                print(f"Warning: {app} has no {SIMPOINTS_FILE}, run simpoints.py cluster {app} first. Skipping it.")
+        for simpoint in (simpoints[app] or {}).get("simpoints", []):
+            yield dict(point, simpoint=simpoint["cluster"])
+
+
+def read_bbvs(path):
+    """Basic-block vectors of a simpoint.bb.gz, as {basic block: instructions} per interval."""
+    bbvs = []
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if not line.startswith("T"):
+                continue
+            bbv = {}
+            for field in line[1:].split():
+                _, block, count = field.split(":")
+                bbv[int(block)] = int(count)
+            bbvs.append(bbv)
+    return bbvs
+
+
+def project_bbvs(bbvs, dimensions, rng):
+    """Normalize every BBV and project it to `dimensions` with a random [-1, 1] matrix."""
+    projection = {}
+    points = []
+    for bbv in bbvs:
+        total = sum(bbv.values()) or 1
+        point = [0.0] * dimensions
+        for block in sorted(bbv):
+            if block not in projection:
+                projection[block] = [rng.uniform(-1.0, 1.0) for _ in range(dimensions)]
+            weight = bbv[block] / total
+            for d, r in enumerate(projection[block]):
+                point[d] += weight * r
+        points.append(point)
+    return points
+
+
+def squared_distance(a, b):
+    return sum((x - y) * (x - y) for x, y in zip(a, b))
+
+
+def nearest_center(point, centers):
+    """(index, squared distance) of the center closest to point."""
+    return min(((i, squared_distance(point, c)) for i, c in enumerate(centers)), key=lambda t: t[1])
+
+
+def kmeans_once(points, k, rng):
+    """Lloyd's k-means from a k-means++ seeding. Returns (centers, labels, sum of squared distances)."""
+    centers = [list(rng.choice(points))]
+    distances = [squared_distance(p, centers[0]) for p in points]
+    while len(centers) < k:
+        total = sum(distances)
+        if total == 0:
+            break
+        target = rng.random() * total
+        for point, distance in zip(points, distances):
+            target -= distance
+            if target <= 0:
+                break
+        centers.append(list(point))
+        distances = [min(d, squared_distance(p, point)) for p, d in zip(points, distances)]
+
+    labels = None
+    for _ in range(MAX_ITERATIONS):
+        nearest = [nearest_center(p, centers) for p in points]
+        new_labels = [i for i, _ in nearest]
+        if new_labels == labels:
+            break
+        labels = new_labels
+        sums = [[0.0] * len(points[0]) for _ in centers]
+        counts = [0] * len(centers)
+        for point, label in zip(points, labels):
+            counts[label] += 1
+            for d, x in enumerate(point):
+                sums[label][d] += x
+        # Empty clusters keep their center
+        centers = [[s / counts[i] for s in sums[i]] if counts[i] else centers[i] for i in range(len(centers))]
+    return centers, labels, sum(d for _, d in nearest)
+
+
+def kmeans(points, k, init_seeds, rng):
+    """Best (lowest distortion) of init_seeds k-means runs."""
+    return min((kmeans_once(points, k, rng) for _ in range(init_seeds)), key=lambda result: result[2])
+
+
+def bic_score(points, centers, labels, distortion):
+    """BIC of the clustering as a mixture of spherical Gaussians (X-means, used by SimPoint)."""
+    n, k, dimensions = len(points), len(centers), len(points[0])
+    if n <= k:
+        return float("-inf")
+    variance = max(distortion / (n - k), 1e-12)
+    likelihood = 0.0
+    for size in (labels.count(i) for i in range(k)):
+        if size:
+            likelihood += (size * math.log(size / n)
+                           - size / 2 * math.log(2 * math.pi)
+                           - size * dimensions / 2 * math.log(variance)
+                           - (size - k) / 2)
+    parameters = (k - 1) + k * dimensions + 1
+    return likelihood - parameters / 2 * math.log(n)
+
+
+def choose_k(points, max_k, init_seeds, rng):
+    """Smallest k whose BIC reaches BIC_THRESHOLD of the range, by binary search as SimPoint does."""
+    scores = {}
+
+    def score(k):
+        if k not in scores:
+            scores[k] = bic_score(points, *kmeans(points, k, init_seeds, rng))
+            print(f"  k = {k:3d}  BIC = {scores[k]:.1f}")
+        return scores[k]
+
+    max_k = min(max_k, len(points))
+    low, high = 1, max_k
+    score(low)
+    score(high)
+    threshold = min(scores.values()) + BIC_THRESHOLD * (max(scores.values()) - min(scores.values()))
+    while low < high:
+        middle = (low + high) // 2
+        if score(middle) >= threshold:
+            high = middle
+        else:
+            low = middle + 1
+        threshold = min(scores.values()) + BIC_THRESHOLD * (max(scores.values()) - min(scores.values()))
+    return high, scores
+
+
+def cluster_simpoints(bbvs, interval, warmup_insts, max_k, init_seeds, sample_size, seed):
+    """The simpoints.json of an app: one simpoint per non-empty cluster, heaviest first."""
+    rng = random.Random(seed)
+    points = project_bbvs(bbvs, PROJECTED_DIMENSIONS, rng)
+
+    sample = points if len(points) <= sample_size else rng.sample(points, sample_size)
+    print(f"Choosing k on {len(sample)} of {len(points)} intervals")
+    k, scores = choose_k(sample, max_k, init_seeds, rng)
+    centers, labels, _ = kmeans(points, k, init_seeds, rng)
+
+    simpoints = []
+    for cluster, center in enumerate(centers):
+        members = [i for i, label in enumerate(labels) if label == cluster]
+        if not members:
+            continue
+        # The representative is the interval closest to the centroid of its cluster
+        index = min(members, key=lambda i: squared_distance(points[i], center))
+        start = max(index * interval - warmup_insts, 0)
+        simpoints.append({
+            "cluster": cluster,
+            "interval_index": index,
+            "weight": len(members) / len(points),
+            "start_insts": start,
+            "warmup_insts": index * interval - start,
+        })
+    simpoints.sort(key=lambda simpoint: simpoint["weight"], reverse=True)
+    return {
+        "interval": interval,
+        "warmup_insts": warmup_insts,
+        "num_intervals": len(points),
+        "k": k,
+        "seed": seed,
+        "bic": {str(k): s for k, s in sorted(scores.items())},
+        "simpoints": simpoints,
+    }
+
+
+def cluster_command(args):
+    # Imported here because sweep_submit imports this module
+    from sweep_submit import load_repo_env
+    load_repo_env()
+    ckpt_dir = os.path.join(os.getenv("ckpt_path"), f"ckpt_{args.app}")
+    app_dir = simpoint_dir(ckpt_dir)
+    bbv_path = args.bbv or os.path.join(app_dir, "simpoint.bb.gz")
+    profile_path = os.path.join(app_dir, "profile.json")
+
+    interval = args.interval
+    if interval is None and os.path.exists(profile_path):
+        with open(profile_path, "r") as f:
+            interval = json.load(f)["interval"]
+    if interval is None:
+        print(f"Error: no {profile_path}, give the --interval of the profile")
+        sys.exit(1)
+    if not os.path.exists(bbv_path):
+        print(f"Error: {bbv_path} not found, profile {args.app} with simpoint_spec_checkpoints.py --mode profile first")
+        sys.exit(1)
+
+    bbvs = read_bbvs(bbv_path)
+    print(f"Read {len(bbvs)} basic-block vectors of {interval} instructions from {bbv_path}")
+    result = cluster_simpoints(bbvs, interval, args.warmup_insts, args.max_k, args.init_seeds, args.sample_size, args.seed)
+
+    print(f"\n{len(result['simpoints'])} simpoints (k = {result['k']}):")
+    for simpoint in result["simpoints"]:
+        print(f"  cluster {simpoint['cluster']:3d}  interval {simpoint['interval_index']:6d}  "
+              f"weight {simpoint['weight']:.4f}  warmup {simpoint['warmup_insts']}")
+    detailed = sum(s["warmup_insts"] for s in result["simpoints"]) + len(result["simpoints"]) * interval
+    print(f"Detailed instructions: {detailed} instead of {len(bbvs) * interval} "
+          f"({100.0 * detailed / (len(bbvs) * interval):.1f}% of the ROI)")
+
+    output_path = os.path.join(app_dir, SIMPOINTS_FILE)
+    with open(output_path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Written to {output_path}, take their checkpoints with simpoint_spec_checkpoints.py --mode checkpoint")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SimPoint clustering of the basic-block vectors of a SPEC17 app")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    cluster = subparsers.add_parser("cluster", help="Choose the simpoints of an app from its BBV profile")
+    cluster.add_argument("app", help="App as in the checkpoint folder names (e.g. 505.mcf_r)")
+    cluster.add_argument("--bbv", default=None, help="BBV profile (default: simpoint.bb.gz in the app's simpoint folder)")
+    cluster.add_argument("--interval", type=int, default=None,
+                         help="Instructions per BBV (default: the interval of the profile.json)")
+    cluster.add_argument("--warmup_insts", type=int, default=DEFAULT_WARMUP_INSTS,
+                         help=f"Detailed warmup before every simpoint (default: {DEFAULT_WARMUP_INSTS})")
+    cluster.add_argument("--max_k", type=int, default=DEFAULT_MAX_K,
+                         help=f"Maximum number of clusters (default: {DEFAULT_MAX_K})")
+    cluster.add_argument("--init_seeds", type=int, default=DEFAULT_INIT_SEEDS,
+                         help=f"k-means runs per k, the best one is kept (default: {DEFAULT_INIT_SEEDS})")
+    cluster.add_argument("--sample_size", type=int, default=DEFAULT_SAMPLE_SIZE,
+                         help=f"Intervals k is chosen on (default: {DEFAULT_SAMPLE_SIZE})")
+    cluster.add_argument("--seed", type=int, default=0, help="Seed of the projection and k-means (default: 0)")
+
+    args = parser.parse_args()
+    if args.command == "cluster":
+        cluster_command(args)
+
+
+if __name__ == "__main__":
+    main()
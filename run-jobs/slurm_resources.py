@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Conversions between Slurm memory/time strings and numbers."""
+
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_mem_size(mem_size):
+    """Convert a Slurm memory size ("5G", "512M", "4096") to bytes. Plain numbers are MiB, like Slurm."""
+    mem_size = str(mem_size).strip().upper()
+    if mem_size[-1] in SIZE_UNITS:
+        return int(float(mem_size[:-1]) * SIZE_UNITS[mem_size[-1]])
+    return int(float(mem_size) * SIZE_UNITS["M"])
+
+
+def format_mem_size(num_bytes):
+    """Convert bytes to a Slurm memory size, in G when it is a whole number of GiB, else in M."""
+    mib = -(-int(num_bytes) // SIZE_UNITS["M"])
+    if mib % 1024 == 0:
+        return f"{mib // 1024}G"
+    return f"{mib}M"
+
+
+def parse_slurm_time(slurm_time):
+    """
+    Convert a Slurm time ("MM", "MM:SS", "HH:MM:SS", "D-HH", "D-HH:MM", "D-HH:MM:SS")
+    to seconds. Returns None for "UNLIMITED", "Partition_Limit" and other non-times.
+    """
+    if not slurm_time:
+        return None
+    slurm_time = str(slurm_time).strip()
+    days = 0
+    if "-" in slurm_time:
+        day_part, slurm_time = slurm_time.split("-", 1)
+        if not day_part.isdigit():
+            return None
+        days = int(day_part)
+        # With days, the fields are hours[:minutes[:seconds]]
+        fields = slurm_time.split(":") + ["0"] * (3 - len(slurm_time.split(":")))
+        hours, minutes, seconds = fields
+    else:
+        fields = slurm_time.split(":")
+        if len(fields) == 1:
+            hours, minutes, seconds = "0", fields[0], "0"
+        elif len(fields) == 2:
+            hours, minutes, seconds = "0", fields[0], fields[1]
+        else:
+            hours, minutes, seconds = fields[:3]
+    try:
+        return ((days * 24 + int(hours)) * 60 + int(minutes)) * 60 + int(float(seconds))
+    except ValueError:
+        return None
+
+
+def format_slurm_time(seconds):
+    """Convert seconds to a Slurm time "D-HH:MM:SS" (rounded up to whole minutes)."""
+    minutes = -(-int(seconds) // 60)
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{days}-{hours:02d}:{minutes:02d}:00"
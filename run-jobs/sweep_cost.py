@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Cost estimates of a sweep before submitting it (--dry_run): number of jobs, core-hours,
+memory and makespan on a given number of cluster slots.
+
+Run times come from the resource history of the ledger (see resource_history.py). Points
+without history are estimated from the runs of the same app with other configs,
+and apps never run at all from the number of WORKEND events the launchers wait for.
+"""
+import heapq
+
+from resource_history import history_usage
+from slurm_resources import parse_mem_size
+
+# WORKEND events launch_se_from_ckpt.py / launch_fs_from_ckpt.py wait for before exiting
+SPEC17_TOTAL_WORKS = {520: 10, 531: 10, 557: 10, 526: 240}
+
+# Time of one WORKEND when there is no history at all
+DEFAULT_SECONDS_PER_WORK = 3600
+
+
+def total_works(app):
+    """WORKEND events of an app ("526.blender_r" -> 240)."""
+    try:
+        return SPEC17_TOTAL_WORKS.get(int(app[:3]), 1)
+    except ValueError:
+        return 1
+
+
+class RuntimeEstimator:
+    """Expected run time of a point, from the most specific history available."""
+
+    def __init__(self, history):
+        self.history = history
+        self.by_app = {}
+        per_work = []
+        for (_, app, _), runs in history.items():
+            for max_rss, elapsed in runs.values():
+                self.by_app.setdefault(app, []).append(elapsed)
+                per_work.append(elapsed / total_works(app))
+        per_work.sort()
+        # The median is robust to the odd config that is much slower than the rest
+        self.seconds_per_work = per_work[len(per_work) // 2] if per_work else DEFAULT_SECONDS_PER_WORK
+
+    def estimate(self, params):
+        """
+        Expected run time of a run from its run_parameters(). Returns (seconds, source),
+        source being "history", "app" or "works".
+        """
+        usage = history_usage(self.history, params)
+        if usage is not None:
+            return usage[1], "history"
+        app_times = self.by_app.get(params["app"])
+        if app_times:
+            return sum(app_times) / len(app_times), "app"
+        return self.seconds_per_work * total_works(params["app"]), "works"
+
+
+def list_schedule_makespan(durations, slots):
+    """Makespan of running durations in order, each one starting as soon as a slot is free."""
+    finish_times = [0.0] * min(slots, len(durations))
+    heapq.heapify(finish_times)
+    for duration in durations:
+        heapq.heapreplace(finish_times, finish_times[0] + duration)
+    return max(finish_times) if finish_times else 0.0
+
+
+def format_hours(seconds):
+    return f"{seconds / 3600:.1f} h"
+
+
+def print_cost_estimate(runs, estimator, slots):
+    """
+    Print the cost of a list of (run_parameters(), run_settings) in the order they would be
+    submitted, with the makespan of that order on `slots` single-core slots.
+    """
+    if not runs:
+        print("Dry run: nothing to submit")
+        return
+
+    durations = []
+    sources = {"history": 0, "app": 0, "works": 0}
+    mem_requests = []
+    for params, run_settings in runs:
+        seconds, source = estimator.estimate(params)
+        durations.append(seconds)
+        sources[source] += 1
+        mem_requests.append(parse_mem_size(run_settings["slurm_mem_size"]))
+
+    total_seconds = sum(durations)
+    mem_requests.sort(reverse=True)
+    lower_bound = max(total_seconds / slots, max(durations))
+
+    print(f"\n{'='*60}")
+    print(f"Dry run: {len(runs)} jobs, nothing submitted")
+    print(f"{'='*60}")
+    print(f"Estimated from: {sources['history']} same config/app/bp family runs, {sources['app']} same app runs, "
+          f"{sources['works']} WORKEND counts")
+    print(f"Core-hours:     {total_seconds / 3600:.1f} (longest run {format_hours(max(durations))})")
+    print(f"Memory:         {mem_requests[-1] / 1024**3:.1f}-{mem_requests[0] / 1024**3:.1f} GiB per run, "
+          f"{sum(mem_requests[:slots]) / 1024**3:.1f} GiB with {slots} runs at once")
+    print(f"Makespan:       {format_hours(list_schedule_makespan(durations, slots))} on {slots} slots "
+          f"(lower bound {format_hours(lower_bound)})")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Declarative sweep engine shared by the run_jobs*.py submitters.
+
+A sweep spec is a dict (usually loaded from a TOML file in run-jobs/sweeps/) with:
+
+    [sweep]        name (used in the job ledger) and output_subdir: folder inside
+                   1-output-jobs where the runs are stored
+    [fixed]        scalar values copied into every point (e.g. config = "BaseCPU")
+    [[axes]]       name + values. Values that are tables are processor parameters merged
+                   into the point's "extra_params", scalar values are stored as point[name]
+    [[constraints]] axis + on + allowed: indices of `axis` allowed for each index of `on`
+    [naming]       dir / job format strings and per-parameter aliases
+
+Axes are nested in the order they are declared (first axis is the outermost loop) and
+points are yielded lazily, so big sweeps never need to be materialized.
+"""
+import os
+import string
+
+import tomllib
+
+
+def load_sweep_spec(path):
+    """Load a sweep spec from a TOML file (or YAML if PyYAML is available)."""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"PyYAML is needed to read {path}, use a .toml sweep spec instead")
+        with open(path, "r") as f:
+            spec = yaml.safe_load(f)
+    else:
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    return normalize_sweep_spec(spec)
+
+
+def normalize_sweep_spec(spec):
+    """Fill in defaults and convert the constraint maps to integer indices."""
+    spec = dict(spec)
+    spec.setdefault("sweep", {})
+    spec["sweep"].setdefault("output_subdir", "")
+    spec["sweep"].setdefault("name", spec["sweep"]["output_subdir"] or "default")
+    spec.setdefault("fixed", {})
+    spec.setdefault("axes", [])
+    spec.setdefault("constraints", [])
+    spec.setdefault("naming", {})
+
+    axis_names = [axis["name"] for axis in spec["axes"]]
+    if len(set(axis_names)) != len(axis_names):
+        raise ValueError(f"Duplicated axis names in sweep spec: {axis_names}")
+
+    constraints = []
+    for constraint in spec["constraints"]:
+        for key in ("axis", "on"):
+            if constraint[key] not in axis_names:
+                raise ValueError(f"Constraint refers to unknown axis '{constraint[key]}'")
+        if axis_names.index(constraint["on"]) >= axis_names.index(constraint["axis"]):
+            raise ValueError(
+                f"Constraint axis '{constraint['axis']}' must be declared after '{constraint['on']}'"
+            )
+        # TOML keys are always strings, the engine works with indices
+        allowed = {int(k): [int(i) for i in v] for k, v in constraint["allowed"].items()}
+        constraints.append({"axis": constraint["axis"], "on": constraint["on"], "allowed": allowed})
+    spec["constraints"] = constraints
+    return spec
+
+
+def add_axis(spec, name, values):
+    """Return a copy of spec with an extra innermost axis (e.g. bp or app)."""
+    spec = dict(spec)
+    spec["axes"] = list(spec["axes"]) + [{"name": name, "values": list(values)}]
+    return spec
+
+
+def _compile_axes(spec):
+    """Precompute, for every axis, the constraints that restrict it."""
+    axis_names = [axis["name"] for axis in spec["axes"]]
+    compiled = []
+    for position, axis in enumerate(spec["axes"]):
+        restrictions = [
+            (axis_names.index(c["on"]), c["allowed"])
+            for c in spec["constraints"] if c["axis"] == axis["name"]
+        ]
+        compiled.append((axis["name"], axis["values"], restrictions))
+    return compiled
+
+
+def _allowed_indices(values, restrictions, chosen):
+    """Indices of an axis compatible with the indices already chosen for the outer axes."""
+    if not restrictions:
+        return range(len(values))
+    allowed = None
+    for on_position, allowed_map in restrictions:
+        indices = allowed_map.get(chosen[on_position], [])
+        allowed = indices if allowed is None else [i for i in allowed if i in indices]
+    return allowed
+
+
+def iter_sweep_indices(spec):
+    """Yield the index tuple of every valid point of the sweep, outermost axis first."""
+    compiled = _compile_axes(spec)
+    depth = len(compiled)
+    if depth == 0:
+        return
+    chosen = [0] * depth
+    # Explicit stack of iterators instead of nested loops, one per axis
+    stack = [iter(_allowed_indices(compiled[0][1], compiled[0][2], chosen))]
+    while stack:
+        level = len(stack) - 1
+        index = next(stack[-1], None)
+        if index is None:
+            stack.pop()
+            continue
+        chosen[level] = index
+        if level == depth - 1:
+            yield tuple(chosen)
+        else:
+            _, values, restrictions = compiled[level + 1]
+            stack.append(iter(_allowed_indices(values, restrictions, chosen)))
+
+
+def count_sweep_points(spec):
+    """Number of points of a sweep, without building them."""
+    return sum(1 for _ in iter_sweep_indices(spec))
+
+
+class _AliasFormatter(string.Formatter):
+    """str.format that replaces values by their alias from the [naming.aliases] table."""
+
+    def __init__(self, aliases):
+        super().__init__()
+        self.aliases = aliases
+
+    def get_value(self, key, args, kwargs):
+        value = kwargs[key]
+        return self.aliases.get(key, {}).get(str(value), value)
+
+
+def format_point_name(spec, point, key="dir"):
+    """Format the naming rule `key` ("dir" or "job") of a spec for a point."""
+    naming = spec["naming"]
+    fmt = naming.get(key)
+    if fmt is None:
+        return None
+    fields = {**point["extra_params"], **{k: v for k, v in point.items() if k != "extra_params"}}
+    try:
+        return _AliasFormatter(naming.get("aliases", {})).format(fmt, **fields)
+    except KeyError as e:
+        raise ValueError(f"Naming rule '{fmt}' uses {e}, which is not an axis or parameter of the sweep")
+
+
+def _naming_axes(spec, key):
+    """Positions of the axes whose values appear in the naming rule `key`."""
+    fmt = spec["naming"].get(key)
+    if fmt is None:
+        return ()
+    fields = {name for _, name, _, _ in string.Formatter().parse(fmt) if name}
+    positions = []
+    for position, axis in enumerate(spec["axes"]):
+        for value in axis["values"]:
+            keys = value.keys() if isinstance(value, dict) else (axis["name"],)
+            if fields.intersection(keys):
+                positions.append(position)
+                break
+    return tuple(positions)
+
+
+def iter_sweep_points(spec):
+    """
+    Yield every point of the sweep as a dict with the scalar axes and fixed values as
+    keys, the merged parameter tables under "extra_params" and the formatted "name".
+    The job name is left to the submitter, since it usually depends on the app axis.
+    """
+    axes = spec["axes"]
+    fixed = spec["fixed"]
+    param_axes = [i for i, axis in enumerate(axes) if any(isinstance(v, dict) for v in axis["values"])]
+    scalar_axes = [(i, axis["name"]) for i, axis in enumerate(axes) if i not in param_axes]
+    name_axes = _naming_axes(spec, "dir")
+    # Points that share the parameter axes share their merged extra_params, and
+    # points that share the axes used by the naming rule share their name
+    params_cache = {}
+    name_cache = {}
+    for indices in iter_sweep_indices(spec):
+        params_key = tuple(indices[i] for i in param_axes)
+        if params_key not in params_cache:
+            merged = {}
+            for i in param_axes:
+                merged.update(axes[i]["values"][indices[i]])
+            params_cache[params_key] = merged
+        point = dict(fixed)
+        for i, name in scalar_axes:
+            point[name] = axes[i]["values"][indices[i]]
+        point["extra_params"] = dict(params_cache[params_key])
+        name_key = tuple(indices[i] for i in name_axes)
+        if name_key not in name_cache:
+            name_cache[name_key] = format_point_name(spec, point, "dir")
+        point["name"] = name_cache[name_key]
+        yield point
+
+
+def default_sweeps_dir():
+    """Directory that holds the sweep specs shipped with the repo."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "sweeps")
@@ -0,0 +1,993 @@
+#!/usr/bin/env python3
+"""
+Submission plumbing shared by run_jobs.py, run_jobs_config_experiments.py and
+run_jobs_delays_experiments.py. Each submitter builds a sweep spec (see sweep_engine.py)
+and hands it to submit_sweep(), which turns every point into a gem5 run.
+"""
+import subprocess
+import os
+import time
+import shlex
+
+from run_outputs import run_is_complete, run_stopped_early, run_host_seconds, print_resume_summary, COMPRESSED_OUTPUTS
+from local_executor import run_local
+from job_ledger import record_jobs, default_ledger_path
+from partitions import (
+    select_partitions, spread_jobs, print_spread, append_submission_log, split_list,
+    DEFAULT_PARTITION, DEFAULT_EXCLUDE_NODES,
+)
+from result_store import result_key, find_result, claim_result, link_result
+from resource_history import load_usage_history, sized_settings, widest_settings
+from sweep_cost import RuntimeEstimator, print_cost_estimate
+from sweep_engine import add_axis, iter_sweep_points, format_point_name
+from simpoints import expand_simpoints, simpoint_ckpt_dir
+
+# Every point simulates up to this many ticks (or the app's WORKEND events)
+DEFAULT_NUM_TICKS = 100000000000
+
+# Ticks of a --canary run: enough to build the system, restore the checkpoint and run a bit
+CANARY_NUM_TICKS = 100000000
+
+# Seconds the sweep waits for its canary arrays (queue time included) before cancelling them
+CANARY_TIMEOUT = 2 * 3600
+
+# Slurm's default MaxArraySize, used when scontrol can't tell: the tasks of an array are
+# numbered from 0 to MaxArraySize - 1
+DEFAULT_MAX_ARRAY_SIZE = 1001
+
+# Node-local directory used with --scratch (Slurm usually points TMPDIR to a per-job one)
+SCRATCH_ROOT = "${TMPDIR:-/scratch}"
+
+# Node-local checkpoint cache used with --ckpt_cache, shared by the jobs of a user on a node
+DEFAULT_CKPT_CACHE_DIR = "/tmp/gem5_ckpt_cache_$USER"
+CKPT_CACHE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ckpt_cache.py")
+
+
+def load_env_file(env_path):
+    """Load environment variables from a .env file."""
+    env_vars = {}
+    if not os.path.exists(env_path):
+        return env_vars
+
+    with open(env_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            # Skip empty lines and comments
+            if not line or line.startswith('#'):
+                continue
+            # Parse key=value pairs
+            if '=' in line:
+                key, value = line.split('=', 1)
+                # Remove quotes if present
+                value = value.strip('"').strip("'")
+                env_vars[key] = value
+    return env_vars
+
+
+def load_repo_env():
+    """Load the .env file at the root of the repo without overriding the current environment."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    env_path = os.path.join(os.path.dirname(script_dir), ".env")
+    for key, value in load_env_file(env_path).items():
+        os.environ.setdefault(key, value)
+
+
+def get_applications_by_benchmark(ckpt_base_dir):
+    """Discover applications by reading checkpoint directories."""
+    if not os.path.exists(ckpt_base_dir):
+        print(f"Warning: Checkpoint path does not exist: {ckpt_base_dir}")
+        return []
+
+    apps = []
+    for item in os.listdir(ckpt_base_dir):
+        if item.startswith("ckpt_"):
+            app_name = item.replace("ckpt_", "")
+            apps.append(app_name)
+
+    return sorted(apps)
+
+
+def create_directory(path, clean_if_exists=False):
+    """Create a directory, optionally cleaning it if it already exists."""
+    if clean_if_exists and os.path.exists(path):
+        import shutil
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def launcher_arguments(point, settings):
+    """(flag, value) pairs passed to launch_se_from_ckpt.py / launch_fs_from_ckpt.py for a point."""
+    arguments = [
+        ("--spec_number", point["app"][:3]),
+        ("--config", point["config"]),
+        ("--bp", point["bp"]),
+        ("--mem_size", settings["mem_size"]),
+        ("--num_ticks", settings.get("num_ticks", DEFAULT_NUM_TICKS)),
+    ]
+    # Only the BaseCPU accepts extra params, the named configs are used as they are
+    if point["extra_params"]:
+        arguments.append(("--extra_params", str(point["extra_params"])))
+    if point.get("simpoint") is not None:
+        arguments.append(("--simpoint", point["simpoint"]))
+    if settings.get("stats_interval"):
+        arguments.append(("--stats_interval", settings["stats_interval"]))
+        arguments.append(("--stats_interval_unit", settings.get("stats_interval_unit") or "ticks"))
+    if settings.get("fast_forward_insts"):
+        arguments.append(("--fast_forward_insts", settings["fast_forward_insts"]))
+    if settings.get("warmup_insts"):
+        arguments.append(("--warmup_insts", settings["warmup_insts"]))
+    if settings.get("max_insts"):
+        arguments.append(("--max_insts", settings["max_insts"]))
+    return arguments
+
+
+def run_parameters(point, settings):
+    """Fully resolved parameters of a run, as stored in the job ledger."""
+    return {
+        "config": point["config"],
+        "bp": point["bp"],
+        "app": point["app"],
+        "extra_params": point["extra_params"],
+        "simpoint": point.get("simpoint"),
+        "mem_size": settings["mem_size"],
+        "num_ticks": settings.get("num_ticks", DEFAULT_NUM_TICKS),
+        "stats_interval": settings.get("stats_interval"),
+        "stats_interval_unit": settings.get("stats_interval_unit"),
+        "fast_forward_insts": settings.get("fast_forward_insts"),
+        "warmup_insts": settings.get("warmup_insts"),
+        "max_insts": settings.get("max_insts"),
+        "slurm_mem_size": settings["slurm_mem_size"],
+        "slurm_time": settings.get("slurm_time"),
+        "pack_size": settings.get("pack_size", 1),
+        "partition": settings.get("partition"),
+        "exclude_nodes": settings.get("exclude_nodes", DEFAULT_EXCLUDE_NODES),
+        "compress": settings.get("compress", False),
+        "scratch": settings.get("scratch", False),
+        "ckpt_dir_format": settings.get("ckpt_dir_format"),
+        "ckpt_cache": settings.get("ckpt_cache"),
+        "ckpt_cache_size": settings.get("ckpt_cache_size"),
+        "benchmark": settings["benchmark"],
+        "gem5_binary": settings["gem5_binary"],
+        "config_script": settings["config_script"],
+        "spec_dir": settings["spec_dir"],
+    }
+
+
+def point_and_settings_from_parameters(name, params):
+    """Inverse of run_parameters(): rebuild the point and settings of a recorded run."""
+    point = {
+        "name": name, "config": params["config"], "bp": params["bp"],
+        "app": params["app"], "extra_params": params["extra_params"],
+        "simpoint": params.get("simpoint"),
+    }
+    settings = {key: params.get(key) for key in (
+        "benchmark", "gem5_binary", "config_script", "spec_dir",
+        "mem_size", "num_ticks", "stats_interval", "stats_interval_unit", "fast_forward_insts", "warmup_insts", "max_insts", "slurm_mem_size", "slurm_time", "compress", "scratch",
+        "ckpt_dir_format", "ckpt_cache", "ckpt_cache_size", "partition",
+    )}
+    # Runs recorded before --exclude_nodes avoided the default nodes
+    settings["exclude_nodes"] = params.get("exclude_nodes", DEFAULT_EXCLUDE_NODES)
+    return point, settings
+
+
+def sbatch_partition_lines(settings):
+    """#SBATCH lines with the partition of the job and the nodes it must avoid."""
+    lines = f"#SBATCH --partition={settings.get('partition') or DEFAULT_PARTITION}"
+    exclude_nodes = settings.get("exclude_nodes", DEFAULT_EXCLUDE_NODES)
+    if exclude_nodes:
+        lines += f"\n#SBATCH --exclude={exclude_nodes}"
+    return lines
+
+
+def sbatch_resource_lines(settings):
+    """#SBATCH lines with the memory (and walltime, when known) requested for each run."""
+    lines = f"#SBATCH --mem-per-cpu={settings['slurm_mem_size']}"
+    if settings.get("slurm_time"):
+        lines += f"\n#SBATCH --time={settings['slurm_time']}"
+    return lines
+
+
+def compress_outputs_command(output_dir, indent=""):
+    """Bash loop that zstd-compresses the text outputs of a run (output_dir can be a bash variable)."""
+    return (
+        f"{indent}for f in {' '.join(COMPRESSED_OUTPUTS)}; do\n"
+        f'{indent}    if [ -f "{output_dir}/$f" ]; then\n'
+        f'{indent}        zstd -q --rm -f "{output_dir}/$f"\n'
+        f"{indent}    fi\n"
+        f"{indent}done\n"
+    )
+
+
+def compress_outputs_lines(settings, output_dir):
+    """End of a single-run script: compress the outputs and keep gem5's exit code (if --compress)."""
+    # With --scratch the outputs are compressed by the trap, once they are copied back
+    if not settings.get("compress") or settings.get("scratch"):
+        return ""
+    return (
+        "\n# Compress the text outputs once gem5 exits, the parsers read the .zst files\n"
+        "exit_code=$?\n"
+        f"{compress_outputs_command(output_dir)}"
+        "exit $exit_code\n"
+    )
+
+
+def scratch_lines(settings, output_dir):
+    """
+    With --scratch, gem5 writes to a node-local directory ($scratch_dir) that a trap copies
+    back to output_dir when the script exits, also when gem5 fails or Slurm kills the job.
+    """
+    if not settings.get("scratch"):
+        return ""
+    compress = compress_outputs_command(output_dir, "    ") if settings.get("compress") else ""
+    return f"""
+# gem5 writes to node-local scratch instead of NFS, the trap copies it back when the job ends
+scratch_dir=$(mktemp -d "{SCRATCH_ROOT}/gem5_XXXXXX")
+finish() {{
+    exit_code=$?
+    cp -a "$scratch_dir"/. "{output_dir}"/
+    rm -rf "$scratch_dir"
+{compress}    exit $exit_code
+}}
+trap finish EXIT
+# Slurm sends TERM on timeouts and scancel, exiting runs the EXIT trap
+trap 'exit 143' TERM
+"""
+
+
+def pack_scratch_lines(settings):
+    """--scratch for packs: one scratch directory per run, copied back as soon as the run ends."""
+    if not settings.get("scratch"):
+        return ""
+    return f"""
+# gem5 writes to node-local scratch instead of NFS. Each run is copied back when it ends,
+# and the trap copies back whatever is left if the job fails or is killed
+scratch_root=$(mktemp -d "{SCRATCH_ROOT}/gem5_XXXXXX")
+copy_back() {{
+    if [ -d "$scratch_root/$1" ]; then
+        cp -a "$scratch_root/$1"/. "${{output_dirs[$1]}}"/
+        rm -rf "$scratch_root/$1"
+    fi
+}}
+finish() {{
+    exit_code=$?
+    for i in "${{!output_dirs[@]}}"; do
+        copy_back $i
+    done
+    rm -rf "$scratch_root"
+    exit $exit_code
+}}
+trap finish EXIT
+trap 'exit 143' TERM
+"""
+
+
+def ckpt_cache_lines(settings, app, ckpt_var="ckpt_dir"):
+    """
+    With --ckpt_cache, stage the app's checkpoint in the node-local cache (see ckpt_cache.py)
+    and keep a shared lock on it until the job ends. The launcher gets --ckpt_dir "$ckpt_var".
+    """
+    if not settings.get("ckpt_cache"):
+        return ""
+    ckpt_dir = settings["ckpt_dir_format"].format(app=app)
+    cache_dir = settings["ckpt_cache"]
+    return f"""
+# Restore from a node-local copy of the checkpoint, shared with the other jobs of the node
+{ckpt_var}=$(python3 {CKPT_CACHE_SCRIPT} {ckpt_dir} --cache_dir "{cache_dir}" --max_size {settings["ckpt_cache_size"]})
+if [[ "${ckpt_var}" == "{cache_dir}"/* ]]; then
+    # Held until the job ends so the copy is not evicted while gem5 uses it
+    exec {{lock_{ckpt_var}}}>"${ckpt_var}.lock" && flock -s $lock_{ckpt_var}
+fi
+"""
+
+
+def ckpt_dir_argument(settings, ckpt_var="ckpt_dir"):
+    """Launcher argument that restores from the staged checkpoint (with --ckpt_cache)."""
+    return f' --ckpt_dir "${ckpt_var}"' if settings.get("ckpt_cache") else ""
+
+
+def point_ckpt_dir(point, settings):
+    """Checkpoint a point restores from: the app's one, or its simpoint's one (see simpoints.py)."""
+    ckpt_dir = settings["ckpt_dir_format"].format(app=point["app"])
+    if point.get("simpoint") is not None:
+        return simpoint_ckpt_dir(ckpt_dir, point["simpoint"])
+    return ckpt_dir
+
+
+def point_result_key(point, settings):
+    """Result store key of a point (see result_store.py), or None if its inputs can't be read."""
+    try:
+        return result_key(run_parameters(point, settings), point_ckpt_dir(point, settings))
+    except OSError as e:
+        print(f"Warning: not looking up {point['name']}/{point['bp']}/{point['app']} in the result store: {e}")
+        return None
+
+
+def point_output_dir(point, spec, settings):
+    """
+    Output directory of a point: <base>/<output_subdir>/<name>/<bp>/<benchmark>/<app>,
+    and simpoint_<cluster> inside it for the runs of --simpoints
+    """
+    output_dir = os.path.join(
+        settings["base_output_dir"], spec["sweep"]["output_subdir"],
+        point["name"], point["bp"], settings["benchmark"], point["app"]
+    )
+    if point.get("simpoint") is not None:
+        output_dir = os.path.join(output_dir, f"simpoint_{point['simpoint']}")
+    return output_dir
+
+#SBATCH --nodelist=ce209
+def generate_sbatch_script(point, output_dir, job_name, settings):
+    """Generate an sbatch script for running simulation."""
+
+    # We wrap extra_params in quotes to handle spaces/brackets in bash
+    arguments = " \\\n    ".join(
+        f'{flag} "{value}"' if flag == "--extra_params" else f"{flag} {value}"
+        for flag, value in launcher_arguments(point, settings)
+    )
+    if settings.get("ckpt_cache"):
+        arguments += f" \\\n   {ckpt_dir_argument(settings)}"
+    gem5_outdir = "$scratch_dir" if settings.get("scratch") else output_dir
+    sbatch_content = f"""#!/bin/bash
+{sbatch_partition_lines(settings)}
+{sbatch_resource_lines(settings)}
+#SBATCH --job-name={job_name}
+#SBATCH --output={output_dir}/slurm.out
+#SBATCH --error={output_dir}/slurm.err
+
+cd {settings["spec_dir"]}/{point["app"]}
+{scratch_lines(settings, output_dir)}{ckpt_cache_lines(settings, point["app"])}
+{settings["gem5_binary"]}  -re --outdir={gem5_outdir} {settings["config_script"]} \\
+    {arguments}
+{compress_outputs_lines(settings, output_dir)}"""
+
+    script_path = os.path.join(output_dir, "run.sbatch")
+    with open(script_path, "w") as f:
+        f.write(sbatch_content)
+
+    return script_path
+
+
+def write_array_manifest(array_dir, runs, settings):
+    """Write the task parameters of a job array, one tab-separated row per task."""
+    manifest_path = os.path.join(array_dir, "tasks.tsv")
+    with open(manifest_path, "w") as f:
+        f.write("app\toutput_dir\tlauncher_args\n")
+        for point, output_dir, job_name, run_settings in runs:
+            launcher_args = shlex.join(
+                str(x) for pair in launcher_arguments(point, settings) for x in pair
+            )
+            f.write(f"{point['app']}\t{output_dir}\t{launcher_args}\n")
+
+    return manifest_path
+
+
+def generate_array_sbatch_script(manifest_path, num_tasks, array_dir, settings):
+    """Generate a single sbatch job array script where each task reads its row of the manifest."""
+
+    # Row 1 of the manifest is the header, so task N reads row N + 2
+    gem5_outdir = "$scratch_dir" if settings.get("scratch") else "$output_dir"
+    sbatch_content = f"""#!/bin/bash
+{sbatch_partition_lines(settings)}
+{sbatch_resource_lines(settings)}
+#SBATCH --job-name={settings["benchmark"]}_array
+#SBATCH --array=0-{num_tasks - 1}
+#SBATCH --output={array_dir}/slurm-%A_%a.out
+#SBATCH --error={array_dir}/slurm-%A_%a.err
+
+IFS=$'\\t' read -r app output_dir launcher_args < <(sed -n "$((SLURM_ARRAY_TASK_ID + 2))p" {manifest_path})
+eval "launcher_args=($launcher_args)"
+
+# Keep the same per-run log layout as the one-job-per-run submissions
+exec > "$output_dir/slurm.out" 2> "$output_dir/slurm.err"
+
+cd {settings["spec_dir"]}/$app
+{scratch_lines(settings, "$output_dir")}{ckpt_cache_lines(settings, "$app")}
+{settings["gem5_binary"]}  -re --outdir={gem5_outdir} {settings["config_script"]} "${{launcher_args[@]}}"{ckpt_dir_argument(settings)}
+{compress_outputs_lines(settings, "$output_dir")}"""
+
+    script_path = os.path.join(array_dir, "run_array.sbatch")
+    with open(script_path, "w") as f:
+        f.write(sbatch_content)
+
+    return script_path
+
+
+def generate_pack_sbatch_script(pack_runs, pack_dir, pack_index, settings):
+    """
+    Generate an sbatch script that runs several simulations at once, one per CPU of the
+    allocation. Each gem5 process logs to its own output dir and the job fails if any of them does.
+    """
+    processes = []
+    ckpt_staging = []
+    for index, (point, output_dir, job_name, run_settings) in enumerate(pack_runs):
+        launcher_args = shlex.join(
+            str(x) for pair in launcher_arguments(point, settings) for x in pair
+        )
+        gem5_outdir = f"$scratch_root/{index}" if settings.get("scratch") else output_dir
+        make_outdir = f"mkdir -p {gem5_outdir} && " if settings.get("scratch") else ""
+        launcher_args += ckpt_dir_argument(settings, f"ckpt_dir_{index}")
+        ckpt_staging.append(ckpt_cache_lines(settings, point["app"], f"ckpt_dir_{index}"))
+        processes.append(
+            f'({make_outdir}cd {settings["spec_dir"]}/{point["app"]} && exec {settings["gem5_binary"]} -re '
+            f'--outdir={gem5_outdir} {settings["config_script"]} {launcher_args}) \\\n'
+            f'    > {output_dir}/slurm.out 2> {output_dir}/slurm.err &\n'
+            f'pids+=($!); output_dirs+=({output_dir})\n'
+        )
+
+    sbatch_content = f"""#!/bin/bash
+{sbatch_partition_lines(settings)}
+#SBATCH --ntasks=1
+#SBATCH --cpus-per-task={len(pack_runs)}
+{sbatch_resource_lines(settings)}
+#SBATCH --job-name={settings["benchmark"]}_pack{pack_index}
+#SBATCH --output={pack_dir}/slurm-%j.out
+#SBATCH --error={pack_dir}/slurm-%j.err
+
+pids=()
+output_dirs=()
+{pack_scratch_lines(settings)}{"".join(ckpt_staging)}
+{"".join(processes)}
+# Wait for every simulation and report its exit code
+status=0
+for i in "${{!pids[@]}}"; do
+    wait "${{pids[$i]}}"
+    exit_code=$?
+    echo "${{output_dirs[$i]}}: exit code $exit_code"
+{"    copy_back $i" + chr(10) if settings.get("scratch") else ""}{compress_outputs_command("${output_dirs[$i]}", "    ") if settings.get("compress") else ""}    if [ $exit_code -ne 0 ]; then
+        status=1
+    fi
+done
+exit $status
+"""
+
+    script_path = os.path.join(pack_dir, f"pack_{pack_index}.sbatch")
+    with open(script_path, "w") as f:
+        f.write(sbatch_content)
+
+    return script_path
+
+
+def generate_parse_sbatch_script(parse_dir, job_ids, parse_commands, job_name):
+    """Generate the sbatch script that runs the parsers once every job of the sweep has ended."""
+    commands = "\n".join(parse_commands)
+    sbatch_content = f"""#!/bin/bash
+{sbatch_partition_lines({})}
+#SBATCH --mem-per-cpu=2G
+#SBATCH --job-name=parse_{job_name}
+#SBATCH --dependency=afterany:{":".join(job_ids)}
+#SBATCH --output={parse_dir}/slurm-%j.out
+#SBATCH --error={parse_dir}/slurm-%j.err
+
+# The parsers are run from the root of the repo, where they find .env and 1-output-jobs
+cd {os.getenv("repo_path")}
+
+{commands}
+"""
+
+    script_path = os.path.join(parse_dir, f"parse_{job_name}.sbatch")
+    with open(script_path, "w") as f:
+        f.write(sbatch_content)
+
+    return script_path
+
+#--debug-flags=LTage,TageSCL
+def submit_job(script_path):
+    """Submit the job using sbatch and return job ID."""
+    result = subprocess.run(["sbatch", script_path], capture_output=True, text=True)
+    if result.returncode == 0:
+        # Extract job ID from output like "Submitted batch job 12345"
+        job_id = result.stdout.strip().split()[-1]
+        return job_id
+    else:
+        print(f"Error submitting job: {result.stderr}")
+        return None
+
+
+def query_max_array_size():
+    """MaxArraySize of the cluster from a single scontrol call, or DEFAULT_MAX_ARRAY_SIZE."""
+    try:
+        result = subprocess.run(["scontrol", "show", "config"], capture_output=True, text=True)
+    except OSError as e:
+        result = None
+        print(f"Error querying scontrol: {e}")
+    if result is not None and result.returncode == 0:
+        for line in result.stdout.splitlines():
+            name, _, value = line.partition("=")
+            if name.strip() == "MaxArraySize" and value.strip().isdigit():
+                return int(value.strip())
+    print(f"MaxArraySize unknown, splitting job arrays in chunks of {DEFAULT_MAX_ARRAY_SIZE} tasks")
+    return DEFAULT_MAX_ARRAY_SIZE
+
+
+def array_chunks(runs, max_array_size):
+    """runs split in consecutive chunks of at most max_array_size, one per job array."""
+    return [runs[first:first + max_array_size] for first in range(0, len(runs), max_array_size)]
+
+
+def submit_job_arrays(runs, array_dir, settings, max_array_size):
+    """
+    Submit runs as job arrays of at most max_array_size tasks, the largest array Slurm
+    accepts. A single array is written to array_dir, several to array_dir/chunk_<n>, each
+    with its manifest and script. Returns a list of (job_id or None, chunk_runs, manifest_path).
+    """
+    chunks = array_chunks(runs, max_array_size)
+    arrays = []
+    for chunk_index, chunk_runs in enumerate(chunks):
+        chunk_dir = array_dir
+        if len(chunks) > 1:
+            chunk_dir = create_directory(os.path.join(array_dir, f"chunk_{chunk_index}"))
+        manifest_path = write_array_manifest(chunk_dir, chunk_runs, settings)
+        sbatch_script = generate_array_sbatch_script(manifest_path, len(chunk_runs), chunk_dir, settings)
+        arrays.append((submit_job(sbatch_script), chunk_runs, manifest_path))
+        # Small delay to avoid overwhelming the scheduler
+        time.sleep(0.1)
+    return arrays
+
+
+def add_submission_arguments(parser):
+    """Command line options shared by every submitter."""
+    parser.add_argument(
+        "--executor",
+        choices=["slurm", "local"],
+        default="slurm",
+        help="Where to run the simulations: submitted to Slurm or in a local process pool on this machine",
+    )
+    parser.add_argument(
+        "--local_jobs",
+        type=int,
+        default=None,
+        help="Maximum simultaneous runs with --executor local (default: as many as free cores and memory allow)",
+    )
+    grouping = parser.add_mutually_exclusive_group()
+    grouping.add_argument(
+        "--array",
+        action="store_true",
+        help="Submit all the runs as Slurm job arrays (one per --max_array_size runs) instead of one job per run",
+    )
+    grouping.add_argument(
+        "--pack",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Run N simulations concurrently in each Slurm job, asking for N CPUs (default: 1, one job per run)",
+    )
+    parser.add_argument(
+        "--max_array_size",
+        type=int,
+        default=None,
+        metavar="N",
+        help=f"Tasks of each --array job array (default: the cluster's MaxArraySize from scontrol, "
+             f"or {DEFAULT_MAX_ARRAY_SIZE})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Only submit the runs whose output directory lacks a complete stats.txt and a normal exit "
+             "(runs cancelled by early_stop.py are not submitted again)",
+    )
+    parser.add_argument(
+        "--no_reuse",
+        action="store_true",
+        help="Simulate every run even if the result store has a complete run with the same binary, parameters and checkpoint",
+    )
+    parser.add_argument(
+        "--ledger",
+        default=None,
+        help="Job ledger database (default: $repo_path/1-output-jobs/job_ledger.sqlite), see job_ledger.py status",
+    )
+    parser.add_argument(
+        "--no_history",
+        action="store_true",
+        help="Request the default memory and no walltime instead of sizing them from past runs in the ledger",
+    )
+    parser.add_argument(
+        "--parse",
+        action="store_true",
+        help="Also submit a job that runs the parsers into 2-parser-output when every run has ended",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="zstd-compress stats.txt, config.json/ini and simout/simerr.txt of each run when gem5 exits (slurm.out/err are left as they are)",
+    )
+    parser.add_argument(
+        "--scratch",
+        action="store_true",
+        help="gem5 writes to node-local $TMPDIR (or /scratch) and the run is copied back when it ends, even on failure",
+    )
+    parser.add_argument(
+        "--ckpt_cache",
+        nargs="?",
+        const=DEFAULT_CKPT_CACHE_DIR,
+        default=None,
+        metavar="DIR",
+        help=f"Stage each checkpoint in a node-local LRU cache and restore from it (default DIR: {DEFAULT_CKPT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--ckpt_cache_size",
+        default="100G",
+        help="Size cap of the node-local checkpoint cache (default: 100G)",
+    )
+    parser.add_argument(
+        "--stats_interval",
+        type=int,
+        default=None,
+        metavar="N",
+        help="The launchers also dump the stats every N ticks (or instructions, see --stats_interval_unit), "
+             "for early_stop.py to follow the runs and phase_parser.sh to get per-phase IPC and MPKI",
+    )
+    parser.add_argument(
+        "--stats_interval_unit",
+        choices=["ticks", "insts"],
+        default="ticks",
+        help="Unit of --stats_interval: ticks or instructions committed by the core (default: ticks)",
+    )
+    parser.add_argument(
+        "--fast_forward_insts",
+        type=int,
+        default=None,
+        metavar="N",
+        help="The launchers run N instructions from the checkpoint on an atomic CPU before switching "
+             "to the simulated core (--warmup_insts and --max_insts count from the switch)",
+    )
+    parser.add_argument(
+        "--warmup_insts",
+        type=int,
+        default=None,
+        metavar="N",
+        help="The launchers simulate N instructions from the checkpoint and reset the stats before measuring",
+    )
+    parser.add_argument(
+        "--max_insts",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Every run measures N committed instructions (after the warmup), so all the points do the same work",
+    )
+    parser.add_argument(
+        "--simpoints",
+        action="store_true",
+        help="Simulate the simpoints of every app (see simpoints.py) instead of the slice after its checkpoint: "
+             "one run per simpoint in <app>/simpoint_<cluster>, merged by data-parsing/simpoint_parser.sh (SE only)",
+    )
+    parser.add_argument(
+        "--partitions",
+        default=DEFAULT_PARTITION,
+        help=f"Comma separated partitions to spread the jobs over by their idle CPUs and memory, "
+             f"or all (default: {DEFAULT_PARTITION})",
+    )
+    parser.add_argument(
+        "--exclude_partitions",
+        default="",
+        help="Comma separated partitions never used, e.g. with --partitions all",
+    )
+    parser.add_argument(
+        "--exclude_nodes",
+        default=DEFAULT_EXCLUDE_NODES,
+        help=f"Comma separated nodes the jobs must avoid, empty for none (default: {DEFAULT_EXCLUDE_NODES})",
+    )
+    parser.add_argument(
+        "--canary",
+        action="store_true",
+        help="First run every distinct configuration for a few ticks on one app and only submit the ones that pass",
+    )
+    parser.add_argument(
+        "--canary_app",
+        type=int,
+        default=None,
+        help="SPEC17 number of the app the canaries run (default: the one with the fewest WORKEND events)",
+    )
+    parser.add_argument(
+        "--canary_ticks",
+        type=int,
+        default=CANARY_NUM_TICKS,
+        help=f"Ticks simulated by each canary (default: {CANARY_NUM_TICKS})",
+    )
+    parser.add_argument(
+        "--canary_partition",
+        default=None,
+        help="Partition of the canary job array, e.g. a short one (default: the partition of the sweep)",
+    )
+    parser.add_argument(
+        "--canary_timeout",
+        type=int,
+        default=CANARY_TIMEOUT,
+        help=f"Seconds to wait for the canary arrays, queue time included. The canaries still pending or "
+             f"running then are cancelled and their configurations fail (default: {CANARY_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--order",
+        choices=["longest_first", "sweep"],
+        default="longest_first",
+        help="Submission order: longest expected run time first (default) or the order of the sweep axes",
+    )
+    parser.add_argument(
+        "--dry_run", "--dry-run",
+        action="store_true",
+        help="Don't submit anything, print the number of jobs, core-hours, memory and makespan of the sweep",
+    )
+    parser.add_argument(
+        "--slots",
+        type=int,
+        default=64,
+        help="Simultaneous runs the cluster gives us, for the --dry_run makespan (default: 64)",
+    )
+
+
+def parse_bp_list(parser, bp_arg, bp_choices):
+    """Parse a comma separated --bp value, keeping the order and dropping duplicates."""
+    if not bp_arg:
+        return list(bp_choices)
+    bps = [x.strip() for x in bp_arg.split(",") if x.strip()]
+    invalid_bps = [x for x in bps if x not in bp_choices]
+    if invalid_bps:
+        parser.error(f"Invalid --bp value(s): {invalid_bps}. Valid values: {bp_choices}")
+    return list(dict.fromkeys(bps))
+
+
+def select_apps(benchmark, apps, spec_apps):
+    """Keep the apps of the benchmark that were requested with --spec_number."""
+    if benchmark != "SPEC17":
+        return apps
+    selected = [app for app in apps if int(app[:3]) in spec_apps]
+    for app in apps:
+        if app not in selected:
+            print(f"Skipping {app} as it's not in the specified list of SPEC17 apps.")
+    return selected
+
+
+def submit_sweep(spec, bps, apps, settings, args):
+    """
+    Expand spec x bps x apps and submit one gem5 run per point (or a single job array
+    with --array). Every job is recorded in the job ledger. Returns the list of
+    (name, bp, benchmark, app, job_id) submitted.
+
+    Slurm runs request the memory and walltime of past runs of the same config, app and bp
+    family (see resource_history.py), or the defaults of settings if never seen, and
+    are submitted longest expected run time first unless --order sweep.
+
+    Points simulated before with the same gem5 binary, launcher, parameters and checkpoint
+    are linked from the result store instead (see result_store.py) unless --no_reuse.
+    """
+    benchmark = settings["benchmark"]
+    if args.simpoints and os.path.basename(settings["config_script"]) == "launch_fs_from_ckpt.py":
+        print("Error: --simpoints only works with the SE checkpoints, the FS ones have no simpoints")
+        return []
+    settings = dict(
+        settings,
+        compress=args.compress and args.executor == "slurm",
+        scratch=args.scratch and args.executor == "slurm",
+        # The cache stages the app's checkpoint, the simpoint runs restore their own ones
+        ckpt_cache=args.ckpt_cache if args.executor == "slurm" and not args.simpoints else None,
+        ckpt_cache_size=args.ckpt_cache_size,
+        stats_interval=args.stats_interval,
+        stats_interval_unit=args.stats_interval_unit,
+        fast_forward_insts=args.fast_forward_insts,
+        warmup_insts=args.warmup_insts,
+        max_insts=args.max_insts,
+        partitions=split_list(args.partitions) or [DEFAULT_PARTITION],
+        exclude_partitions=split_list(args.exclude_partitions),
+        exclude_nodes=",".join(split_list(args.exclude_nodes)),
+    )
+    spec = add_axis(add_axis(spec, "bp", bps), "app", apps)
+    ledger_path = args.ledger or default_ledger_path()
+    use_history = (args.executor == "slurm" or args.dry_run) and not args.no_history
+    history = load_usage_history(ledger_path) if use_history else {}
+
+    submitted_jobs = []
+    ledger_jobs = []
+
+    def add_ledger_job(point, output_dir, run_settings, job_id, state, exit_code=None, executor=args.executor):
+        ledger_jobs.append({
+            "job_id": job_id, "sweep": spec["sweep"]["name"], "name": point["name"],
+            "bp": point["bp"], "benchmark": benchmark, "app": point["app"],
+            "params": run_parameters(point, run_settings), "output_dir": output_dir,
+            "executor": executor, "state": state, "exit_code": exit_code,
+        })
+
+    pending_runs = []
+    num_runs = 0
+    skipped_runs = 0
+    skipped_host_seconds = 0.0
+    reused_runs = 0
+    reused_host_seconds = 0.0
+
+    points = iter_sweep_points(spec)
+    if args.simpoints:
+        points = expand_simpoints(points, settings)
+    for point in points:
+        output_dir = point_output_dir(point, spec, settings)
+
+        num_runs += 1
+        # Runs cancelled by early_stop.py are done too: simulating them again would only
+        # give early_stop.py the same point to cancel
+        if args.resume and (run_is_complete(output_dir) or run_stopped_early(output_dir)):
+            skipped_runs += 1
+            skipped_host_seconds += run_host_seconds(output_dir)
+            continue
+
+        key = point_result_key(point, settings) if not args.no_reuse else None
+        result_dir = find_result(settings["base_output_dir"], key, output_dir) if key else None
+        if result_dir:
+            reused_runs += 1
+            reused_host_seconds += run_host_seconds(result_dir)
+            if not args.dry_run:
+                link_result(result_dir, create_directory(output_dir, clean_if_exists=True))
+                add_ledger_job(point, output_dir, settings, None, "COMPLETED", executor="reuse")
+            continue
+
+        # Missing or failed runs are started from a clean directory
+        if not args.dry_run:
+            output_dir = create_directory(output_dir, clean_if_exists=True)
+            if key:
+                claim_result(settings["base_output_dir"], key, output_dir)
+        run_settings = sized_settings(settings, run_parameters(point, settings), history)
+        pending_runs.append((point, output_dir, format_point_name(spec, point, "job"), run_settings))
+
+    estimator = RuntimeEstimator(history)
+    if args.order == "longest_first":
+        # Slow apps (526.blender_r waits for 240 WORKENDs) start first instead of at the tail of the sweep
+        pending_runs.sort(key=lambda run: estimator.estimate(run_parameters(run[0], run[3]))[0], reverse=True)
+
+    if args.canary and pending_runs:
+        # Imported here because canary imports this module
+        from canary import run_canaries
+        pending_runs = run_canaries(pending_runs, settings, spec, args)
+
+    if history and pending_runs:
+        num_sized = sum(1 for *_, run_settings in pending_runs if run_settings is not settings)
+        print(f"Sized memory and walltime of {num_sized} of {len(pending_runs)} runs from past runs "
+              f"(the rest request {settings['slurm_mem_size']} and the partition walltime)")
+
+    # Partition of every job (of every pack with --pack), from a single sinfo call. The
+    # tasks of an array can start in any of the partitions
+    if args.executor == "slurm" and pending_runs:
+        cpus_per_job = args.pack if args.pack > 1 else 1
+        weights = select_partitions(widest_settings(settings, [s for *_, s in pending_runs]), cpus_per_job)
+        if args.array:
+            job_partitions = [",".join(sorted(weights))]
+        else:
+            job_partitions = spread_jobs(-(-len(pending_runs) // cpus_per_job), weights)
+        if len(weights) > 1:
+            print_spread(job_partitions, weights)
+
+    if reused_runs:
+        print(f"{'Would reuse' if args.dry_run else 'Reused'} {reused_runs} runs from the result store "
+              f"(approximately {reused_host_seconds / 3600:.1f} core-hours of simulation)")
+
+    if args.dry_run:
+        print_cost_estimate(
+            [(run_parameters(point, run_settings), run_settings)
+             for point, output_dir, job_name, run_settings in pending_runs],
+            estimator, args.slots,
+        )
+        if args.resume:
+            print_resume_summary(skipped_runs, num_runs, skipped_host_seconds)
+        return submitted_jobs
+
+    if args.executor == "local" and pending_runs:
+        # The runs are labelled by their output dir, the only name that is unique (runs of
+        # several simpoints of an app share configuration, bp and app)
+        local_runs = [
+            (output_dir, point["app"], output_dir, launcher_arguments(point, settings))
+            for point, output_dir, job_name, run_settings in pending_runs
+        ]
+        exit_codes = dict(run_local(local_runs, settings, args.local_jobs))
+        for point, output_dir, job_name, run_settings in pending_runs:
+            exit_code = exit_codes[output_dir]
+            submitted_jobs.append((point["name"], point["bp"], benchmark, point["app"],
+                                   f"local (exit code: {exit_code})"))
+            add_ledger_job(point, output_dir, run_settings, None, "COMPLETED" if exit_code == 0 else "FAILED", str(exit_code))
+
+    elif args.array and pending_runs:
+        # One manifest and one array script per chunk of at most MaxArraySize runs
+        array_dir = create_directory(
+            os.path.join(settings["base_output_dir"], "arrays", f"{benchmark}_{time.strftime('%Y%m%d-%H%M%S')}")
+        )
+        # A single resource request for every array, large enough for every task
+        array_settings = dict(
+            widest_settings(settings, [run_settings for *_, run_settings in pending_runs]),
+            partition=job_partitions[0],
+        )
+        max_array_size = args.max_array_size or query_max_array_size()
+        arrays = submit_job_arrays(pending_runs, array_dir, array_settings, max_array_size)
+
+        for job_id, chunk_runs, manifest_path in arrays:
+            if job_id:
+                for task_id, (point, output_dir, job_name, run_settings) in enumerate(chunk_runs):
+                    submitted_jobs.append((point["name"], point["bp"], benchmark, point["app"], f"{job_id}_{task_id}"))
+                    add_ledger_job(point, output_dir, array_settings, f"{job_id}_{task_id}", "SUBMITTED")
+                print(f"Submitted job array {job_id} with {len(chunk_runs)} tasks (manifest: {manifest_path})")
+            else:
+                print(f"Failed to submit job array for {benchmark} ({len(chunk_runs)} tasks, manifest: {manifest_path})")
+
+    elif args.pack > 1 and pending_runs:
+        # Runs are packed in submission order, each pack asks for the largest sizes of its runs
+        pack_dir = create_directory(
+            os.path.join(settings["base_output_dir"], "packs", f"{benchmark}_{time.strftime('%Y%m%d-%H%M%S')}")
+        )
+        for pack_index, first in enumerate(range(0, len(pending_runs), args.pack)):
+            pack_runs = pending_runs[first:first + args.pack]
+            pack_settings = dict(
+                widest_settings(settings, [run_settings for *_, run_settings in pack_runs]),
+                pack_size=len(pack_runs), partition=job_partitions[pack_index],
+            )
+            sbatch_script = generate_pack_sbatch_script(pack_runs, pack_dir, pack_index, pack_settings)
+
+            job_id = submit_job(sbatch_script)
+
+            if job_id:
+                for point, output_dir, job_name, run_settings in pack_runs:
+                    submitted_jobs.append((point["name"], point["bp"], benchmark, point["app"], job_id))
+                    add_ledger_job(point, output_dir, pack_settings, job_id, "SUBMITTED")
+                print(f"Submitted job {job_id} with {len(pack_runs)} packed runs ({sbatch_script})")
+            else:
+                print(f"Failed to submit pack {pack_index} ({len(pack_runs)} runs)")
+
+            time.sleep(0.1)
+
+    elif pending_runs:
+        for (point, output_dir, job_name, run_settings), partition in zip(pending_runs, job_partitions):
+            run_settings = dict(run_settings, partition=partition)
+            run_label = f"{point['name']}/{point['bp']}/{benchmark}/{point['app']}"
+            sbatch_script = generate_sbatch_script(point, output_dir, job_name, run_settings)
+
+            job_id = submit_job(sbatch_script)
+
+            if job_id:
+                submitted_jobs.append((point["name"], point["bp"], benchmark, point["app"], job_id))
+                add_ledger_job(point, output_dir, run_settings, job_id, "SUBMITTED")
+                print(f"Submitted job {job_id} for {run_label}")
+            else:
+                print(f"Failed to submit job for {run_label}")
+
+            # Small delay to avoid overwhelming the scheduler
+            time.sleep(0.1)
+
+    record_jobs(ledger_path, ledger_jobs)
+    append_submission_log(settings["base_output_dir"], spec["sweep"]["name"], ledger_jobs)
+
+    if args.resume:
+        print_resume_summary(skipped_runs, num_runs, skipped_host_seconds)
+
+    return submitted_jobs
+
+
+def print_submission_summary(submitted_jobs, executor="slurm"):
+    """Print the submitted jobs and the usual Slurm reminders."""
+    print(f"\n{'='*60}")
+    print(f"Summary: {'Ran' if executor == 'local' else 'Submitted'} {len(submitted_jobs)} jobs")
+    print(f"{'='*60}")
+
+    for name, bp, benchmark, app, job_id in submitted_jobs:
+        print(f"Job {job_id}: {name}/{bp}/{benchmark}/{app}")
+
+    if executor == "slurm":
+        print(f"\nMonitor jobs with: squeue -u $USER")
+        print(f"Cancel all jobs with: scancel -u $USER")
+
+
+def submit_parse_job(submitted_jobs, parse_commands, base_output_dir, sweep_name, executor="slurm"):
+    """
+    Run the parsers of a sweep after its simulations: as a Slurm job that depends on all of
+    them (afterany, so failed runs don't block it), or right away with the local executor.
+    """
+    if not submitted_jobs:
+        return
+    if executor == "local":
+        print(f"\nParsing the results of {sweep_name}...")
+        for command in parse_commands:
+            subprocess.run(command, shell=True, cwd=os.getenv("repo_path"))
+        return
+
+    # Array tasks and packed runs share their job id, the dependency is on the whole job
+    job_ids = list(dict.fromkeys(job_id.split("_")[0] for *_, job_id in submitted_jobs))
+    parse_dir = create_directory(os.path.join(base_output_dir, "parse"))
+    script_path = generate_parse_sbatch_script(parse_dir, job_ids, parse_commands, sweep_name)
+
+    job_id = submit_job(script_path)
+    if job_id:
+        print(f"Submitted parse job {job_id}, it starts when the {len(job_ids)} jobs of the sweep end")
+    else:
+        print(f"Failed to submit the parse job ({script_path})")
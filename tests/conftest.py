@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The scripts of run-jobs/ and config-files/ import each other as top-level modules
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for scripts_dir in ("run-jobs", "config-files"):
+    sys.path.insert(0, os.path.join(REPO_DIR, scripts_dir))
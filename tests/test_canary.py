@@ -0,0 +1,46 @@
+import canary
+
+
+class FakeSlurm:
+    """sacct states of the canary tasks, changed by each sleep, and the cancelled jobs."""
+
+    def __init__(self, monkeypatch, states_per_check):
+        self.states_per_check = list(states_per_check)
+        self.cancelled = []
+        self.now = 0.0
+        monkeypatch.setattr(canary, "query_sacct", self.query_sacct)
+        monkeypatch.setattr(canary, "cancel_job", self.cancelled.append)
+        monkeypatch.setattr(canary.time, "time", lambda: self.now)
+        monkeypatch.setattr(canary.time, "sleep", self.sleep)
+
+    def query_sacct(self, task_ids):
+        states = self.states_per_check[0]
+        return {task_id: (states[task_id], "0:0", None) for task_id in task_ids if task_id in states}
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if len(self.states_per_check) > 1:
+            self.states_per_check.pop(0)
+
+
+def test_wait_for_arrays_until_every_task_ends(monkeypatch):
+    slurm = FakeSlurm(monkeypatch, [
+        {"10_0": "RUNNING", "10_1": "PENDING"},
+        {"10_0": "COMPLETED", "10_1": "FAILED"},
+    ])
+    assert canary.wait_for_arrays([("10", 2)], 3600) == {"10_0": "COMPLETED", "10_1": "FAILED"}
+    assert slurm.cancelled == []
+
+
+def test_wait_for_arrays_cancels_at_the_timeout(monkeypatch):
+    slurm = FakeSlurm(monkeypatch, [{"10_0": "COMPLETED", "10_1": "PENDING"}])
+    states = canary.wait_for_arrays([("10", 2)], 100)
+    assert states == {"10_0": "COMPLETED", "10_1": "TIMEOUT"}
+    assert slurm.cancelled == ["10"]
+    assert slurm.now == 100
+
+
+def test_tasks_unknown_to_sacct_time_out(monkeypatch):
+    slurm = FakeSlurm(monkeypatch, [{}])
+    assert canary.wait_for_arrays([("10", 1), ("11", 1)], 60) == {"10_0": "TIMEOUT", "11_0": "TIMEOUT"}
+    assert slurm.cancelled == ["10", "11"]
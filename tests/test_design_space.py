@@ -0,0 +1,44 @@
+import pytest
+
+import design_space
+
+
+@pytest.fixture
+def ledger(monkeypatch):
+    """Latest ledger state of each output dir, as wait_for_runs reads it."""
+    states = {}
+    monkeypatch.setattr(design_space, "refresh_states", lambda ledger_path: None)
+    monkeypatch.setattr(design_space, "latest_jobs", lambda ledger_path, sweep: [
+        {"output_dir": output_dir, "state": state} for output_dir, state in states.items()
+    ])
+    return states
+
+
+def no_sleep(seconds):
+    raise AssertionError("wait_for_runs waited for a run that had ended")
+
+
+def test_wait_for_runs_ends_with_the_jobs(tmp_path, ledger, monkeypatch):
+    monkeypatch.setattr(design_space.time, "sleep", no_sleep)
+    ledger[str(tmp_path / "a")] = "COMPLETED"
+    ledger[str(tmp_path / "b")] = "FAILED"
+    design_space.wait_for_runs([str(tmp_path / "a"), str(tmp_path / "b")], "ledger", "sweep", 1)
+
+
+def test_wait_for_runs_skips_runs_without_job(tmp_path, ledger, monkeypatch):
+    monkeypatch.setattr(design_space.time, "sleep", no_sleep)
+    design_space.wait_for_runs([str(tmp_path / "not_submitted")], "ledger", "sweep", 1)
+
+
+def test_wait_for_runs_waits_for_running_jobs(tmp_path, ledger, monkeypatch):
+    output_dir = str(tmp_path / "a")
+    ledger[output_dir] = "RUNNING"
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        ledger[output_dir] = "COMPLETED"
+
+    monkeypatch.setattr(design_space.time, "sleep", sleep)
+    design_space.wait_for_runs([output_dir], "ledger", "sweep", 5)
+    assert sleeps == [5]
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from doe_samplers import (
+    latin_hypercube, sobol, fractional_factorial, design_quality, sample_factors, design_spec,
+)
+
+
+def test_latin_hypercube_one_sample_per_stratum():
+    points = latin_hypercube(10, 3, random.Random(0))
+    assert len(points) == 10
+    for factor in range(3):
+        assert sorted(int(point[factor] * 10) for point in points) == list(range(10))
+
+
+def test_sobol_first_points():
+    points = sobol(8, 2, random.Random(0))
+    assert len(points) == 8
+    assert all(0.0 <= x < 1.0 for point in points for x in point)
+    # The first 8 points of the sequence (the origin, skipped, and the next 7) fall in a
+    # different 1/8 bin of every factor, and the digital shift keeps it so
+    for factor in range(2):
+        assert len({int(point[factor] * 8) for point in points[:7]}) == 7
+
+
+def test_sobol_factor_limit():
+    with pytest.raises(ValueError):
+        sobol(4, 22, random.Random(0))
+
+
+def test_fractional_factorial_is_balanced_and_orthogonal():
+    rows = fractional_factorial(8, 5, random.Random(0))
+    assert len(rows) == 8
+    columns = list(zip(*rows))
+    for column in columns:
+        assert sum(column) == 4
+    # Main effects are not aliased with each other (resolution III or more)
+    assert len(set(columns)) == 5
+    assert not {tuple(1 - x for x in column) for column in columns} & set(columns)
+
+
+def test_best_generators_of_a_2_5_1_design():
+    # ABCDE = I: resolution V
+    assert design_quality(4, [0b1111]) == (5, -1)
+    assert design_quality(4, [0b0011]) == (3, -1)
+
+
+def test_sample_factors_maps_levels_and_shares_params():
+    factors = [
+        {"name": "frontend_width", "params": ["fetchWidth", "decodeWidth"], "levels": [2, 4, 8]},
+        {"name": "numROBEntries", "levels": [64, 192]},
+    ]
+    rows = sample_factors(factors, "lhs", 6, seed=0)
+    assert {row["fetchWidth"] for row in rows} == {2, 4, 8}
+    assert {row["numROBEntries"] for row in rows} == {64, 192}
+    assert all(row["fetchWidth"] == row["decodeWidth"] for row in rows)
+    # Duplicated samples are only kept once
+    assert len({tuple(sorted(row.items())) for row in rows}) == len(rows)
+
+
+def test_fractional_factorial_uses_the_extreme_levels():
+    factors = [{"name": name, "levels": [1, 2, 3]} for name in ("a", "b", "c")]
+    rows = sample_factors(factors, "fractional_factorial", 4, seed=0)
+    assert len(rows) == 4
+    assert all(value in (1, 3) for row in rows for value in row.values())
+
+
+def test_design_spec_adds_the_design_axis():
+    spec = {
+        "sweep": {"name": "samples"},
+        "factors": [{"name": "fetchWidth", "levels": [2, 4, 8]}],
+        "sampling": {"method": "sobol", "samples": 4},
+        "axes": [{"name": "delay", "values": [0, 1]}],
+    }
+    designed = design_spec(spec)
+    assert [axis["name"] for axis in designed["axes"]] == ["design", "delay"]
+    assert "factors" not in designed
+    assert design_spec({"axes": []}) == {"axes": []}
@@ -0,0 +1,20 @@
+from job_ledger import expand_array_job_id, state_group
+
+
+def test_plain_job_ids():
+    assert expand_array_job_id("123") == ["123"]
+    assert expand_array_job_id("123_4") == ["123_4"]
+
+
+def test_pending_array_tasks():
+    assert expand_array_job_id("123_[0-3]") == ["123_0", "123_1", "123_2", "123_3"]
+    assert expand_array_job_id("123_[1,5-6,9]") == ["123_1", "123_5", "123_6", "123_9"]
+
+
+def test_throttled_array_tasks():
+    assert expand_array_job_id("123_[7-9%2]") == ["123_7", "123_8", "123_9"]
+
+
+def test_state_groups():
+    assert state_group("COMPLETED") == "DONE"
+    assert state_group("OUT_OF_MEMORY") == "FAILED"
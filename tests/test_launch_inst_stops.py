@@ -0,0 +1,151 @@
+import argparse
+import sys
+import types
+
+from launch_inst_stops import InstStops, add_inst_stop_arguments
+
+
+def walk_stops(stops, limit=100):
+    """The stops a run goes through, the way the MAX_INSTS handler schedules them until it exits."""
+    insts = 0
+    visited = []
+    while len(visited) < limit:
+        stop = stops.next_inst_stop(insts)
+        if stop is None:
+            return visited
+        assert stop > insts
+        visited.append(stop)
+        if stop == stops.run_end:
+            return visited
+        insts = stop
+    return visited
+
+
+def test_no_stops():
+    stops = InstStops()
+    assert stops.next_inst_stop(0) is None
+
+
+def test_warmup_without_max_insts_ends_the_stops():
+    stops = InstStops(warmup_insts=1000)
+    assert walk_stops(stops) == [1000]
+    assert stops.next_inst_stop(1000) is None
+
+
+def test_warmup_and_max_insts():
+    stops = InstStops(warmup_insts=1000, max_insts=500)
+    assert walk_stops(stops) == [1000, 1500]
+    assert stops.run_end == 1500
+
+
+def test_max_insts_alone():
+    assert walk_stops(InstStops(max_insts=500)) == [500]
+
+
+def test_fast_forward_alone_ends_the_stops():
+    stops = InstStops(fast_forward_insts=5000)
+    assert walk_stops(stops) == [5000]
+    assert stops.next_inst_stop(5000) is None
+
+
+def test_warmup_counts_from_the_fast_forward():
+    stops = InstStops(fast_forward_insts=5000, warmup_insts=1000)
+    assert walk_stops(stops) == [5000, 6000]
+    stops = InstStops(fast_forward_insts=5000, warmup_insts=1000, max_insts=500)
+    assert walk_stops(stops) == [5000, 6000, 6500]
+
+
+def test_dumps_count_from_the_warmup():
+    stops = InstStops(warmup_insts=1000, max_insts=1000, insts_interval=300)
+    assert walk_stops(stops) == [1000, 1300, 1600, 1900, 2000]
+    assert [stops.is_dump(insts) for insts in (1000, 1300, 2000)] == [False, True, False]
+
+
+def test_dumps_without_max_insts_never_end():
+    stops = InstStops(insts_interval=100)
+    assert walk_stops(stops, limit=5) == [100, 200, 300, 400, 500]
+
+
+def test_from_args():
+    parser = argparse.ArgumentParser()
+    add_inst_stop_arguments(parser)
+    args = parser.parse_args(["--warmup_insts", "10", "--stats_interval", "5", "--stats_interval_unit", "insts"])
+    stops = InstStops.from_args(args)
+    assert (stops.warmup_end, stops.run_end, stops.insts_interval) == (10, None, 5)
+    # Dumps by ticks are not instruction stops
+    args = parser.parse_args(["--stats_interval", "5"])
+    assert InstStops.from_args(args).next_inst_stop(0) is None
+
+
+class FakeSim:
+    def __init__(self):
+        self.scheduled = []
+
+    def get_current_tick(self):
+        return 0
+
+    def schedule_max_insts(self, insts):
+        self.scheduled.append(insts)
+
+
+class FakeProcessor:
+    def __init__(self):
+        self.switches = 0
+
+    def switch_to_detailed(self):
+        self.switches += 1
+
+
+class FakeBoard:
+    def __init__(self):
+        self.processor = FakeProcessor()
+
+    def get_processor(self):
+        return self.processor
+
+
+def run_handler(monkeypatch, stops, num_exits, board=None):
+    """Drive the MAX_INSTS handler through num_exits exits, with gem5's stats calls recorded."""
+    calls = []
+    fake_m5 = types.SimpleNamespace(stats=types.SimpleNamespace(
+        reset=lambda: calls.append("reset"), dump=lambda: calls.append("dump"),
+    ))
+    monkeypatch.setitem(sys.modules, "m5", fake_m5)
+    sim = FakeSim()
+    stops._sim = sim
+    handler = stops._handle_max_insts(board=board, config_name="BigO3")
+    exits = [next(handler) for _ in range(num_exits)]
+    return exits, sim.scheduled, calls
+
+
+def test_handler_after_the_warmup_without_max_insts(monkeypatch):
+    exits, scheduled, calls = run_handler(monkeypatch, InstStops(warmup_insts=1000), 1)
+    assert exits == [False]
+    assert scheduled == []
+    assert calls == ["reset"]
+
+
+def test_handler_schedules_relative_stops(monkeypatch):
+    stops = InstStops(warmup_insts=1000, max_insts=1000, insts_interval=400)
+    exits, scheduled, calls = run_handler(monkeypatch, stops, 4)
+    assert exits == [False, False, False, True]
+    assert scheduled == [400, 400, 200]
+    assert calls == ["reset", "dump", "dump"]
+
+
+def test_handler_after_the_fast_forward_without_max_insts(monkeypatch):
+    board = FakeBoard()
+    exits, scheduled, calls = run_handler(monkeypatch, InstStops(fast_forward_insts=5000), 1, board)
+    assert exits == [False]
+    assert scheduled == []
+    # Without --warmup_insts the switch is also the start of the measurement
+    assert calls == ["reset"]
+    assert board.processor.switches == 1
+
+    board = FakeBoard()
+    stops = InstStops(fast_forward_insts=5000, warmup_insts=1000)
+    exits, scheduled, calls = run_handler(monkeypatch, stops, 2, board)
+    assert exits == [False, False]
+    assert scheduled == [1000]
+    assert calls == ["reset"]
+    assert board.processor.switches == 1
@@ -0,0 +1,45 @@
+from resource_history import bp_family, usage_key, exact_usage_key, history_usage
+
+
+def params(**overrides):
+    """run_parameters() of a BaseCPU run of mcf."""
+    run_params = dict(config="BaseCPU", app="505.mcf_r", bp="TAGE_SC_L", extra_params={"fetchWidth": 4},
+                      simpoint=None, num_ticks=10**11)
+    run_params.update(overrides)
+    return run_params
+
+
+def history_of(*runs):
+    """The {usage_key: {exact_usage_key: usage}} load_usage_history() builds from (params, usage)."""
+    history = {}
+    for run_params, usage in runs:
+        history.setdefault(usage_key(run_params), {})[exact_usage_key(run_params)] = usage
+    return history
+
+
+def test_bp_families():
+    assert bp_family("TAGE_L") == bp_family("TAGE_SC_L") == "TAGE"
+    assert bp_family("AlwaysTrueBP") == bp_family("RandomBP") == "Static"
+    assert bp_family("LocalBP") == "LocalBP"
+
+
+def test_same_run_uses_its_own_usage():
+    history = history_of(
+        (params(), (2 * 1024**3, 3600)),
+        (params(extra_params={"fetchWidth": 8}), (4 * 1024**3, 7200)),
+    )
+    assert history_usage(history, params(bp="TAGE_L")) == (2 * 1024**3, 3600)
+
+
+def test_new_run_uses_the_largest_of_its_config_app_and_bp_family():
+    history = history_of(
+        (params(), (2 * 1024**3, 7200)),
+        (params(extra_params={"fetchWidth": 8}), (4 * 1024**3, 3600)),
+    )
+    assert history_usage(history, params(extra_params={"fetchWidth": 2})) == (4 * 1024**3, 7200)
+
+
+def test_no_history_for_other_apps_or_families():
+    history = history_of((params(), (2 * 1024**3, 3600)))
+    assert history_usage(history, params(app="557.xz_r")) is None
+    assert history_usage(history, params(bp="LocalBP")) is None
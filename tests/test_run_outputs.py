@@ -0,0 +1,60 @@
+import pytest
+
+from run_outputs import STATS_END_MARKER, run_is_complete, read_exit_cause, classify_failure
+
+
+def write_run(output_dir, exit_cause=None, stdout_name="simout.txt", full_dump=True):
+    """A run's stats.txt (with or without the end of the dump) and the launcher's prints."""
+    stats = "simInsts 1000\n"
+    if full_dump:
+        stats += STATS_END_MARKER + "\n"
+    (output_dir / "stats.txt").write_text(stats)
+    prints = "Simulation finished:\n"
+    if exit_cause is not None:
+        prints += f"  Exit cause: {exit_cause}\n"
+    (output_dir / stdout_name).write_text(prints)
+
+
+@pytest.mark.parametrize("exit_cause", [
+    "exiting with last active thread context",
+    "workend",
+    "a thread reached the max instruction count",
+    "Tick exit reached",
+])
+def test_normal_exits_are_complete(tmp_path, exit_cause):
+    write_run(tmp_path, exit_cause)
+    assert run_is_complete(tmp_path)
+
+
+def test_exit_cause_from_slurm_out(tmp_path):
+    write_run(tmp_path, "workend", stdout_name="slurm.out")
+    assert read_exit_cause(tmp_path) == "workend"
+    assert run_is_complete(tmp_path)
+
+
+def test_interrupted_run_is_not_complete(tmp_path):
+    write_run(tmp_path, "user interrupt received")
+    assert read_exit_cause(tmp_path) == "user interrupt received"
+    assert not run_is_complete(tmp_path)
+
+
+def test_run_without_exit_cause_is_not_complete(tmp_path):
+    write_run(tmp_path)
+    assert not run_is_complete(tmp_path)
+
+
+def test_partial_dump_is_not_complete(tmp_path):
+    write_run(tmp_path, "workend", full_dump=False)
+    assert not run_is_complete(tmp_path)
+
+
+def test_panic_in_simerr(tmp_path):
+    (tmp_path / "slurm.err").write_text("")
+    (tmp_path / "simerr.txt").write_text("panic: Unrecognized/invalid instruction\n")
+    assert classify_failure(tmp_path, "FAILED") == "GEM5_PANIC"
+
+
+def test_sacct_state_first(tmp_path):
+    (tmp_path / "simerr.txt").write_text("panic: something\n")
+    assert classify_failure(tmp_path, "OUT_OF_MEMORY") == "OOM"
+    assert classify_failure(tmp_path / "missing", "CANCELLED") == "CANCELLED"
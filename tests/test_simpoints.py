@@ -0,0 +1,43 @@
+import random
+
+from simpoints import kmeans, bic_score, cluster_simpoints, simpoint_dir, simpoint_ckpt_dir
+
+
+def phases_bbvs():
+    """BBVs of an ROI with two phases: 30 intervals in blocks 1-3, then 10 in blocks 7-9."""
+    return [{1: 500, 2: 300, 3: 200}] * 30 + [{7: 100, 8: 700, 9: 200}] * 10
+
+
+def test_kmeans_separates_two_groups():
+    points = [[0.0, 0.0], [0.1, 0.0], [0.0, 0.1], [5.0, 5.0], [5.1, 5.0]]
+    centers, labels, distortion = kmeans(points, 2, 3, random.Random(0))
+    assert labels[0] == labels[1] == labels[2] != labels[3] == labels[4]
+    assert distortion < 0.1
+
+
+def test_bic_prefers_the_real_number_of_groups():
+    rng = random.Random(0)
+    points = [[rng.gauss(0, 0.1), rng.gauss(0, 0.1)] for _ in range(20)]
+    points += [[rng.gauss(5, 0.1), rng.gauss(5, 0.1)] for _ in range(20)]
+    one = bic_score(points, *kmeans(points, 1, 3, random.Random(0)))
+    two = bic_score(points, *kmeans(points, 2, 3, random.Random(0)))
+    assert two > one
+
+
+def test_cluster_simpoints_one_per_phase():
+    simpoints = cluster_simpoints(phases_bbvs(), interval=1000, warmup_insts=500, max_k=4,
+                                  init_seeds=3, sample_size=2000, seed=0)
+    assert simpoints["k"] == 2
+    assert simpoints["num_intervals"] == 40
+    # Heaviest first, weights add up to the whole ROI
+    assert [s["weight"] for s in simpoints["simpoints"]] == [0.75, 0.25]
+    first, second = simpoints["simpoints"]
+    assert first["interval_index"] < 30 <= second["interval_index"]
+    for simpoint in simpoints["simpoints"]:
+        assert simpoint["start_insts"] + simpoint["warmup_insts"] == simpoint["interval_index"] * 1000
+        assert simpoint["warmup_insts"] <= 500
+
+
+def test_simpoint_paths():
+    assert simpoint_dir("/ckpts/ckpt_505.mcf_r/") == "/ckpts/simpoints/ckpt_505.mcf_r"
+    assert simpoint_ckpt_dir("/ckpts/ckpt_505.mcf_r", 2) == "/ckpts/simpoints/ckpt_505.mcf_r/cpt_2"
@@ -0,0 +1,46 @@
+import pytest
+
+from slurm_resources import parse_mem_size, format_mem_size, parse_slurm_time, format_slurm_time
+
+
+@pytest.mark.parametrize("mem_size, num_bytes", [
+    ("5G", 5 * 1024**3),
+    ("512M", 512 * 1024**2),
+    ("3500000K", 3500000 * 1024),
+    ("1.5g", int(1.5 * 1024**3)),
+    # Plain numbers are MiB, like --mem-per-cpu
+    ("4096", 4 * 1024**3),
+])
+def test_parse_mem_size(mem_size, num_bytes):
+    assert parse_mem_size(mem_size) == num_bytes
+
+
+def test_format_mem_size():
+    assert format_mem_size(5 * 1024**3) == "5G"
+    assert format_mem_size(1536 * 1024**2) == "1536M"
+    # Rounded up to whole MiB
+    assert format_mem_size(1024**2 + 1) == "2M"
+
+
+@pytest.mark.parametrize("slurm_time, seconds", [
+    ("30", 30 * 60),
+    ("30:15", 30 * 60 + 15),
+    ("02:10:00", 2 * 3600 + 10 * 60),
+    ("1-02", 26 * 3600),
+    ("1-02:30", 26 * 3600 + 30 * 60),
+    ("2-00:00:05", 48 * 3600 + 5),
+    ("UNLIMITED", None),
+    ("Partition_Limit", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_slurm_time(slurm_time, seconds):
+    assert parse_slurm_time(slurm_time) == seconds
+
+
+def test_format_slurm_time():
+    assert format_slurm_time(3600) == "0-01:00:00"
+    # Rounded up to whole minutes
+    assert format_slurm_time(61) == "0-00:02:00"
+    assert format_slurm_time(26 * 3600 + 30 * 60) == "1-02:30:00"
+    assert parse_slurm_time(format_slurm_time(5400)) == 5400
@@ -0,0 +1,70 @@
+import pytest
+
+from sweep_engine import (
+    normalize_sweep_spec, add_axis, iter_sweep_indices, count_sweep_points, iter_sweep_points,
+    format_point_name,
+)
+
+
+def spec_of(**tables):
+    return normalize_sweep_spec(dict(
+        sweep={"name": "test", "output_subdir": "test_experiments"},
+        fixed={"config": "BaseCPU"},
+        **tables,
+    ))
+
+
+WIDTHS = {"name": "width", "values": [{"fetchWidth": 2}, {"fetchWidth": 4}, {"fetchWidth": 8}]}
+ROBS = {"name": "rob", "values": [{"numROBEntries": 64}, {"numROBEntries": 192}]}
+
+
+def test_product_outermost_axis_first():
+    spec = add_axis(spec_of(axes=[WIDTHS, ROBS]), "bp", ["TAGE_SC_L", "LocalBP"])
+    indices = list(iter_sweep_indices(spec))
+    assert len(indices) == count_sweep_points(spec) == 12
+    assert indices[:3] == [(0, 0, 0), (0, 0, 1), (0, 1, 0)]
+    assert indices[-1] == (2, 1, 1)
+
+
+def test_constraints_prune_the_product():
+    # The 192 entry ROB only with the 4 and 8 wide cores
+    spec = spec_of(axes=[WIDTHS, ROBS], constraints=[
+        {"axis": "rob", "on": "width", "allowed": {"0": [0], "1": [0, 1], "2": [1]}},
+    ])
+    assert list(iter_sweep_indices(spec)) == [(0, 0), (1, 0), (1, 1), (2, 1)]
+
+
+def test_constraint_on_a_later_axis_is_rejected():
+    with pytest.raises(ValueError):
+        spec_of(axes=[WIDTHS, ROBS], constraints=[{"axis": "width", "on": "rob", "allowed": {}}])
+
+
+def test_duplicated_axes_are_rejected():
+    with pytest.raises(ValueError):
+        spec_of(axes=[WIDTHS, WIDTHS])
+
+
+def test_points_merge_the_parameter_tables():
+    spec = add_axis(spec_of(axes=[WIDTHS, ROBS], naming={"dir": "w{fetchWidth}_rob{numROBEntries}"}),
+                    "bp", ["TAGE_SC_L"])
+    points = list(iter_sweep_points(spec))
+    assert points[0] == {
+        "config": "BaseCPU", "bp": "TAGE_SC_L",
+        "extra_params": {"fetchWidth": 2, "numROBEntries": 64}, "name": "w2_rob64",
+    }
+    assert [p["name"] for p in points] == ["w2_rob64", "w2_rob192", "w4_rob64", "w4_rob192", "w8_rob64", "w8_rob192"]
+    # Points that share the tables must not share the dict
+    points[0]["extra_params"]["fetchWidth"] = 16
+    assert points[1]["extra_params"]["fetchWidth"] == 2
+
+
+def test_naming_aliases():
+    spec = spec_of(axes=[{"name": "delay", "values": [0, 1]}],
+                   naming={"dir": "delay_{delay}", "aliases": {"delay": {"0": "none"}}})
+    assert [p["name"] for p in iter_sweep_points(spec)] == ["delay_none", "delay_1"]
+
+
+def test_naming_rule_with_unknown_field():
+    spec = spec_of(axes=[WIDTHS], naming={"dir": "{decodeWidth}"})
+    with pytest.raises(ValueError):
+        format_point_name(spec, {"extra_params": {"fetchWidth": 2}})
@@ -0,0 +1,29 @@
+import subprocess
+
+import sweep_submit
+from sweep_submit import array_chunks, query_max_array_size, DEFAULT_MAX_ARRAY_SIZE
+
+
+def test_array_chunks():
+    runs = list(range(7))
+    assert array_chunks(runs, 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert array_chunks(runs, 7) == [runs]
+    assert array_chunks(runs, 1000) == [runs]
+    assert array_chunks([], 3) == []
+
+
+def scontrol_output(monkeypatch, stdout, returncode=0):
+    monkeypatch.setattr(sweep_submit.subprocess, "run", lambda *args, **kwargs: subprocess.CompletedProcess(
+        args, returncode, stdout=stdout, stderr=""))
+
+
+def test_max_array_size_from_scontrol(monkeypatch):
+    scontrol_output(monkeypatch, "MaxArraySize            = 50\nMaxJobCount             = 10000\n")
+    assert query_max_array_size() == 50
+
+
+def test_max_array_size_default(monkeypatch):
+    scontrol_output(monkeypatch, "MaxJobCount = 10000\n")
+    assert query_max_array_size() == DEFAULT_MAX_ARRAY_SIZE
+    scontrol_output(monkeypatch, "", returncode=1)
+    assert query_max_array_size() == DEFAULT_MAX_ARRAY_SIZE